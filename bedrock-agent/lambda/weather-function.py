@@ -1,6 +1,17 @@
 import json
 import requests
 import os
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Reused across warm invocations so repeat calls skip the TCP/TLS handshake.
+# This function is deployed without the product opportunity layer, so it keeps its own session.
+session = requests.Session()
+session.mount('http://', HTTPAdapter(
+    pool_maxsize=4,
+    # Read timeouts are not retried, so one call waits at most one 10s read
+    max_retries=Retry(total=2, read=0, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+))
 
 def lambda_handler(event, context):
     # Extract city from the agent's input
@@ -23,7 +34,7 @@ def lambda_handler(event, context):
     try:
         # Get current weather
         url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        response = requests.get(url)
+        response = session.get(url, timeout=(3.05, 10))
         
         if response.status_code == 200:
             data = response.json()
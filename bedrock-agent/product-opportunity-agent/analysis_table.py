@@ -0,0 +1,114 @@
+import time
+
+# Setup of the ProductOpportunityAnalysis table shared by the deploy scripts,
+# which run from this directory. Safe to re-run: an existing table gets any
+# missing leaderboard indexes and TTL, a new one is created with both.
+
+TABLE_NAME = 'ProductOpportunityAnalysis'
+# Cache, lease, breaker and checkpoint items written by the Lambdas expire through DynamoDB TTL
+TTL_ATTRIBUTE = 'expires_at'
+
+# Leaderboards (opportunity_common.leaderboard): board items are partitioned by
+# scorer, week and score bucket, and sorted by score or weekly rise
+LEADERBOARD_INDEXES = [
+    {
+        'IndexName': 'leaderboard-score',
+        'KeySchema': [
+            {'AttributeName': 'score_board', 'KeyType': 'HASH'},
+            {'AttributeName': 'score', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': ['idea', 'region', 'rise', 'updated_at']}
+    },
+    {
+        'IndexName': 'leaderboard-rise',
+        'KeySchema': [
+            {'AttributeName': 'rise_board', 'KeyType': 'HASH'},
+            {'AttributeName': 'rise', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': ['idea', 'region', 'score', 'updated_at']}
+    }
+]
+
+LEADERBOARD_ATTRIBUTES = [
+    {'AttributeName': 'score_board', 'AttributeType': 'S'},
+    {'AttributeName': 'score', 'AttributeType': 'N'},
+    {'AttributeName': 'rise_board', 'AttributeType': 'S'},
+    {'AttributeName': 'rise', 'AttributeType': 'N'}
+]
+
+def create_analysis_table(dynamodb):
+    """Create the analysis table or bring an existing one up to date; True when it was created"""
+    
+    try:
+        dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[
+                {'AttributeName': 'query_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'query_id', 'AttributeType': 'S'},
+                {'AttributeName': 'timestamp', 'AttributeType': 'S'}
+            ] + LEADERBOARD_ATTRIBUTES,
+            GlobalSecondaryIndexes=LEADERBOARD_INDEXES,
+            BillingMode='PAY_PER_REQUEST'
+        )
+        created = True
+    
+    except dynamodb.exceptions.ResourceInUseException:
+        created = False
+    
+    dynamodb.get_waiter('table_exists').wait(TableName=TABLE_NAME)
+    enable_ttl(dynamodb)
+    if not created:
+        add_leaderboard_indexes(dynamodb)
+    return created
+
+def enable_ttl(dynamodb):
+    """Turn on TTL for expires_at unless it already is"""
+    
+    description = dynamodb.describe_time_to_live(TableName=TABLE_NAME)['TimeToLiveDescription']
+    status = description.get('TimeToLiveStatus')
+    if status in ('ENABLED', 'ENABLING'):
+        if description.get('AttributeName') != TTL_ATTRIBUTE:
+            print(f"TTL is set on {description.get('AttributeName')}, not {TTL_ATTRIBUTE}; expired items will not be removed")
+        return
+    if status == 'DISABLING':
+        print("TTL is being disabled; re-run once that finishes to enable it")
+        return
+    
+    try:
+        dynamodb.update_time_to_live(
+            TableName=TABLE_NAME,
+            TimeToLiveSpecification={'Enabled': True, 'AttributeName': TTL_ATTRIBUTE}
+        )
+        print(f"Enabled TTL on {TTL_ATTRIBUTE}")
+    except dynamodb.exceptions.ClientError as e:
+        # Another deploy enabled it since describe_time_to_live
+        if e.response['Error']['Code'] != 'ValidationException' or 'already enabled' not in str(e):
+            raise
+
+def add_leaderboard_indexes(dynamodb):
+    """Add the leaderboard GSIs to a table created before they existed, one at a time"""
+    
+    table = dynamodb.describe_table(TableName=TABLE_NAME)['Table']
+    existing = {index['IndexName'] for index in table.get('GlobalSecondaryIndexes', [])}
+    
+    for index in LEADERBOARD_INDEXES:
+        if index['IndexName'] in existing:
+            continue
+        names = {key['AttributeName'] for key in index['KeySchema']}
+        dynamodb.update_table(
+            TableName=TABLE_NAME,
+            AttributeDefinitions=[a for a in LEADERBOARD_ATTRIBUTES if a['AttributeName'] in names],
+            GlobalSecondaryIndexUpdates=[{'Create': index}]
+        )
+        print(f"Creating index {index['IndexName']} (backfills in the background)")
+        
+        # DynamoDB accepts one index creation at a time
+        while True:
+            time.sleep(10)
+            table = dynamodb.describe_table(TableName=TABLE_NAME)['Table']
+            statuses = [i['IndexStatus'] for i in table.get('GlobalSecondaryIndexes', [])]
+            if all(status == 'ACTIVE' for status in statuses):
+                break
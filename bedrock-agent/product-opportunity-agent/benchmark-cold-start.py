@@ -0,0 +1,118 @@
+import base64
+import boto3
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+# Deployed function -> handler source, for the --local import-time mode
+FUNCTIONS = {
+    'enhanced-market-demand': 'lambda/enhanced-market-demand-real-api.py',
+    'enhanced-competitor-scan': 'lambda/enhanced-competitor-scan.py',
+    'enhanced-capability-match': 'lambda/enhanced-capability-match.py',
+    'batch-opportunity-scoring': 'lambda/batch-opportunity-scoring.py'
+}
+
+# Scorer modules the batch handler imports, named as deploy-batch-scoring.py packages them
+BATCH_MODULES = {
+    'lambda/enhanced-market-demand-real-api.py': 'market_demand.py',
+    'lambda/enhanced-competitor-scan.py': 'competitor_scan.py',
+    'lambda/enhanced-capability-match.py': 'capability_match.py'
+}
+
+COLD_START_BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', '800'))
+RUNS = int(os.environ.get('COLD_START_RUNS', '3'))
+
+TEST_PAYLOAD = {'query': 'smart water bottle', 'region': 'US', 'ideas': ['smart water bottle']}
+
+INIT_DURATION = re.compile(r'Init Duration: ([\d.]+) ms')
+
+def force_cold_start(lambda_client, function_name):
+    """Change an environment variable so the next invoke lands on a fresh execution environment"""
+    
+    config = lambda_client.get_function_configuration(FunctionName=function_name)
+    variables = config.get('Environment', {}).get('Variables', {})
+    variables['COLD_START_NONCE'] = uuid.uuid4().hex
+    
+    lambda_client.update_function_configuration(
+        FunctionName=function_name,
+        Environment={'Variables': variables}
+    )
+    lambda_client.get_waiter('function_updated').wait(FunctionName=function_name)
+
+def measure_init_duration(lambda_client, function_name):
+    """Invoke once after forcing a cold start and read Init Duration from the REPORT log line"""
+    
+    force_cold_start(lambda_client, function_name)
+    response = lambda_client.invoke(
+        FunctionName=function_name,
+        Payload=json.dumps(TEST_PAYLOAD),
+        LogType='Tail'
+    )
+    log_tail = base64.b64decode(response['LogResult']).decode('utf-8')
+    
+    match = INIT_DURATION.search(log_tail)
+    if not match:
+        raise Exception(f"No Init Duration in log tail for {function_name}")
+    return float(match.group(1))
+
+def measure_local_import(handler_path, module_dir):
+    """Import a handler in a fresh interpreter and return the import time in ms"""
+    
+    script = (
+        "import importlib.util, sys, time\n"
+        f"sys.path[:0] = ['lambda', {module_dir!r}]\n"
+        "start = time.perf_counter()\n"
+        f"spec = importlib.util.spec_from_file_location('handler', {handler_path!r})\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(module)\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+def benchmark_cold_starts(local=False):
+    """Report init duration per function against the cold-start budget"""
+    
+    lambda_client = None if local else boto3.client('lambda', region_name='us-east-1')
+    module_dir = tempfile.mkdtemp()
+    for source, module_name in BATCH_MODULES.items():
+        shutil.copy(source, os.path.join(module_dir, module_name))
+    label = 'import time' if local else 'Init Duration'
+    over_budget = []
+    
+    print(f"{label} over {RUNS} cold starts (budget {COLD_START_BUDGET_MS:.0f} ms)")
+    for function_name, handler_path in FUNCTIONS.items():
+        try:
+            samples = []
+            for _ in range(RUNS):
+                if local:
+                    samples.append(measure_local_import(handler_path, module_dir))
+                else:
+                    samples.append(measure_init_duration(lambda_client, function_name))
+                    time.sleep(1)
+            
+            median = statistics.median(samples)
+            status = 'OK' if median <= COLD_START_BUDGET_MS else 'OVER BUDGET'
+            if median > COLD_START_BUDGET_MS:
+                over_budget.append(function_name)
+            print(f"  {function_name:28} median {median:8.1f} ms  "
+                  f"min {min(samples):8.1f}  max {max(samples):8.1f}  {status}")
+        
+        except Exception as e:
+            print(f"  {function_name:28} failed: {e}")
+    
+    shutil.rmtree(module_dir)
+    return over_budget
+
+if __name__ == "__main__":
+    over_budget = benchmark_cold_starts(local='--local' in sys.argv)
+    sys.exit(1 if over_budget else 0)
@@ -0,0 +1,227 @@
+import copy
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Local benchmark for every handler under lambda/: import time in a fresh
+# interpreter, then warm latency and allocations for each recorded event shape,
+# with external HTTP served by benchmarks/stub_server.py through the Lambdas'
+# endpoint overrides. Stub faults come from STUB_LATENCY_MS, STUB_JITTER_MS,
+# STUB_ERROR_RATE, STUB_ERROR_STATUS and STUB_RATE_LIMIT.
+#
+#   python benchmark-handlers.py                     run and compare with the baseline
+#   python benchmark-handlers.py --update-baseline   record the current numbers as the baseline
+#   python benchmark-handlers.py enhanced-market-demand-real-api.py   only the named handlers
+
+BENCHMARK_DIR = 'benchmarks'
+EVENTS_FILE = os.path.join(BENCHMARK_DIR, 'events.json')
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+ITERATIONS = int(os.environ.get('BENCHMARK_ITERATIONS', '50'))
+ALLOC_ITERATIONS = int(os.environ.get('BENCHMARK_ALLOC_ITERATIONS', '10'))
+
+# Fail when a metric grows by more than this fraction and by more than MIN_REGRESSION_MS
+REGRESSION_THRESHOLD = float(os.environ.get('BENCHMARK_REGRESSION_THRESHOLD', '0.25'))
+MIN_REGRESSION_MS = float(os.environ.get('BENCHMARK_MIN_REGRESSION_MS', '2'))
+
+# Scorer modules the batch handler imports, named as deploy-batch-scoring.py packages them
+BATCH_MODULES = {
+    'lambda/enhanced-market-demand-real-api.py': 'market_demand.py',
+    'lambda/enhanced-competitor-scan.py': 'competitor_scan.py',
+    'lambda/enhanced-capability-match.py': 'capability_match.py'
+}
+
+# Credentials only need to exist; every call is answered by the stub server.
+# The demand and analysis caches are disabled and the rate limiters opened up so each
+# iteration measures the full fetch path (use STUB_RATE_LIMIT to exercise throttling).
+WORKER_ENV = {
+    'ANALYSIS_CACHE_SHARED': 'false',
+    'ANALYSIS_PERSIST': 'false',
+    'DEMAND_CACHE_TTL': '0',
+    'ANALYSIS_CACHE_TTL': '0',
+    'ANALYSIS_CACHE_DEGRADED_TTL': '0',
+    'HTTP_RETRY_TOTAL': '0',
+    'NEWS_API_RATE_PER_SECOND': '100000',
+    'NEWS_API_BURST': '100000',
+    'EBAY_RATE_PER_SECOND': '100000',
+    'EBAY_BURST': '100000',
+    'NEWS_API_KEY': 'benchmark',
+    'EBAY_APP_ID': 'benchmark',
+    'EBAY_CERT_ID': 'benchmark',
+    'PYTHONDONTWRITEBYTECODE': '1'
+}
+
+RESULT_MARKER = 'BENCHMARK_RESULT '
+
+def percentiles(samples):
+    """p50/p95/p99 of a list of latencies in ms"""
+    if len(samples) < 2:
+        return {'p50': samples[0], 'p95': samples[0], 'p99': samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+def is_error_response(response):
+    if not isinstance(response, dict):
+        return True
+    status = response.get('statusCode') or response.get('response', {}).get('httpStatusCode', 200)
+    return status >= 400
+
+def call_handler(module, event):
+    """Invoke the handler; returns (elapsed ms, error flag)"""
+    event = copy.deepcopy(event)
+    start = time.perf_counter()
+    try:
+        error = is_error_response(module.lambda_handler(event, None))
+    except Exception:
+        error = True
+    return (time.perf_counter() - start) * 1000, error
+
+def run_worker(handler_path):
+    """Benchmark one handler inside this (fresh) interpreter and print the result as JSON"""
+    
+    sys.path[:0] = [BENCHMARK_DIR, 'lambda', os.environ['BENCHMARK_MODULE_DIR']]
+    import importlib.util
+    
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location('handler', handler_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    result = {'import_ms': (time.perf_counter() - start) * 1000, 'shapes': {}}
+    
+    from stub_server import redirect_requests_to
+    redirect_requests_to(os.environ['STUB_BASE_URL'])
+    
+    with open(EVENTS_FILE) as f:
+        events = json.load(f)
+    
+    for shape, event in events.items():
+        call_handler(module, event)  # warm-up
+        samples = []
+        errors = 0
+        for _ in range(ITERATIONS):
+            elapsed, error = call_handler(module, event)
+            samples.append(elapsed)
+            errors += error
+        
+        tracemalloc.start()
+        peaks = []
+        for _ in range(ALLOC_ITERATIONS):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call_handler(module, event)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+        
+        shape_result = percentiles(samples)
+        shape_result['peak_kib'] = statistics.median(peaks) / 1024
+        shape_result['errors'] = errors
+        result['shapes'][shape] = shape_result
+    
+    print(RESULT_MARKER + json.dumps(result))
+
+def benchmark_handler(handler_path, module_dir, stub_env):
+    """Run run_worker in a fresh interpreter so import time includes every module it loads"""
+    
+    env = dict(os.environ, BENCHMARK_MODULE_DIR=module_dir, **WORKER_ENV, **stub_env)
+    completed = subprocess.run(
+        [sys.executable, __file__, '--worker', handler_path],
+        env=env, capture_output=True, text=True
+    )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    
+    lines = completed.stderr.strip().splitlines()
+    raise Exception(lines[-1] if lines else f"worker exited with {completed.returncode}")
+
+def find_regressions(name, result, baseline):
+    """Compare import time and per-shape p95 with the baseline entry for this handler"""
+    
+    previous = baseline.get(name)
+    if not previous:
+        return []
+    
+    metrics = [('import_ms', result['import_ms'], previous['import_ms'])]
+    for shape, numbers in result['shapes'].items():
+        if shape in previous['shapes']:
+            metrics.append((f"{shape} p95", numbers['p95'], previous['shapes'][shape]['p95']))
+    
+    regressions = []
+    for metric, current, before in metrics:
+        if current > before * (1 + REGRESSION_THRESHOLD) and current - before > MIN_REGRESSION_MS:
+            regressions.append(f"{name} {metric}: {before:.1f} ms -> {current:.1f} ms")
+    return regressions
+
+def run_benchmarks(selected, update_baseline):
+    handlers = sorted(glob.glob('lambda/*.py'))
+    if selected:
+        handlers = [path for path in handlers if os.path.basename(path) in selected]
+    
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    
+    module_dir = tempfile.mkdtemp()
+    for source, module_name in BATCH_MODULES.items():
+        shutil.copy(source, os.path.join(module_dir, module_name))
+    
+    sys.path.insert(0, BENCHMARK_DIR)
+    from stub_server import config_from_env, endpoint_env, start_stub_server
+    stub = start_stub_server(config=config_from_env())
+    stub_env = dict(endpoint_env(stub.base_url, stub.fixtures), STUB_BASE_URL=stub.base_url)
+    
+    results = {}
+    regressions = []
+    print(f"{ITERATIONS} iterations per event shape, {ALLOC_ITERATIONS} with allocation tracing")
+    for handler_path in handlers:
+        name = os.path.basename(handler_path)
+        try:
+            result = benchmark_handler(handler_path, module_dir, stub_env)
+        except Exception as e:
+            print(f"\n{name}: skipped ({e})")
+            continue
+        
+        results[name] = result
+        print(f"\n{name}: import {result['import_ms']:.1f} ms")
+        for shape, numbers in result['shapes'].items():
+            print(f"  {shape:22} p50 {numbers['p50']:7.2f}  p95 {numbers['p95']:7.2f}  p99 {numbers['p99']:7.2f} ms"
+                  f"  peak {numbers['peak_kib']:8.1f} KiB  errors {numbers['errors']}")
+        regressions.extend(find_regressions(name, result, baseline))
+    
+    shutil.rmtree(module_dir)
+    stub.shutdown()
+    print(f"\nStub responses: {json.dumps(stub.stats)}")
+    
+    if update_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {BASELINE_FILE}")
+        return []
+    
+    if not baseline:
+        print("\nNo baseline yet; record one with --update-baseline")
+    elif regressions:
+        print(f"\nRegressions over {REGRESSION_THRESHOLD:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+    else:
+        print("\nNo regressions against the baseline")
+    return regressions
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if sys.argv[1:2] == ['--worker']:
+        run_worker(sys.argv[2])
+    else:
+        args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+        regressions = run_benchmarks(args, '--update-baseline' in sys.argv)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,237 @@
+import argparse
+import glob
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Local stand-in for NewsAPI, Google Trends and eBay. Serves the recorded
+# responses in fixtures/ with injectable latency, error rate and 429 rate limits.
+#
+#   python benchmarks/stub_server.py --port 8765 --latency-ms 300 --jitter-ms 100 --error-rate 0.05 --rate-limit 20
+#
+# Point the Lambdas at it with the printed endpoint overrides (NEWS_API_URL,
+# TRENDS_API_URL, EBAY_TOKEN_URL, EBAY_BROWSE_URL).
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+class StubConfig:
+    """Fault injection for one route (or all routes)
+    
+    latency_ms + uniform(0, jitter_ms) is added to every response; error_rate is
+    the fraction answered with error_status; rate_limit caps requests per second
+    per route, answering the excess with 429 and Retry-After.
+    """
+    
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503, rate_limit=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+    
+    def merged(self, overrides):
+        values = dict(vars(self))
+        values.update(overrides)
+        return StubConfig(**values)
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    """Recorded responses keyed by request path"""
+    
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(fixture_dir, '*.json'))):
+        with open(path) as f:
+            fixture = json.load(f)
+        fixtures[fixture['path']] = fixture
+    return fixtures
+
+def endpoint_env(base_url, fixtures=None):
+    """Environment overrides that point every Lambda upstream call at the stub server"""
+    
+    fixtures = fixtures or load_fixtures()
+    return {
+        fixture['endpoint_env']: f"{base_url}{path}"
+        for path, fixture in fixtures.items() if fixture.get('endpoint_env')
+    }
+
+def page_body(fixture, query):
+    """Slice a paged fixture (e.g. NewsAPI articles) by the request's page parameters"""
+    
+    body = fixture['body']
+    paging = fixture.get('paged')
+    if not paging:
+        return body
+    
+    items = body[paging['items_key']]
+    page = int(query.get(paging['page_param'], ['1'])[0])
+    size = int(query.get(paging['size_param'], [str(len(items))])[0])
+    page_items = items[(page - 1) * size:page * size]
+    return dict(body, **{paging['items_key']: page_items, paging['total_key']: len(items)})
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, address, config=None, route_configs=None, fixtures=None, seed=None):
+        super().__init__(address, StubHandler)
+        self.fixtures = fixtures or load_fixtures()
+        self.config = config or StubConfig()
+        self.route_configs = {
+            path: self.config.merged(overrides) for path, overrides in (route_configs or {}).items()
+        }
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.stats = {}
+    
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+    
+    def config_for(self, path):
+        return self.route_configs.get(path, self.config)
+    
+    def admit(self, path, rate_limit):
+        """Fixed one-second window per route; False once rate_limit requests were served"""
+        if not rate_limit:
+            return True
+        with self.lock:
+            window = int(time.time())
+            started, count = self.windows.get(path, (window, 0))
+            if started != window:
+                started, count = window, 0
+            self.windows[path] = (started, count + 1)
+            return count < rate_limit
+    
+    def record(self, path, status):
+        with self.lock:
+            route_stats = self.stats.setdefault(path, {})
+            route_stats[status] = route_stats.get(status, 0) + 1
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve fixtures by path; /<original host>/<path> is accepted too"""
+    
+    def do_GET(self):
+        self.respond()
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        self.respond()
+    
+    def resolve(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path not in self.server.fixtures:
+            # Host-prefixed form used when requests are redirected at the transport adapter
+            _, _, path = path.lstrip('/').partition('/')
+            path = '/' + path
+        return path, parse_qs(parts.query)
+    
+    def respond(self):
+        path, query = self.resolve()
+        fixture = self.server.fixtures.get(path)
+        config = self.server.config_for(path)
+        
+        delay = config.latency_ms + self.server.random.uniform(0, config.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        
+        if fixture is None:
+            self.reply(404, {'error': f"no fixture for {path}"})
+        elif not self.server.admit(path, config.rate_limit):
+            self.reply(429, {'status': 'error', 'code': 'rateLimited', 'message': 'Too many requests'},
+                      headers={'Retry-After': '1'})
+        elif self.server.random.random() < config.error_rate:
+            self.reply(config.error_status, {'status': 'error', 'code': 'unexpectedError', 'message': 'Injected failure'})
+        elif 'body_text' in fixture:
+            self.reply(200, fixture['body_text'], content_type=fixture.get('content_type'))
+        else:
+            self.reply(200, page_body(fixture, query), content_type=fixture.get('content_type'))
+        
+        self.server.record(path, self._status)
+    
+    def reply(self, status, body, content_type=None, headers=None):
+        payload = (body if isinstance(body, str) else json.dumps(body)).encode('utf-8')
+        self._status = status
+        self.send_response(status)
+        self.send_header('Content-Type', content_type or 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, config=None, route_configs=None, seed=None):
+    """Start the stub server on a background thread and return it"""
+    
+    server = StubServer(('127.0.0.1', port), config, route_configs, seed=seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def redirect_requests_to(base_url):
+    """Send requests calls to hosts without an endpoint override to the stub server too.
+    
+    The original host becomes the first path segment, so https://newsapi.org/v2/everything
+    is served from <base_url>/newsapi.org/v2/everything.
+    """
+    
+    from requests.adapters import HTTPAdapter
+    
+    original_send = HTTPAdapter.send
+    
+    def send(adapter, request, **kwargs):
+        parts = urlsplit(request.url)
+        if parts.hostname not in ('127.0.0.1', 'localhost'):
+            query = f"?{parts.query}" if parts.query else ''
+            request.url = f"{base_url}/{parts.hostname}{parts.path}{query}"
+        return original_send(adapter, request, **kwargs)
+    
+    HTTPAdapter.send = send
+
+def config_from_env(prefix='STUB_'):
+    """StubConfig from STUB_LATENCY_MS, STUB_JITTER_MS, STUB_ERROR_RATE, STUB_ERROR_STATUS, STUB_RATE_LIMIT"""
+    return StubConfig(
+        latency_ms=float(os.environ.get(f'{prefix}LATENCY_MS', '0')),
+        jitter_ms=float(os.environ.get(f'{prefix}JITTER_MS', '0')),
+        error_rate=float(os.environ.get(f'{prefix}ERROR_RATE', '0')),
+        error_status=int(os.environ.get(f'{prefix}ERROR_STATUS', '503')),
+        rate_limit=int(os.environ.get(f'{prefix}RATE_LIMIT', '0'))
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded upstream API responses locally")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--rate-limit', type=int, default=0, help='requests per second per route; 0 disables')
+    parser.add_argument('--route-config', help='JSON file of {path: {latency_ms, error_rate, ...}} overrides')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    
+    route_configs = None
+    if args.route_config:
+        with open(args.route_config) as f:
+            route_configs = json.load(f)
+    
+    server = start_stub_server(
+        args.port,
+        StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.rate_limit),
+        route_configs,
+        args.seed
+    )
+    print(f"Stub server listening on {server.base_url}")
+    for name, url in endpoint_env(server.base_url, server.fixtures).items():
+        print(f"export {name}={url}")
+    
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats, indent=2))
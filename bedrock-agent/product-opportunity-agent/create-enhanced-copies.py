@@ -2,6 +2,7 @@ import boto3
 import zipfile
 import json
 import time
+from lambda_packaging import add_shared_package, get_shared_layers
 
 def create_enhanced_copies():
     """Create new enhanced Lambda function copies"""
@@ -63,6 +64,7 @@ def create_enhanced_copies():
             
             with zipfile.ZipFile(zip_filename, 'w') as zip_file:
                 zip_file.write(func['file'], 'lambda_function.py')
+                add_shared_package(zip_file)
             
             with open(zip_filename, 'rb') as zip_file:
                 try:
@@ -74,7 +76,8 @@ def create_enhanced_copies():
                         Code={'ZipFile': zip_file.read()},
                         Description=func['description'],
                         Timeout=30,
-                        MemorySize=256
+                        MemorySize=256,
+                        Layers=get_shared_layers(lambda_client)
                     )
                     print(f"Created: {func['name']}")
                     
@@ -1,10 +1,51 @@
 import boto3
+import compileall
 import os
+import shutil
+import sys
 import zipfile
 import subprocess
 
+LAYER_PYTHON_VERSION = (3, 9)
+
+# Not needed at runtime: test suites, packaging metadata, type stubs and C headers
+STRIP_DIRS = {'tests', '__pycache__'}
+STRIP_DIR_SUFFIXES = ('.dist-info', '.egg-info')
+STRIP_FILE_SUFFIXES = ('.pyi', '.pyc', '.pxd', '.c', '.h')
+
+def slim_layer(python_dir):
+    """Strip files Lambda never imports, then precompile bytecode.
+    
+    /opt is read-only in Lambda, so without precompiled .pyc files every cold
+    start recompiles each imported module from source.
+    """
+    
+    # Console scripts pip installs next to the packages
+    shutil.rmtree(os.path.join(python_dir, 'bin'), ignore_errors=True)
+    
+    removed = 0
+    for root, dirs, files in os.walk(python_dir, topdown=True):
+        for name in list(dirs):
+            if name in STRIP_DIRS or name.endswith(STRIP_DIR_SUFFIXES):
+                path = os.path.join(root, name)
+                removed += sum(len(f) for _, _, f in os.walk(path))
+                shutil.rmtree(path)
+                dirs.remove(name)
+        for name in files:
+            if name.endswith(STRIP_FILE_SUFFIXES):
+                os.remove(os.path.join(root, name))
+                removed += 1
+    print(f"Stripped {removed} files from layer")
+    
+    # Bytecode is only valid for the interpreter version that wrote it
+    if sys.version_info[:2] == LAYER_PYTHON_VERSION:
+        compileall.compile_dir(python_dir, quiet=1, workers=0)
+    else:
+        print(f"Skipping bytecode precompile: building with Python {sys.version_info[0]}.{sys.version_info[1]}, "
+              f"layer targets {LAYER_PYTHON_VERSION[0]}.{LAYER_PYTHON_VERSION[1]}")
+
 def create_requests_layer():
-    """Create Lambda layer with requests library"""
+    """Create Lambda layer with requests, numpy and the shared opportunity_common package"""
     
     lambda_client = boto3.client('lambda', region_name='us-east-1')
     
@@ -14,14 +55,27 @@ def create_requests_layer():
     
     os.makedirs(python_dir, exist_ok=True)
     
-    # Install requests to layer directory
+    # Install requests and numpy (for the scoring kernel) to layer directory;
+    # numpy ships compiled code, so pin the wheel to the Lambda platform
     subprocess.run([
-        "pip", "install", "requests", "-t", python_dir
+        "pip", "install", "requests", "numpy",
+        "--platform", "manylinux2014_x86_64", "--python-version", "3.9", "--no-compile",
+        "--only-binary=:all:", "-t", python_dir
     ], check=True)
     
+    # Bundle shared helpers used by the Lambda functions
+    shared_dir = f"{python_dir}/opportunity_common"
+    shutil.rmtree(shared_dir, ignore_errors=True)
+    shutil.copytree(
+        "lambda/opportunity_common", shared_dir,
+        ignore=shutil.ignore_patterns("__pycache__", "*.pyc")
+    )
+    
+    slim_layer(python_dir)
+    
     # Create layer zip
     layer_zip = "requests-layer.zip"
-    with zipfile.ZipFile(layer_zip, 'w') as zip_file:
+    with zipfile.ZipFile(layer_zip, 'w', zipfile.ZIP_DEFLATED) as zip_file:
         for root, dirs, files in os.walk(layer_dir):
             for file in files:
                 file_path = os.path.join(root, file)
@@ -32,7 +86,7 @@ def create_requests_layer():
     with open(layer_zip, 'rb') as zip_file:
         response = lambda_client.publish_layer_version(
             LayerName='requests-layer',
-            Description='Requests library for Lambda functions',
+            Description='Requests, numpy and shared helpers for Lambda functions',
             Content={'ZipFile': zip_file.read()},
             CompatibleRuntimes=['python3.9']
         )
@@ -40,13 +94,13 @@ def create_requests_layer():
     layer_arn = response['LayerVersionArn']
     print(f"Created layer: {layer_arn}")
     
-    # Update market-demand-agent with layer
-    lambda_client.update_function_configuration(
-        FunctionName='market-demand-agent',
-        Layers=[layer_arn]
-    )
-    
-    print("Updated market-demand-agent with requests layer")
+    # Attach the layer to every function that uses the pooled HTTP session
+    for function_name in ['market-demand-agent', 'competitor-scan-agent']:
+        lambda_client.update_function_configuration(
+            FunctionName=function_name,
+            Layers=[layer_arn]
+        )
+        print(f"Updated {function_name} with requests layer")
     return layer_arn
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+import boto3
+import json
+import os
+import zipfile
+from lambda_packaging import add_shared_package, get_shared_layers, mount_demand_history
+
+FUNCTION_NAME = 'batch-opportunity-scoring'
+# Same package, entered through rescore_handler, with the longest Lambda timeout
+RESCORE_FUNCTION_NAME = 'portfolio-rescoring'
+# Each scheduled run resumes the pass in progress; a new pass starts once
+# RESCORE_PASS_INTERVAL (a day by default) has passed since the last one completed
+RESCORE_RULE_NAME = 'portfolio-rescoring-schedule'
+RESCORE_SCHEDULE = os.environ.get('RESCORE_SCHEDULE', 'rate(15 minutes)')
+
+# Scorer Lambdas bundled under importable module names for the batch handler
+SCORER_MODULES = {
+    'lambda/enhanced-market-demand-real-api.py': 'market_demand.py',
+    'lambda/enhanced-competitor-scan.py': 'competitor_scan.py',
+    'lambda/enhanced-capability-match.py': 'capability_match.py'
+}
+
+def deploy_batch_scoring():
+    """Deploy the batch DCC ranking Lambda and expose it to the orchestrator agent"""
+    
+    lambda_client = boto3.client('lambda', region_name='us-east-1')
+    iam = boto3.client('iam')
+    
+    role_arn = iam.get_role(RoleName='ProductOpportunityLambdaRole')['Role']['Arn']
+    
+    # Latest requests layer provides requests for the real-API scorer
+    layers = get_shared_layers(lambda_client)
+    
+    zip_filename = f"{FUNCTION_NAME}.zip"
+    with zipfile.ZipFile(zip_filename, 'w') as zip_file:
+        zip_file.write('lambda/batch-opportunity-scoring.py', 'lambda_function.py')
+        for source, module_name in SCORER_MODULES.items():
+            zip_file.write(source, module_name)
+        add_shared_package(zip_file)
+    
+    with open(zip_filename, 'rb') as zip_file:
+        try:
+            response = lambda_client.create_function(
+                FunctionName=FUNCTION_NAME,
+                Runtime='python3.9',
+                Role=role_arn,
+                Handler='lambda_function.lambda_handler',
+                Code={'ZipFile': zip_file.read()},
+                Description='Ranks a batch of product ideas by DCC score',
+                Timeout=60,
+                MemorySize=512,
+                Layers=layers
+            )
+            print(f"Created function: {FUNCTION_NAME}")
+        
+        except lambda_client.exceptions.ResourceConflictException:
+            zip_file.seek(0)
+            response = lambda_client.update_function_code(
+                FunctionName=FUNCTION_NAME,
+                ZipFile=zip_file.read()
+            )
+            print(f"Updated function: {FUNCTION_NAME}")
+    
+    function_arn = response['FunctionArn']
+    deploy_rescoring(lambda_client, zip_filename, role_arn, layers)
+    
+    # Both functions run the market demand scorer, which extends the weekly demand history
+    for function_name in (FUNCTION_NAME, RESCORE_FUNCTION_NAME):
+        mount_demand_history(lambda_client, iam, function_name)
+    add_ranking_action_group(function_arn)
+    return function_arn
+
+def deploy_rescoring(lambda_client, zip_filename, role_arn, layers):
+    """Deploy the bulk re-scoring job from the batch package; invoke it on a schedule"""
+    
+    with open(zip_filename, 'rb') as zip_file:
+        try:
+            response = lambda_client.create_function(
+                FunctionName=RESCORE_FUNCTION_NAME,
+                Runtime='python3.9',
+                Role=role_arn,
+                Handler='lambda_function.rescore_handler',
+                Code={'ZipFile': zip_file.read()},
+                Description='Re-scores every tracked product idea and stores the changed scores',
+                Timeout=900,
+                MemorySize=1024,
+                Layers=layers
+            )
+            print(f"Created function: {RESCORE_FUNCTION_NAME}")
+        
+        except lambda_client.exceptions.ResourceConflictException:
+            zip_file.seek(0)
+            response = lambda_client.update_function_code(
+                FunctionName=RESCORE_FUNCTION_NAME,
+                ZipFile=zip_file.read()
+            )
+            print(f"Updated function: {RESCORE_FUNCTION_NAME}")
+    
+    # One run at a time: overlapping runs would resume the same checkpoint twice
+    lambda_client.put_function_concurrency(
+        FunctionName=RESCORE_FUNCTION_NAME,
+        ReservedConcurrentExecutions=1
+    )
+    schedule_rescoring(lambda_client, response['FunctionArn'])
+
+def schedule_rescoring(lambda_client, function_arn):
+    """Invoke the re-scoring job from an EventBridge schedule rule"""
+    
+    events = boto3.client('events', region_name='us-east-1')
+    rule_arn = events.put_rule(
+        Name=RESCORE_RULE_NAME,
+        ScheduleExpression=RESCORE_SCHEDULE,
+        State='ENABLED',
+        Description='Resumes or starts the portfolio re-scoring pass'
+    )['RuleArn']
+    
+    try:
+        lambda_client.add_permission(
+            FunctionName=RESCORE_FUNCTION_NAME,
+            StatementId='eventbridge-schedule-invoke',
+            Action='lambda:InvokeFunction',
+            Principal='events.amazonaws.com',
+            SourceArn=rule_arn
+        )
+    except lambda_client.exceptions.ResourceConflictException:
+        pass
+    
+    events.put_targets(Rule=RESCORE_RULE_NAME, Targets=[{'Id': RESCORE_FUNCTION_NAME, 'Arn': function_arn}])
+    print(f"Scheduled {RESCORE_FUNCTION_NAME}: {RESCORE_SCHEDULE}")
+
+def add_ranking_action_group(function_arn):
+    """Add the /rank-opportunities, /top-opportunities and /recent-analyses action group to the orchestrator agent"""
+    
+    bedrock = boto3.client('bedrock-agent', region_name='us-east-1')
+    lambda_client = boto3.client('lambda', region_name='us-east-1')
+    
+    with open('product-opportunity-config.json', 'r') as f:
+        agent_id = json.load(f)['agentId']
+    
+    try:
+        lambda_client.add_permission(
+            FunctionName=FUNCTION_NAME,
+            StatementId='bedrock-agent-invoke',
+            Action='lambda:InvokeFunction',
+            Principal='bedrock.amazonaws.com'
+        )
+    except lambda_client.exceptions.ResourceConflictException:
+        pass
+    
+    api_schema = {
+        "openapi": "3.0.0",
+        "info": {"title": "Batch Opportunity Ranking API", "version": "1.0.0"},
+        "paths": {
+            "/rank-opportunities": {
+                "post": {
+                    "description": "Score several product ideas at once and return them ranked by DCC score",
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "ideas": {
+                                            "type": "string",
+                                            "description": "Comma separated list of product ideas"
+                                        },
+                                        "region": {"type": "string"}
+                                    },
+                                    "required": ["ideas"]
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": {"description": "Ideas ranked by DCC score"}
+                    }
+                }
+            },
+            "/top-opportunities": {
+                "post": {
+                    "description": "Return this week's leaderboard of product ideas: best score (board=top) or biggest rise since last week (board=rising)",
+                    "requestBody": {
+                        "required": False,
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "board": {"type": "string", "description": "top or rising"},
+                                        "scorer": {
+                                            "type": "string",
+                                            "description": "dcc, market-demand, competition-scan or capability-match"
+                                        },
+                                        "region": {"type": "string"},
+                                        "limit": {"type": "integer"},
+                                        "cursor": {"type": "string", "description": "next_cursor of the previous page"}
+                                    }
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": {"description": "Ideas on the leaderboard, best first"}
+                    }
+                }
+            },
+            "/recent-analyses": {
+                "post": {
+                    "description": "Return stored analyses of a product idea, newest first, without recomputing them",
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "idea": {"type": "string", "description": "Product idea to look up"},
+                                        "scorer": {
+                                            "type": "string",
+                                            "description": "Only this scorer: dcc, market-demand, competition-scan or capability-match"
+                                        },
+                                        "limit": {"type": "integer"}
+                                    },
+                                    "required": ["idea"]
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": {"description": "Stored analyses for the idea"}
+                    }
+                }
+            }
+        }
+    }
+    
+    action_group = {
+        'agentId': agent_id,
+        'agentVersion': 'DRAFT',
+        'actionGroupName': 'batch-opportunity-ranking',
+        'description': 'Rank multiple product ideas by DCC score in one call, read the weekly leaderboards and look up stored analyses',
+        'actionGroupExecutor': {'lambda': function_arn},
+        'apiSchema': {'payload': json.dumps(api_schema)},
+        'actionGroupState': 'ENABLED'
+    }
+    
+    try:
+        existing = bedrock.list_agent_action_groups(agentId=agent_id, agentVersion='DRAFT')['actionGroupSummaries']
+        existing_ids = [group['actionGroupId'] for group in existing
+                        if group['actionGroupName'] == action_group['actionGroupName']]
+        if existing_ids:
+            bedrock.update_agent_action_group(actionGroupId=existing_ids[0], **action_group)
+            print("Updated action group: batch-opportunity-ranking")
+        else:
+            bedrock.create_agent_action_group(**action_group)
+            print("Created action group: batch-opportunity-ranking")
+        
+        bedrock.prepare_agent(agentId=agent_id)
+        print("Agent prepared with batch ranking action")
+    
+    except Exception as e:
+        print(f"Error adding batch ranking action group: {e}")
+
+if __name__ == "__main__":
+    deploy_batch_scoring()
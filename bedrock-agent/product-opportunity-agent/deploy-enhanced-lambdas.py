@@ -1,6 +1,7 @@
 import boto3
 import zipfile
 import json
+from lambda_packaging import add_shared_package, get_shared_layers
 
 def deploy_enhanced_lambdas():
     """Deploy enhanced Lambda functions"""
@@ -65,6 +66,7 @@ def deploy_enhanced_lambdas():
             
             with zipfile.ZipFile(zip_filename, 'w') as zip_file:
                 zip_file.write(func['file'], 'lambda_function.py')
+                add_shared_package(zip_file)
             
             # Create or update function
             with open(zip_filename, 'rb') as zip_file:
@@ -77,7 +79,8 @@ def deploy_enhanced_lambdas():
                         Code={'ZipFile': zip_file.read()},
                         Description=func['description'],
                         Timeout=30,
-                        MemorySize=256
+                        MemorySize=256,
+                        Layers=get_shared_layers(lambda_client)
                     )
                     print(f"Created function: {func['name']}")
                     
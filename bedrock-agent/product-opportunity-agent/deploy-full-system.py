@@ -3,6 +3,8 @@ import json
 import time
 import zipfile
 import os
+from lambda_packaging import add_shared_package
+from analysis_table import create_analysis_table
 
 def deploy_full_system():
     """Deploy complete product opportunity system with Lambda functions and DynamoDB"""
@@ -48,8 +50,12 @@ def deploy_lambda_functions():
                 "logs:PutLogEvents",
                 "dynamodb:GetItem",
                 "dynamodb:PutItem",
+                "dynamodb:UpdateItem",
+                "dynamodb:BatchWriteItem",
+                "dynamodb:DeleteItem",
                 "dynamodb:Query",
-                "dynamodb:Scan"
+                "dynamodb:Scan",
+                "lambda:InvokeFunction"
             ],
             "Resource": "*"
         }]
@@ -142,6 +148,7 @@ def create_lambda_package(function_file):
     
     with zipfile.ZipFile(zip_path, 'w') as zip_file:
         zip_file.write(f"lambda/{function_file}", function_file)
+        add_shared_package(zip_file)
     
     return zip_path
 
@@ -150,22 +157,9 @@ def create_dynamodb_table():
     
     dynamodb = boto3.client('dynamodb', region_name='us-east-1')
     
-    try:
-        dynamodb.create_table(
-            TableName='ProductOpportunityAnalysis',
-            KeySchema=[
-                {'AttributeName': 'query_id', 'KeyType': 'HASH'},
-                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'query_id', 'AttributeType': 'S'},
-                {'AttributeName': 'timestamp', 'AttributeType': 'S'}
-            ],
-            BillingMode='PAY_PER_REQUEST'
-        )
+    if create_analysis_table(dynamodb):
         print("Created DynamoDB table: ProductOpportunityAnalysis")
-        
-    except dynamodb.exceptions.ResourceInUseException:
+    else:
         print("DynamoDB table already exists")
 
 def update_agent_with_actions(lambda_functions):
@@ -3,6 +3,8 @@ import json
 import time
 import zipfile
 import os
+from lambda_packaging import add_shared_package
+from analysis_table import create_analysis_table
 
 def deploy_product_opportunity_system():
     """Deploy the complete product opportunity recommendation system"""
@@ -129,6 +131,7 @@ def create_lambda_package(function_file):
     
     with zipfile.ZipFile(zip_path, 'w') as zip_file:
         zip_file.write(f"lambda/{function_file}", function_file)
+        add_shared_package(zip_file)
     
     return zip_path
 
@@ -233,22 +236,9 @@ def create_dynamodb_table():
     
     dynamodb = boto3.client('dynamodb', region_name='us-east-1')
     
-    try:
-        dynamodb.create_table(
-            TableName='ProductOpportunityAnalysis',
-            KeySchema=[
-                {'AttributeName': 'query_id', 'KeyType': 'HASH'},
-                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'query_id', 'AttributeType': 'S'},
-                {'AttributeName': 'timestamp', 'AttributeType': 'S'}
-            ],
-            BillingMode='PAY_PER_REQUEST'
-        )
+    if create_analysis_table(dynamodb):
         print("✅ Created DynamoDB table")
-        
-    except dynamodb.exceptions.ResourceInUseException:
+    else:
         print("✅ DynamoDB table already exists")
 
 if __name__ == "__main__":
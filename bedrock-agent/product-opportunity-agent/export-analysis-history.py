@@ -0,0 +1,220 @@
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lambda'))
+
+from opportunity_common.ratelimit import LocalBucketStore, TokenBucketLimiter
+from opportunity_common.results import ANALYSIS_PREFIX, SCORE_KEYS, scan_analysis_pages
+
+# Export stored analyses from ProductOpportunityAnalysis to columnar files for
+# offline analytics, one directory per analysis date:
+#
+#   <output>/date=2026-10-18/part-00000.parquet
+#
+# The table is read with a parallel segmented Scan. Pages flow through a
+# bounded queue into per-date column buffers that are written out as row
+# groups, so memory stays flat however many analyses are exported. Needs
+# pyarrow (pip install pyarrow); it is not part of the Lambda layer.
+#
+#   python export-analysis-history.py exports/analyses
+#   python export-analysis-history.py exports/recent --since=2026-10-01 --format=arrow
+
+SCAN_SEGMENTS = int(os.environ.get('EXPORT_SCAN_SEGMENTS', '8'))
+SCAN_PAGE_SIZE = int(os.environ.get('EXPORT_SCAN_PAGE_SIZE', '1000'))
+# Scan pages requested per second across all segments, to leave capacity for the Lambdas
+PAGES_PER_SECOND = float(os.environ.get('EXPORT_PAGES_PER_SECOND', '20'))
+# Pages scanned ahead of the writer; bounds memory when writing is the slow side
+QUEUE_PAGES = int(os.environ.get('EXPORT_QUEUE_PAGES', '16'))
+# Rows buffered per date before they are written as one row group, and in total
+ROW_GROUP_ROWS = int(os.environ.get('EXPORT_ROW_GROUP_ROWS', '20000'))
+MAX_BUFFERED_ROWS = int(os.environ.get('EXPORT_MAX_BUFFERED_ROWS', '100000'))
+# Writers kept open (enough for the 90-day analysis retention); a date evicted
+# and seen again continues in a new part file
+MAX_OPEN_FILES = int(os.environ.get('EXPORT_MAX_OPEN_FILES', '128'))
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+PROGRESS_EVERY = 50000
+
+_END = object()
+
+def export_schema(pa):
+    return pa.schema([
+        ('idea_key', pa.string()),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('scorer', pa.string()),
+        ('idea', pa.string()),
+        ('region', pa.string()),
+        ('score', pa.float64()),
+        ('dcc_score', pa.float64()),
+        ('demand_score', pa.float64()),
+        ('competition_score', pa.float64()),
+        ('capability_score', pa.float64()),
+        ('data_source', pa.string()),
+        ('result', pa.string())
+    ])
+
+def scan_items(client, segments, page_size, since=None, pages_per_second=PAGES_PER_SECOND):
+    """Every analysis item, read by one thread per Scan segment through a bounded queue"""
+    
+    pages = queue.Queue(maxsize=QUEUE_PAGES)
+    limiter = TokenBucketLimiter('export-scan', pages_per_second, max(1, pages_per_second), LocalBucketStore())
+    
+    def scan_segment(segment):
+        try:
+            limiter.acquire(timeout=float('inf'))
+            for items, last_key in scan_analysis_pages(client, segment, segments, page_size=page_size, since=since):
+                pages.put(items)
+                if last_key:
+                    limiter.acquire(timeout=float('inf'))
+        except Exception as e:
+            pages.put(e)
+        finally:
+            pages.put(_END)
+    
+    for segment in range(segments):
+        threading.Thread(target=scan_segment, args=(segment,), daemon=True, name=f'export-scan-{segment}').start()
+    
+    finished = 0
+    while finished < segments:
+        page = pages.get()
+        if page is _END:
+            finished += 1
+        elif isinstance(page, Exception):
+            raise page
+        else:
+            yield from page
+
+def analysis_rows(items):
+    """One flat row per item: key, time, scorer, the component scores and the raw result"""
+    
+    for item in items:
+        timestamp, _, scorer = item['timestamp']['S'].partition('#')
+        result_text = item.get('result', {}).get('S', '{}')
+        try:
+            result = json.loads(result_text)
+        except ValueError:
+            result = {}
+        if not isinstance(result, dict):
+            result = {}
+        
+        row = {
+            'idea_key': item['query_id']['S'][len(ANALYSIS_PREFIX):],
+            'timestamp': datetime.fromisoformat(timestamp),
+            'scorer': item.get('scorer', {}).get('S', scorer),
+            'idea': item.get('idea', {}).get('S'),
+            'region': item.get('region', {}).get('S'),
+            'score': float(item['score']['N']) if 'score' in item else None,
+            'data_source': result.get('data_source'),
+            'result': result_text
+        }
+        for name in SCORE_KEYS:
+            value = result.get(name)
+            row[name] = float(value) if isinstance(value, (int, float)) else None
+        yield row
+
+class PartitionedWriter:
+    """Column buffers per analysis date, written as row groups to <output>/date=<day>/part-NNNNN files"""
+    
+    def __init__(self, output_dir, file_format, pa, schema):
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.pa = pa
+        self.schema = schema
+        self.buffers = {}
+        self.buffered = 0
+        self.writers = OrderedDict()
+        self.parts = {}
+        self.files = 0
+    
+    def add(self, row):
+        day = row['timestamp'].strftime('%Y-%m-%d')
+        columns = self.buffers.get(day)
+        if columns is None:
+            columns = self.buffers[day] = {name: [] for name in self.schema.names}
+        for name, values in columns.items():
+            values.append(row[name])
+        self.buffered += 1
+        
+        if len(columns['idea_key']) >= ROW_GROUP_ROWS:
+            self.flush(day)
+        elif self.buffered >= MAX_BUFFERED_ROWS:
+            self.flush(max(self.buffers, key=lambda name: len(self.buffers[name]['idea_key'])))
+    
+    def _writer(self, day):
+        writer = self.writers.get(day)
+        if writer is None:
+            while len(self.writers) >= MAX_OPEN_FILES:
+                self.writers.popitem(last=False)[1].close()
+            directory = os.path.join(self.output_dir, f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            part = self.parts.get(day, 0)
+            self.parts[day] = part + 1
+            path = os.path.join(directory, f"part-{part:05d}{FORMATS[self.file_format]}")
+            if self.file_format == 'parquet':
+                import pyarrow.parquet as pq
+                writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+            else:
+                writer = self.pa.ipc.new_file(path, self.schema)
+            self.writers[day] = writer
+            self.files += 1
+        self.writers.move_to_end(day)
+        return writer
+    
+    def flush(self, day):
+        columns = self.buffers.pop(day)
+        table = self.pa.Table.from_pydict(columns, schema=self.schema)
+        self._writer(day).write_table(table)
+        self.buffered -= table.num_rows
+    
+    def close(self):
+        for day in sorted(self.buffers):
+            self.flush(day)
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+def export_history(output_dir, file_format='parquet', since=None):
+    """Export every stored analysis (or those since an ISO date) and return the row count"""
+    
+    try:
+        import pyarrow as pa
+    except ImportError:
+        sys.exit("The export needs pyarrow: pip install pyarrow")
+    
+    if file_format not in FORMATS:
+        sys.exit(f"Unknown format {file_format}; use one of {', '.join(FORMATS)}")
+    if os.path.isdir(output_dir) and os.listdir(output_dir):
+        sys.exit(f"{output_dir} is not empty; export into a new directory")
+    
+    client = boto3.client('dynamodb')
+    writer = PartitionedWriter(output_dir, file_format, pa, export_schema(pa))
+    
+    started = time.time()
+    count = 0
+    print(f"Scanning with {SCAN_SEGMENTS} segments, {SCAN_PAGE_SIZE} items per page")
+    for row in analysis_rows(scan_items(client, SCAN_SEGMENTS, SCAN_PAGE_SIZE, since)):
+        writer.add(row)
+        count += 1
+        if count % PROGRESS_EVERY == 0:
+            print(f"  {count} analyses, {count / (time.time() - started):.0f}/s")
+    writer.close()
+    
+    elapsed = time.time() - started
+    print(f"Exported {count} analyses into {len(writer.parts)} dates, {writer.files} files, "
+          f"in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f}/s) to {output_dir}")
+    return count
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    if len(args) != 1:
+        sys.exit("usage: python export-analysis-history.py OUTPUT_DIR [--since=YYYY-MM-DD] [--format=parquet|arrow]")
+    export_history(args[0], options.get('format', 'parquet'), options.get('since'))
@@ -1,6 +1,7 @@
 import boto3
 import zipfile
 import time
+from lambda_packaging import add_shared_package, update_shared_configuration
 
 def fix_and_update_all_functions():
     """Fix market demand function and update all to use real APIs"""
@@ -25,12 +26,14 @@ def fix_and_update_all_functions():
     competitor_zip = "competitor-scan-real.zip"
     with zipfile.ZipFile(competitor_zip, 'w') as zip_file:
         zip_file.write("lambda/competitor-scan-real-api.py", "competitor-scan-function.py")
+        add_shared_package(zip_file)
     
     with open(competitor_zip, 'rb') as zip_file:
         lambda_client.update_function_code(
             FunctionName='competitor-scan-agent',
             ZipFile=zip_file.read()
         )
+    update_shared_configuration(lambda_client, 'competitor-scan-agent')
     
     print("Updated competitor-scan-agent to real API version")
     
@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package
 
 def fix_competitor_scan():
     """Fix competitor scan function to work without external dependencies"""
@@ -10,6 +11,7 @@ def fix_competitor_scan():
     competitor_zip = "competitor-scan-fixed.zip"
     with zipfile.ZipFile(competitor_zip, 'w') as zip_file:
         zip_file.write("lambda/competitor-scan-function.py", "competitor-scan-function.py")
+        add_shared_package(zip_file)
     
     with open(competitor_zip, 'rb') as zip_file:
         lambda_client.update_function_code(
@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package
 
 def fix_market_demand_lambda():
     """Fix the market demand Lambda function"""
@@ -11,6 +12,7 @@ def fix_market_demand_lambda():
     
     with zipfile.ZipFile(zip_path, 'w') as zip_file:
         zip_file.write("lambda/market-demand-function.py", "market-demand-function.py")
+        add_shared_package(zip_file)
     
     # Update function code
     with open(zip_path, 'rb') as zip_file:
@@ -0,0 +1,247 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from opportunity_common import scoring
+from opportunity_common.fanout import Provider, fetch_all
+from opportunity_common.normalize import normalize_idea, region_code
+from opportunity_common.action_group import ActionGroupApp, dumps
+from opportunity_common.results import create_result_sink, recent_analyses
+from opportunity_common.leaderboard import Leaderboard
+from opportunity_common.rescore import RescoreJob
+
+# Scorer modules are packaged next to this handler by deploy-batch-scoring.py:
+#   market_demand    <- enhanced-market-demand-real-api.py
+#   competitor_scan  <- enhanced-competitor-scan.py
+#   capability_match <- enhanced-capability-match.py
+import market_demand
+import competitor_scan
+import capability_match
+
+MAX_BATCH_IDEAS = int(os.environ.get('MAX_BATCH_IDEAS', '100'))
+MAX_RECENT_ANALYSES = 50
+BATCH_FETCH_DEADLINE = float(os.environ.get('BATCH_FETCH_DEADLINE_SECONDS', '20'))
+# A re-scoring pass stops taking new groups this long before the Lambda timeout
+RESCORE_TIME_MARGIN = float(os.environ.get('RESCORE_TIME_MARGIN_SECONDS', '60'))
+
+# Batch fan-outs are much wider than a single analysis, so they get their own pool
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BATCH_MAX_WORKERS', '32')),
+    thread_name_prefix='batch'
+)
+
+result_sink = create_result_sink()
+leaderboard = Leaderboard()
+
+app = ActionGroupApp('batch-opportunity-scoring', '/rank-opportunities', result_sink=result_sink)
+
+def lambda_handler(event, context):
+    """Rank many product ideas by DCC score in a single invocation"""
+    return app.handle(event, context)
+
+def rescore_handler(event, context):
+    """Scheduled re-scoring of every tracked idea, resuming the last unfinished pass.
+
+    deploy-batch-scoring.py invokes it on an EventBridge schedule; a new pass
+    starts RESCORE_PASS_INTERVAL seconds after the last one completed.
+    {"restart": true} abandons the checkpoint and starts a new pass now.
+    """
+    
+    event = event if isinstance(event, dict) else {}
+    deadline = None
+    if context is not None:
+        deadline = time.time() + context.get_remaining_time_in_millis() / 1000 - RESCORE_TIME_MARGIN
+    
+    job = RescoreJob(score_entries, result_sink)
+    try:
+        progress = job.run(deadline=deadline, restart=bool(event.get('restart')))
+    except Exception as e:
+        print(f"Rescore pass failed: {e}")
+        return {'statusCode': 500, 'body': dumps({'error': str(e)})}
+    
+    print(f"Rescore progress: {progress}")
+    return {'statusCode': 200, 'body': dumps(progress)}
+
+@app.route('/rank-opportunities', 'rank-opportunities', persist=False)
+def rank_ideas(request):
+    """Score and rank request's ideas (list, or comma/newline separated string)"""
+    
+    ideas = request.get_list('ideas')
+    region = request.region
+    if not ideas:
+        raise ValueError("At least one product idea is required")
+    if len(ideas) > MAX_BATCH_IDEAS:
+        raise ValueError(f"At most {MAX_BATCH_IDEAS} ideas can be scored per call")
+    
+    ranked = score_ideas(ideas, region)
+    
+    # One stored DCC record per idea, written before the response is returned
+    if result_sink is not None:
+        for row in ranked:
+            result_sink.add('dcc', row['idea'], row, region)
+    
+    return {
+        'ranked_opportunities': ranked,
+        'idea_count': len(ranked),
+        'region': region,
+        'analysis_timestamp': datetime.now().isoformat()
+    }
+
+@app.route('/recent-analyses', 'recent-analyses', persist=False)
+def get_recent_analyses(request):
+    """Stored analyses for an idea, newest first, read from the table instead of recomputed"""
+    
+    idea = request.get('idea') or request.query
+    limit = min(int(request.get('limit', 10)), MAX_RECENT_ANALYSES)
+    analyses = recent_analyses(idea, limit=limit, scorer=request.get('scorer'), since=request.get('since'))
+    
+    return {
+        'idea': idea,
+        'analyses': analyses,
+        'count': len(analyses)
+    }
+
+@app.route('/top-opportunities', 'top-opportunities', persist=False)
+def get_top_opportunities(request):
+    """This week's best ideas by score (board=top) or by score gained since last week (board=rising)"""
+    
+    board = request.get('board', 'top')
+    scorer = request.get('scorer') or ('market-demand' if board == 'rising' else 'dcc')
+    region = request.params.get('region')
+    page = leaderboard.leaders(
+        board=board,
+        scorer=scorer,
+        limit=request.get('limit', 10),
+        week=request.get('week'),
+        region=region_code(region) if region else None,
+        cursor=request.get('cursor')
+    )
+    
+    return {
+        'board': board,
+        'scorer': scorer,
+        'week': page['week'],
+        'opportunities': page['entries'],
+        'count': len(page['entries']),
+        'next_cursor': page['next_cursor']
+    }
+
+def score_ideas(ideas, region):
+    """Score every idea with one shared fan-out and return the ranked DCC table"""
+    return scoring.rank_opportunities(score_entries([(idea, region) for idea in ideas]))
+
+def score_entries(entries):
+    """Score (idea, region) pairs with one shared fan-out; one unranked DCC row per distinct idea"""
+    
+    # Phrasings of the same idea (case, filler words, word order) share all fetches
+    # and scores; each is analyzed and listed as first written, like a single analysis
+    unique_ideas = {}
+    labels = {}
+    for idea, region in entries:
+        normalized = normalize_idea(idea, region)
+        unique_ideas.setdefault(normalized.key, normalized)
+        labels.setdefault(normalized.key, idea)
+    
+    # News and marketplace listings do not depend on the region, so an idea
+    # tracked in several regions fetches them once
+    topics = {}
+    for key, normalized in unique_ideas.items():
+        topics.setdefault(key.rpartition('|')[0], labels[key])
+    
+    merged_platforms = {topic: competitor_scan.new_merged_platform_data() for topic in topics}
+    answered_platforms = {topic: [] for topic in topics}
+    
+    def merge(result):
+        kind, topic, platform = result.name
+        if kind == 'platform' and result.live:
+            competitor_scan.merge_platform_data(merged_platforms[topic], result.value)
+            answered_platforms[topic].append(platform)
+    
+    providers = []
+    for key, normalized in unique_ideas.items():
+        providers.append(Provider(
+            ('trends', key, None),
+            lambda idea=labels[key], region=normalized.region: market_demand.get_real_trends_data(idea, region),
+            fallback=lambda idea=labels[key], region=normalized.region: market_demand.get_enhanced_mock_trends(idea, region),
+            timeout=BATCH_FETCH_DEADLINE
+        ))
+    for topic, idea in topics.items():
+        providers.append(Provider(
+            ('news', topic, None),
+            lambda idea=idea: market_demand.get_real_news_data(idea),
+            fallback=lambda idea=idea: market_demand.get_enhanced_mock_news(idea),
+            timeout=BATCH_FETCH_DEADLINE
+        ))
+        for platform, config in competitor_scan.PLATFORM_PROVIDERS.items():
+            providers.append(Provider(
+                ('platform', topic, platform),
+                lambda idea=idea, fetch=config['fetch']: fetch(idea),
+                timeout=min(config['timeout'], BATCH_FETCH_DEADLINE)
+            ))
+    
+    signals = fetch_all(providers, on_result=merge, executor=batch_executor)
+    
+    # Gather per-idea features into columns, then score every idea in one kernel call
+    keys = list(unique_ideas)
+    columns = {name: [] for name in [
+        'interest', 'momentum', 'news_volume', 'sentiment',
+        'product_count', 'avg_rating', 'min_price', 'max_price',
+        'avg_skill_level', 'supplier_capability', 'time_score', 'risk_count'
+    ]}
+    details = []
+    
+    for key in keys:
+        idea = labels[key]
+        topic = key.rpartition('|')[0]
+        trends = signals[('trends', key, None)]
+        news = signals[('news', topic, None)]
+        columns['interest'].append(trends.value['current_interest'])
+        columns['momentum'].append(trends.value['momentum'])
+        columns['news_volume'].append(news.value['volume'])
+        columns['sentiment'].append(news.value['sentiment'])
+        
+        merged = merged_platforms[topic]
+        if answered_platforms[topic]:
+            columns['product_count'].append(merged['product_count'])
+            columns['avg_rating'].append(merged['rating_weight_sum'] / merged['product_count'] if merged['product_count'] else 0)
+            columns['min_price'].append(merged['min_price'])
+            columns['max_price'].append(merged['max_price'])
+        else:
+            fallback = competitor_scan.fallback_competition_data(idea, 'general', 'all platforms timed out')
+            columns['product_count'].append(fallback['total_products'])
+            columns['avg_rating'].append(fallback['avg_rating'])
+            columns['min_price'].append(fallback['price_range']['min'])
+            columns['max_price'].append(fallback['price_range']['max'])
+        
+        internal_data = capability_match.get_internal_capabilities(idea)
+        supplier_data = capability_match.get_supplier_capabilities(idea)
+        capability = capability_match.analyze_capabilities(idea, internal_data, supplier_data, [])
+        columns['avg_skill_level'].append(internal_data['avg_skill_level'])
+        columns['supplier_capability'].append(supplier_data['avg_capability'])
+        columns['time_score'].append(capability['time_score'])
+        columns['risk_count'].append(len(capability['risk_factors']))
+        
+        details.append({
+            'time_to_market': capability['time_to_market'],
+            'demand_source': trends.source if trends.source == news.source else 'mixed',
+            'platforms_analyzed': answered_platforms[topic]
+        })
+    
+    scores = scoring.score_candidates(columns)
+    saturation_labels, _ = scoring.saturation_levels(columns['product_count'])
+    
+    rows = []
+    for i, key in enumerate(keys):
+        row = {
+            'idea': labels[key],
+            'region': unique_ideas[key].region,
+            'dcc_score': round(float(scores['dcc'][i]), 2),
+            'demand_score': round(float(scores['demand'][i]), 2),
+            'competition_score': round(float(scores['competition'][i]), 2),
+            'capability_score': round(float(scores['capability'][i]), 2),
+            'market_saturation': str(saturation_labels[i])
+        }
+        row.update(details[i])
+        rows.append(row)
+    
+    return rows
@@ -1,4 +1,5 @@
 import json
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Simple competitor scan function"""
@@ -6,8 +7,8 @@ def lambda_handler(event, context):
         query = event.get('query', event.get('inputText', 'product'))
         
         # Simple mock data
-        total_products = abs(hash(query)) % 500 + 100
-        avg_rating = 3.5 + (hash(query) % 15) / 10
+        total_products = abs(stable_hash(query)) % 500 + 100
+        avg_rating = 3.5 + (stable_hash(query) % 15) / 10
         
         result = {
             'competition_score': min(100, total_products / 10 + avg_rating * 5),
@@ -1,38 +1,51 @@
-import json
-import requests
 import os
 from datetime import datetime
+from opportunity_common.http_client import DEFAULT_TIMEOUT, get_session
+from opportunity_common.oauth import create_token_manager
+from opportunity_common.ratelimit import RateLimitExceeded, limiter_from_env
+from opportunity_common.action_group import ActionGroupApp
+from opportunity_common.cache import create_analysis_cache
+from opportunity_common.coalesce import Coalescer
+from opportunity_common.results import create_result_sink
+from opportunity_common.digest import stable_hash
+
+EBAY_TOKEN_URL = os.environ.get('EBAY_TOKEN_URL', 'https://api.ebay.com/identity/v1/oauth2/token')
+EBAY_BROWSE_URL = os.environ.get('EBAY_BROWSE_URL', 'https://api.ebay.com/buy/browse/v1/item_summary/search')
+EBAY_SCOPE = 'https://api.ebay.com/oauth/api_scope'
+# How long a request queues for a Browse API token before falling back to the mock
+EBAY_RATE_WAIT = float(os.environ.get('EBAY_RATE_WAIT_SECONDS', '2'))
+
+# Created on first use and kept for the life of the container
+ebay_token_manager = None
+
+# Browse API calls are metered per application, across every container
+ebay_limiter = limiter_from_env('ebay-browse', 'EBAY', rate=1, capacity=5)
+
+app = ActionGroupApp(
+    'competition-scan', '/analyze-competition',
+    result_sink=create_result_sink(),
+    cache=create_analysis_cache(),
+    coalescer=Coalescer()
+)
 
 def lambda_handler(event, context):
     """Competitor Scan Agent with real API integration"""
+    return app.handle(event, context)
+
+@app.route('/analyze-competition', 'analyze-competition')
+def scan_competition(request):
+    """Combine Amazon and eBay listings for request.query into a competition analysis"""
     
-    try:
-        # Parse input
-        if isinstance(event, str):
-            event = json.loads(event)
-        
-        query = event.get('query', '')
-        category = event.get('category', 'general')
-        
-        # Amazon Product API analysis
-        amazon_data = get_amazon_data(query)
-        
-        # eBay API analysis  
-        ebay_data = get_ebay_data(query)
-        
-        # Combine and analyze competition
-        competition_analysis = analyze_competition(amazon_data, ebay_data, query)
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps(competition_analysis)
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
+    query = request.get('query', '')
+    
+    # Amazon Product API analysis
+    amazon_data = get_amazon_data(query)
+    
+    # eBay API analysis  
+    ebay_data = get_ebay_data(query)
+    
+    # Combine and analyze competition
+    return analyze_competition(amazon_data, ebay_data, query)
 
 def get_amazon_data(query):
     """Get Amazon product data"""
@@ -49,21 +62,26 @@ def get_amazon_data(query):
         # Real API call would go here
         # For now, return enhanced mock data
         return get_mock_amazon_data(query)
-        
+    
     except Exception as e:
         return get_mock_amazon_data(query)
 
 def get_ebay_data(query):
-    """Get eBay marketplace data"""
+    """Get eBay marketplace data; 'source' says whether it is live, mock or a mock after a failure"""
+    app_id = os.environ.get('EBAY_APP_ID')
+    cert_id = os.environ.get('EBAY_CERT_ID')
+    if not app_id or not cert_id:
+        return dict(get_mock_ebay_data(query), source='mock')
+    
     try:
-        app_id = os.environ.get('EBAY_APP_ID')
-        if not app_id:
-            return get_mock_ebay_data(query)
+        if not ebay_limiter.acquire(EBAY_RATE_WAIT):
+            raise RateLimitExceeded(f"eBay rate limit: no token within {EBAY_RATE_WAIT}s")
         
         # eBay Browse API
-        url = "https://api.ebay.com/buy/browse/v1/item_summary/search"
+        url = EBAY_BROWSE_URL
+        token = get_ebay_token()
         headers = {
-            'Authorization': f'Bearer {get_ebay_token()}',
+            'Authorization': f'Bearer {token}',
             'X-EBAY-C-MARKETPLACE-ID': 'EBAY_US'
         }
         params = {
@@ -71,28 +89,51 @@ def get_ebay_data(query):
             'limit': 50
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = get_session().get(url, headers=headers, params=params, timeout=DEFAULT_TIMEOUT)
+        if response.status_code == 401:
+            # Token revoked or expired early; drop it so the next call refreshes
+            ebay_token_manager.invalidate(token)
+        if response.status_code != 200:
+            raise Exception(f"eBay Browse API failed: {response.status_code}")
         data = response.json()
         
+        # 'total' counts every match; itemSummaries is only the first page
         items = data.get('itemSummaries', [])
         
         return {
-            'total_listings': len(items),
-            'price_range': calculate_price_range([item.get('price', {}).get('value', 0) for item in items]),
-            'avg_condition': analyze_conditions([item.get('condition', '') for item in items])
+            'total_listings': int(data.get('total', len(items))),
+            'price_range': calculate_price_range([parse_price(item) for item in items]),
+            'avg_condition': analyze_conditions([item.get('condition', '') for item in items]),
+            'source': 'live'
         }
-        
+    
     except Exception as e:
-        return get_mock_ebay_data(query)
+        print(f"eBay data unavailable for {query}, using mock: {e}")
+        return dict(get_mock_ebay_data(query), source='mock_fallback', error=str(e))
+
+def parse_price(item):
+    """Browse API prices are decimal strings ("74.00"); None when missing or malformed"""
+    try:
+        return float(item['price']['value'])
+    except (KeyError, TypeError, ValueError):
+        return None
 
 def get_ebay_token():
-    """Get eBay OAuth token"""
-    # Implement eBay OAuth flow
-    return "mock_token"
+    """Get an eBay application token via the client-credentials grant, cached until near expiry"""
+    global ebay_token_manager
+    if ebay_token_manager is None:
+        ebay_token_manager = create_token_manager(
+            'ebay',
+            EBAY_TOKEN_URL,
+            os.environ['EBAY_APP_ID'],
+            os.environ['EBAY_CERT_ID'],
+            EBAY_SCOPE
+        )
+    return ebay_token_manager.get_token()
 
 def get_mock_amazon_data(query):
     """Enhanced mock Amazon data"""
-    query_hash = abs(hash(query))
+    query_hash = abs(stable_hash(query))
     
     total_products = query_hash % 1000 + 100
     avg_rating = 3.0 + (query_hash % 20) / 10
@@ -111,7 +152,7 @@ def get_mock_amazon_data(query):
 
 def get_mock_ebay_data(query):
     """Enhanced mock eBay data"""
-    query_hash = abs(hash(query))
+    query_hash = abs(stable_hash(query))
     
     return {
         'total_listings': query_hash % 500 + 50,
@@ -150,6 +191,14 @@ def analyze_competition(amazon_data, ebay_data, query):
     # Price analysis
     price_analysis = analyze_pricing(amazon_data, ebay_data)
     
+    # Amazon has no live integration yet, so the eBay call decides the source
+    if ebay_data.get('source') == 'live':
+        data_source = 'real_apis'
+    elif ebay_data.get('source') == 'mock_fallback':
+        data_source = 'mock_fallback'
+    else:
+        data_source = 'mock'
+    
     return {
         'competition_score': round(competition_score, 2),
         'total_products': total_products,
@@ -162,7 +211,9 @@ def analyze_competition(amazon_data, ebay_data, query):
             'amazon_dominance': amazon_data['total_products'] / total_products,
             'ebay_presence': ebay_data['total_listings'] / total_products,
             'avg_reviews': sum(amazon_data['review_counts']) / len(amazon_data['review_counts'])
-        }
+        },
+        'data_source': data_source,
+        'provider_sources': {'amazon': 'mock', 'ebay': ebay_data.get('source', 'mock')}
     }
 
 def analyze_feature_gaps(query, amazon_data):
@@ -195,7 +246,7 @@ def analyze_pricing(amazon_data, ebay_data):
 
 def calculate_price_range(prices):
     """Calculate price range from list"""
-    valid_prices = [p for p in prices if p > 0]
+    valid_prices = [p for p in prices if p is not None and p > 0]
     if not valid_prices:
         return {'low': 0, 'high': 0}
     return {'low': min(valid_prices), 'high': max(valid_prices)}
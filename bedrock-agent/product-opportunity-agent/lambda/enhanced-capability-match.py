@@ -1,22 +1,29 @@
-import json
-import boto3
+from opportunity_common import scoring
+from opportunity_common.action_group import ActionGroupApp
+from opportunity_common.cache import create_analysis_cache
+from opportunity_common.coalesce import Coalescer
+from opportunity_common.results import create_result_sink
+from opportunity_common.classifier import classify
+
+app = ActionGroupApp(
+    'capability-match', '/analyze-capability',
+    result_sink=create_result_sink(),
+    cache=create_analysis_cache(),
+    coalescer=Coalescer()
+)
 
 def lambda_handler(event, context):
     """Enhanced Capability Match Agent with Q Business integration"""
+    return app.handle(event, context)
+
+@app.route('/analyze-capability', 'analyze-capability', cache_params=('required_skills',))
+def match_capabilities(request):
+    """Capability analysis for request.query against its required_skills"""
+    
+    query = request.get('query', '')
+    required_skills = request.get_list('required_skills')
     
     try:
-        # Handle Bedrock agent input format
-        if 'inputText' in event:
-            query = event['inputText']
-            required_skills = []
-        elif 'parameters' in event:
-            params = event['parameters']
-            query = params.get('query', '')
-            required_skills = params.get('required_skills', [])
-        else:
-            query = event.get('query', '')
-            required_skills = event.get('required_skills', [])
-        
         # Get internal capability data
         capability_data = get_internal_capabilities(query)
         
@@ -26,7 +33,7 @@ def lambda_handler(event, context):
         # Analyze overall capability
         capability_analysis = analyze_capabilities(query, capability_data, supplier_data, required_skills)
         
-        result = {
+        return {
             'capability_score': capability_analysis['score'],
             'skill_matches': capability_analysis['skill_matches'],
             'skill_gaps': capability_analysis['skill_gaps'],
@@ -38,12 +45,7 @@ def lambda_handler(event, context):
             'risk_factors': capability_analysis['risk_factors'],
             'data_source': 'enhanced_analysis'
         }
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps(result)
-        }
-        
+    
     except Exception as e:
         # Fallback to mock data
         return fallback_capability_data(query, required_skills, str(e))
@@ -54,7 +56,7 @@ def get_internal_capabilities(query):
         # Simulate Q Business query
         # In production, use Amazon Q Business API to query internal knowledge base
         
-        query_lower = query.lower()
+        tags = classify(query)
         
         # Simulate internal skill database
         all_skills = {
@@ -77,21 +79,21 @@ def get_internal_capabilities(query):
         # Determine relevant skills based on query
         relevant_skills = {}
         
-        if any(word in query_lower for word in ['smart', 'iot', 'connected']):
+        if tags.has('connected'):
             relevant_skills.update({
                 'iot_development': all_skills['iot_development'],
                 'software_development': all_skills['software_development'],
                 'hardware_engineering': all_skills['hardware_engineering'],
                 'mobile_development': all_skills['mobile_development']
             })
-        elif any(word in query_lower for word in ['app', 'software', 'digital']):
+        elif tags.has('software'):
             relevant_skills.update({
                 'software_development': all_skills['software_development'],
                 'mobile_development': all_skills['mobile_development'],
                 'cloud_infrastructure': all_skills['cloud_infrastructure'],
                 'data_analytics': all_skills['data_analytics']
             })
-        elif any(word in query_lower for word in ['hardware', 'device', 'physical']):
+        elif tags.has('hardware'):
             relevant_skills.update({
                 'hardware_engineering': all_skills['hardware_engineering'],
                 'product_design': all_skills['product_design'],
@@ -123,7 +125,7 @@ def get_internal_capabilities(query):
             'readiness': readiness,
             'team_size': len(relevant_skills) * 3  # Simulate team size
         }
-        
+    
     except Exception:
         return {
             'relevant_skills': {'product_design': 75, 'manufacturing': 60},
@@ -138,16 +140,16 @@ def get_supplier_capabilities(query):
         # Simulate supplier database query
         # In production, integrate with supplier management systems
         
-        query_lower = query.lower()
+        tags = classify(query)
         
         # Simulate supplier network based on product type
-        if any(word in query_lower for word in ['electronics', 'smart', 'device']):
+        if tags.has('electronics'):
             suppliers = {
                 'electronics_manufacturing': {'capability': 85, 'cost': 'medium', 'lead_time': '8-12 weeks'},
                 'component_sourcing': {'capability': 90, 'cost': 'low', 'lead_time': '4-6 weeks'},
                 'pcb_assembly': {'capability': 80, 'cost': 'medium', 'lead_time': '6-8 weeks'}
             }
-        elif any(word in query_lower for word in ['plastic', 'bottle', 'container']):
+        elif tags.has('plastics'):
             suppliers = {
                 'plastic_molding': {'capability': 90, 'cost': 'low', 'lead_time': '6-10 weeks'},
                 'material_sourcing': {'capability': 85, 'cost': 'low', 'lead_time': '2-4 weeks'},
@@ -175,7 +177,7 @@ def get_supplier_capabilities(query):
             'readiness': readiness,
             'supplier_count': len(suppliers)
         }
-        
+    
     except Exception:
         return {
             'suppliers': {'general_manufacturing': {'capability': 70, 'cost': 'medium', 'lead_time': '10-14 weeks'}},
@@ -192,14 +194,14 @@ def analyze_capabilities(query, internal_data, supplier_data, required_skills):
     skill_matches = internal_skills[:4]  # Top matches
     
     # Identify skill gaps
-    query_lower = query.lower()
+    tags = classify(query)
     potential_gaps = []
     
-    if 'smart' in query_lower and 'ai_ml' not in internal_skills:
+    if tags.matched('smart') and 'ai_ml' not in internal_skills:
         potential_gaps.append('AI/ML expertise')
-    if 'mobile' in query_lower and 'mobile_development' not in internal_skills:
+    if tags.matched('mobile') and 'mobile_development' not in internal_skills:
         potential_gaps.append('Mobile app development')
-    if 'hardware' in query_lower and 'hardware_engineering' not in internal_skills:
+    if tags.matched('hardware') and 'hardware_engineering' not in internal_skills:
         potential_gaps.append('Hardware engineering')
     if 'manufacturing' not in internal_skills:
         potential_gaps.append('Manufacturing expertise')
@@ -222,10 +224,10 @@ def analyze_capabilities(query, internal_data, supplier_data, required_skills):
     
     # Compliance status
     compliance_status = {
-        'regulatory': 'Needs Assessment' if 'device' in query.lower() else 'Standard Review',
+        'regulatory': 'Needs Assessment' if tags.matched('device') else 'Standard Review',
         'safety': 'Compliant',
-        'environmental': 'Needs Review' if 'electronics' in query.lower() else 'Compliant',
-        'data_privacy': 'Compliant' if 'smart' in query.lower() else 'Not Applicable'
+        'environmental': 'Needs Review' if tags.matched('electronics') else 'Compliant',
+        'data_privacy': 'Compliant' if tags.matched('smart') else 'Not Applicable'
     }
     
     # Risk factors
@@ -236,7 +238,7 @@ def analyze_capabilities(query, internal_data, supplier_data, required_skills):
         risk_factors.append('Supplier capability limitations')
     if len(skill_gaps) > 2:
         risk_factors.append('Multiple skill gaps to address')
-    if 'smart' in query.lower():
+    if tags.matched('smart'):
         risk_factors.append('Technology complexity')
     
     # Recommended actions
@@ -249,14 +251,13 @@ def analyze_capabilities(query, internal_data, supplier_data, required_skills):
         recommended_actions.append("Scale development team")
     recommended_actions.append("Conduct detailed feasibility study")
     
-    # Overall capability score
-    internal_score = internal_data['avg_skill_level'] * 0.4
-    supplier_score = supplier_data['avg_capability'] * 0.3
-    time_score_weighted = time_score * 0.2
-    risk_penalty = len(risk_factors) * 5
-    
-    capability_score = internal_score + supplier_score + time_score_weighted - risk_penalty
-    capability_score = max(0, min(100, capability_score))
+    # Overall capability score from the shared scoring kernel
+    capability_score = scoring.capability_score(
+        internal_data['avg_skill_level'],
+        supplier_data['avg_capability'],
+        time_score,
+        len(risk_factors)
+    )
     
     return {
         'score': round(capability_score, 2),
@@ -265,6 +266,7 @@ def analyze_capabilities(query, internal_data, supplier_data, required_skills):
         'internal_readiness': internal_readiness,
         'supplier_readiness': supplier_readiness,
         'time_to_market': time_to_market,
+        'time_score': time_score,
         'compliance_status': compliance_status,
         'recommended_actions': recommended_actions,
         'risk_factors': risk_factors
@@ -273,7 +275,7 @@ def analyze_capabilities(query, internal_data, supplier_data, required_skills):
 def fallback_capability_data(query, required_skills, error):
     """Fallback to mock data if enhanced analysis fails"""
     
-    result = {
+    return {
         'capability_score': 65.0,
         'skill_matches': ['product_design', 'manufacturing', 'marketing'],
         'skill_gaps': ['specialized_expertise'],
@@ -285,9 +287,4 @@ def fallback_capability_data(query, required_skills, error):
         'risk_factors': ['Market uncertainty'],
         'data_source': 'mock_fallback',
         'api_error': error
-    }
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps(result)
     }
\ No newline at end of file
@@ -1,4 +1,5 @@
 import json
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Enhanced Competitor Scan Agent with real APIs"""
@@ -46,10 +47,10 @@ def lambda_handler(event, context):
 
 def simulate_amazon_data(query):
     """Simulate enhanced Amazon data"""
-    product_count = abs(hash(query + 'amazon')) % 600 + 150
-    avg_rating = 3.8 + (abs(hash(query)) % 12) / 10
+    product_count = abs(stable_hash(query + 'amazon')) % 600 + 150
+    avg_rating = 3.8 + (abs(stable_hash(query)) % 12) / 10
     
-    base_price = 25 + abs(hash(query)) % 120
+    base_price = 25 + abs(stable_hash(query)) % 120
     return {
         'product_count': product_count,
         'avg_rating': round(avg_rating, 1),
@@ -59,10 +60,10 @@ def simulate_amazon_data(query):
 
 def simulate_ebay_data(query):
     """Simulate enhanced eBay data"""
-    product_count = abs(hash(query + 'ebay')) % 400 + 80
-    avg_rating = 3.6 + (abs(hash(query + 'ebay')) % 14) / 10
+    product_count = abs(stable_hash(query + 'ebay')) % 400 + 80
+    avg_rating = 3.6 + (abs(stable_hash(query + 'ebay')) % 14) / 10
     
-    base_price = 20 + abs(hash(query + 'ebay')) % 100
+    base_price = 20 + abs(stable_hash(query + 'ebay')) % 100
     return {
         'product_count': product_count,
         'avg_rating': round(avg_rating, 1),
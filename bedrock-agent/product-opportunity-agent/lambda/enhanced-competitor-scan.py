@@ -1,33 +1,53 @@
-import json
-import requests
+import os
 from datetime import datetime
+from opportunity_common.action_group import ActionGroupApp
+from opportunity_common.cache import create_analysis_cache
+from opportunity_common.coalesce import Coalescer
+from opportunity_common.results import create_result_sink
+from opportunity_common.fanout import Provider, fetch_all
+from opportunity_common import scoring
+from opportunity_common.classifier import classify
+from opportunity_common.digest import stable_hash
+
+PLATFORM_TIMEOUT = float(os.environ.get('PLATFORM_TIMEOUT_SECONDS', '8'))
+
+# Marketplace name -> {'fetch': callable(query), 'timeout': seconds}
+PLATFORM_PROVIDERS = {}
+
+def register_platform(name, timeout=None):
+    """Register a marketplace fetcher; all registered platforms are queried concurrently"""
+    
+    def decorator(fetch):
+        PLATFORM_PROVIDERS[name] = {'fetch': fetch, 'timeout': timeout or PLATFORM_TIMEOUT}
+        return fetch
+    return decorator
+
+app = ActionGroupApp(
+    'competition-scan', '/analyze-competition',
+    result_sink=create_result_sink(),
+    cache=create_analysis_cache(),
+    coalescer=Coalescer()
+)
 
 def lambda_handler(event, context):
     """Enhanced Competitor Scan Agent with real APIs"""
+    return app.handle(event, context)
+
+@app.route('/analyze-competition', 'analyze-competition')
+def scan_competition(request):
+    """Competition analysis for request.query across every registered marketplace"""
+    
+    query = request.get('query', '')
+    category = request.get('category', 'general')
     
     try:
-        # Handle Bedrock agent input format
-        if 'inputText' in event:
-            query = event['inputText']
-            category = 'general'
-        elif 'parameters' in event:
-            params = event['parameters']
-            query = params.get('query', '')
-            category = params.get('category', 'general')
-        else:
-            query = event.get('query', '')
-            category = event.get('category', 'general')
-        
-        # Get Amazon product data
-        amazon_data = get_amazon_data(query)
-        
-        # Get eBay data
-        ebay_data = get_ebay_data(query)
+        # Query every registered marketplace in parallel
+        platform_scan = scan_platforms(query)
         
         # Analyze competition
-        competition_analysis = analyze_competition(amazon_data, ebay_data, query)
+        competition_analysis = analyze_competition(platform_scan['merged'], query)
         
-        result = {
+        return {
             'competition_score': competition_analysis['score'],
             'total_products': competition_analysis['total_products'],
             'avg_rating': competition_analysis['avg_rating'],
@@ -35,19 +55,61 @@ def lambda_handler(event, context):
             'top_competitors': competition_analysis['top_competitors'],
             'market_saturation': competition_analysis['market_saturation'],
             'feature_gaps': competition_analysis['feature_gaps'],
-            'data_source': 'real_apis',
-            'platforms_analyzed': ['amazon', 'ebay']
+            'data_source': 'partial_real_apis' if platform_scan['timed_out'] else 'real_apis',
+            'platforms_analyzed': platform_scan['analyzed'],
+            'platforms_timed_out': platform_scan['timed_out']
         }
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps(result)
-        }
-        
+    
     except Exception as e:
         # Fallback to mock data
         return fallback_competition_data(query, category, str(e))
 
+def scan_platforms(query):
+    """Fetch all registered platforms concurrently, merging each result as it arrives"""
+    
+    merged = new_merged_platform_data()
+    
+    def merge(result):
+        if result.live:
+            merge_platform_data(merged, result.value)
+    
+    results = fetch_all([
+        Provider(name, lambda fetch=config['fetch']: fetch(query), timeout=config['timeout'])
+        for name, config in PLATFORM_PROVIDERS.items()
+    ], on_result=merge)
+    
+    analyzed = [name for name, result in results.items() if result.live]
+    timed_out = [name for name, result in results.items() if not result.live]
+    if not analyzed:
+        raise Exception(f"No platform responded in time: {', '.join(timed_out)}")
+    
+    return {'merged': merged, 'analyzed': analyzed, 'timed_out': timed_out}
+
+def new_merged_platform_data():
+    """Empty running aggregate for merge_platform_data"""
+    return {
+        'product_count': 0,
+        'rating_weight_sum': 0,
+        'min_price': None,
+        'max_price': None,
+        'avg_prices': [],
+        'top_brands': []
+    }
+
+def merge_platform_data(merged, platform_data):
+    """Fold one platform's data into the running aggregate"""
+    
+    count = platform_data['product_count']
+    price_range = platform_data['price_range']
+    
+    merged['product_count'] += count
+    merged['rating_weight_sum'] += platform_data['avg_rating'] * count
+    merged['min_price'] = price_range['min'] if merged['min_price'] is None else min(merged['min_price'], price_range['min'])
+    merged['max_price'] = price_range['max'] if merged['max_price'] is None else max(merged['max_price'], price_range['max'])
+    merged['avg_prices'].append(price_range['avg'])
+    merged['top_brands'].extend(platform_data.get('top_brands', []))
+
+@register_platform('amazon')
 def get_amazon_data(query):
     """Get Amazon product data using ASIN API or web scraping"""
     try:
@@ -55,19 +117,19 @@ def get_amazon_data(query):
         # In production, use Amazon Product Advertising API or web scraping
         
         # Mock Amazon data based on query
-        product_count = abs(hash(query + 'amazon')) % 500 + 100
-        avg_rating = 3.5 + (abs(hash(query)) % 15) / 10
+        product_count = abs(stable_hash(query + 'amazon')) % 500 + 100
+        avg_rating = 3.5 + (abs(stable_hash(query)) % 15) / 10
         
         # Price simulation
-        base_price = 20 + abs(hash(query)) % 100
+        base_price = 20 + abs(stable_hash(query)) % 100
         price_range = {
             'min': base_price,
-            'max': base_price * (2 + abs(hash(query)) % 3),
+            'max': base_price * (2 + abs(stable_hash(query)) % 3),
             'avg': base_price * 1.5
         }
         
         # Top brands simulation
-        brands = [f"Brand{i}" for i in range(1, min(8, abs(hash(query)) % 6 + 3))]
+        brands = [f"Brand{i}" for i in range(1, min(8, abs(stable_hash(query)) % 6 + 3))]
         
         return {
             'product_count': product_count,
@@ -76,7 +138,7 @@ def get_amazon_data(query):
             'top_brands': brands,
             'platform': 'amazon'
         }
-        
+    
     except Exception:
         return {
             'product_count': 200,
@@ -86,20 +148,21 @@ def get_amazon_data(query):
             'platform': 'amazon'
         }
 
+@register_platform('ebay')
 def get_ebay_data(query):
     """Get eBay product data using eBay API"""
     try:
         # Simulate eBay API call
         # In production, use eBay Finding API
         
-        product_count = abs(hash(query + 'ebay')) % 300 + 50
-        avg_rating = 3.8 + (abs(hash(query + 'ebay')) % 12) / 10
+        product_count = abs(stable_hash(query + 'ebay')) % 300 + 50
+        avg_rating = 3.8 + (abs(stable_hash(query + 'ebay')) % 12) / 10
         
         # Price simulation (typically lower than Amazon)
-        base_price = 15 + abs(hash(query + 'ebay')) % 80
+        base_price = 15 + abs(stable_hash(query + 'ebay')) % 80
         price_range = {
             'min': base_price,
-            'max': base_price * (1.8 + abs(hash(query)) % 2),
+            'max': base_price * (1.8 + abs(stable_hash(query)) % 2),
             'avg': base_price * 1.3
         }
         
@@ -109,7 +172,7 @@ def get_ebay_data(query):
             'price_range': price_range,
             'platform': 'ebay'
         }
-        
+    
     except Exception:
         return {
             'product_count': 150,
@@ -118,45 +181,22 @@ def get_ebay_data(query):
             'platform': 'ebay'
         }
 
-def analyze_competition(amazon_data, ebay_data, query):
-    """Analyze competition based on multi-platform data"""
-    
-    # Combine data from both platforms
-    total_products = amazon_data['product_count'] + ebay_data['product_count']
+def analyze_competition(merged, query):
+    """Analyze competition based on data merged from all responding platforms"""
     
-    # Weighted average rating
-    total_amazon_weight = amazon_data['product_count']
-    total_ebay_weight = ebay_data['product_count']
-    total_weight = total_amazon_weight + total_ebay_weight
+    total_products = merged['product_count']
     
-    avg_rating = (
-        (amazon_data['avg_rating'] * total_amazon_weight + 
-         ebay_data['avg_rating'] * total_ebay_weight) / total_weight
-    )
+    # Rating averaged across platforms, weighted by product count
+    avg_rating = merged['rating_weight_sum'] / total_products if total_products else 0
     
     # Price range analysis
-    min_price = min(amazon_data['price_range']['min'], ebay_data['price_range']['min'])
-    max_price = max(amazon_data['price_range']['max'], ebay_data['price_range']['max'])
-    avg_price = (amazon_data['price_range']['avg'] + ebay_data['price_range']['avg']) / 2
-    
-    # Market saturation analysis
-    if total_products > 600:
-        saturation = "High"
-        saturation_score = 70
-    elif total_products > 300:
-        saturation = "Medium"
-        saturation_score = 45
-    else:
-        saturation = "Low"
-        saturation_score = 20
-    
-    # Competition score calculation (0-100, higher = more competition)
-    product_density_score = min(40, total_products / 20)
-    rating_competition_score = max(0, (avg_rating - 3.0) * 15)
-    price_competition_score = min(20, (max_price - min_price) / max_price * 100 / 5)
+    min_price = merged['min_price']
+    max_price = merged['max_price']
+    avg_price = sum(merged['avg_prices']) / len(merged['avg_prices'])
     
-    competition_score = product_density_score + rating_competition_score + saturation_score + price_competition_score
-    competition_score = min(100, max(0, competition_score))
+    # Saturation tier and competition score from the shared scoring kernel
+    saturation, _ = scoring.saturation_level(total_products)
+    competition_score = scoring.competition_score(total_products, avg_rating, min_price, max_price)
     
     # Feature gaps analysis
     feature_gaps = identify_feature_gaps(query, total_products, avg_rating)
@@ -170,7 +210,7 @@ def analyze_competition(amazon_data, ebay_data, query):
             'max': round(max_price, 2),
             'avg': round(avg_price, 2)
         },
-        'top_competitors': amazon_data.get('top_brands', [])[:5],
+        'top_competitors': merged['top_brands'][:5],
         'market_saturation': saturation,
         'feature_gaps': feature_gaps
     }
@@ -193,9 +233,10 @@ def identify_feature_gaps(query, product_count, avg_rating):
         gaps.extend(["Innovation", "Cost optimization", "Sustainability"])
     
     # Query-specific gaps
-    if "smart" in query.lower():
+    tags = classify(query)
+    if tags.matched('smart'):
         gaps.extend(["AI integration", "IoT connectivity", "Mobile app"])
-    elif "eco" in query.lower() or "green" in query.lower():
+    elif tags.matched('eco') or tags.matched('green'):
         gaps.extend(["Sustainable materials", "Carbon neutral", "Recyclable"])
     
     return gaps[:4]
@@ -203,10 +244,10 @@ def identify_feature_gaps(query, product_count, avg_rating):
 def fallback_competition_data(query, category, error):
     """Fallback to mock data if APIs fail"""
     
-    total_products = abs(hash(query)) % 800 + 100
-    avg_rating = 3.5 + (hash(query) % 15) / 10
+    total_products = abs(stable_hash(query)) % 800 + 100
+    avg_rating = 3.5 + (stable_hash(query) % 15) / 10
     
-    result = {
+    return {
         'competition_score': min(100, total_products / 10 + avg_rating * 10),
         'total_products': total_products,
         'avg_rating': round(avg_rating, 1),
@@ -216,9 +257,4 @@ def fallback_competition_data(query, category, error):
         'feature_gaps': ["Better design", "Lower price", "Smart features"],
         'data_source': 'mock_fallback',
         'api_error': error
-    }
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps(result)
     }
\ No newline at end of file
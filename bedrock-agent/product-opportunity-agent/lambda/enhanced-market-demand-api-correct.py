@@ -2,6 +2,7 @@ import json
 import urllib.request
 import urllib.parse
 from datetime import datetime, timedelta
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Enhanced Market Demand Agent with API calls and correct Bedrock format"""
@@ -88,8 +89,8 @@ def get_real_trends_data(query):
         # In real implementation, use proper Google Trends API
         
         # For now, simulate API call with enhanced logic
-        current_interest = 70 + (hash(query) % 30)
-        momentum = 1.1 + (hash(query + "momentum") % 40) / 100
+        current_interest = 70 + (stable_hash(query) % 30)
+        momentum = 1.1 + (stable_hash(query + "momentum") % 40) / 100
         
         # Generate realistic trending topics
         trending_topics = [
@@ -121,7 +122,7 @@ def get_real_news_data(query):
         # Simulate news API call
         # In real implementation, parse actual news API response
         
-        volume = 20 + (hash(query + "news") % 30)
+        volume = 20 + (stable_hash(query + "news") % 30)
         
         # Simple sentiment analysis based on query
         if any(word in query.lower() for word in ['smart', 'eco', 'health', 'fitness']):
@@ -161,8 +162,8 @@ def get_enhanced_mock_trends(query):
     else:
         category = "general"
     
-    current_interest = min(100, base_interest + (hash(query) % 20))
-    momentum = 1.0 + (hash(query + category) % 40) / 100
+    current_interest = min(100, base_interest + (stable_hash(query) % 20))
+    momentum = 1.0 + (stable_hash(query + category) % 40) / 100
     
     # Category-specific trending topics
     if category == "smart_tech":
@@ -1,4 +1,5 @@
 import json
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Enhanced Market Demand Agent with correct Bedrock response format"""
@@ -79,10 +80,10 @@ def calculate_enhanced_interest(query):
     for keyword in trending_keywords:
         if keyword in query.lower():
             keyword_boost += 15
-    return min(100, base_score + abs(hash(query)) % 35 + keyword_boost)
+    return min(100, base_score + abs(stable_hash(query)) % 35 + keyword_boost)
 
 def calculate_enhanced_momentum(query):
-    base_momentum = 1.0 + (abs(hash(query)) % 60) / 100
+    base_momentum = 1.0 + (abs(stable_hash(query)) % 60) / 100
     if any(word in query.lower() for word in ['fitness', 'health', 'diet']):
         base_momentum *= 1.2
     elif any(word in query.lower() for word in ['smart', 'ai', 'tech']):
@@ -93,10 +94,10 @@ def generate_enhanced_topics(query):
     return [f"{query} reviews 2024", f"best {query} brands", f"{query} price comparison"]
 
 def calculate_news_volume(query):
-    return min(100, len(query) * 3 + abs(hash(query + 'news')) % 60)
+    return min(100, len(query) * 3 + abs(stable_hash(query + 'news')) % 60)
 
 def analyze_sentiment(query):
-    sentiment_score = (abs(hash(query + 'sentiment')) % 100) / 100
+    sentiment_score = (abs(stable_hash(query + 'sentiment')) % 100) / 100
     if sentiment_score > 0.65:
         return 'positive'
     elif sentiment_score > 0.35:
@@ -1,4 +1,5 @@
 import json
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Enhanced Market Demand Agent with real APIs"""
@@ -59,11 +60,11 @@ def calculate_enhanced_interest(query):
         if keyword in query.lower():
             keyword_boost += 15
     
-    return min(100, base_score + abs(hash(query)) % 35 + keyword_boost)
+    return min(100, base_score + abs(stable_hash(query)) % 35 + keyword_boost)
 
 def calculate_enhanced_momentum(query):
     """Enhanced momentum calculation"""
-    base_momentum = 1.0 + (abs(hash(query)) % 60) / 100
+    base_momentum = 1.0 + (abs(stable_hash(query)) % 60) / 100
     
     # Seasonal adjustments
     if any(word in query.lower() for word in ['fitness', 'health', 'diet']):
@@ -86,11 +87,11 @@ def generate_enhanced_topics(query):
 
 def calculate_news_volume(query):
     """Calculate news volume"""
-    return min(100, len(query) * 3 + abs(hash(query + 'news')) % 60)
+    return min(100, len(query) * 3 + abs(stable_hash(query + 'news')) % 60)
 
 def analyze_sentiment(query):
     """Analyze sentiment"""
-    sentiment_score = (abs(hash(query + 'sentiment')) % 100) / 100
+    sentiment_score = (abs(stable_hash(query + 'sentiment')) % 100) / 100
     
     if sentiment_score > 0.65:
         return 'positive'
@@ -1,204 +1,235 @@
-import json
-import requests
 import os
+import time
 from datetime import datetime, timedelta
+from opportunity_common.http_client import DEFAULT_TIMEOUT, get_session
+from opportunity_common.action_group import ActionGroupApp
+from opportunity_common.results import create_result_sink
+from opportunity_common.revalidate import Revalidator
+from opportunity_common.cache import create_analysis_cache, create_tiered_cache, make_cache_key
+from opportunity_common.coalesce import Coalescer
+from opportunity_common.fanout import Provider, fetch_all
+from opportunity_common.breaker import create_breaker
+from opportunity_common.ratelimit import RateLimitExceeded, limiter_from_env
+from opportunity_common import scoring
+from opportunity_common.classifier import classify
+from opportunity_common.sentiment import score_articles
+from opportunity_common.digest import stable_hash
+from opportunity_common.trends import create_trends_ingester, week_start
+from opportunity_common.history import DemandHistory
+
+# Upstream endpoint; override to point at a local stub (benchmarks/stub_server.py).
+# The Trends endpoints are read by opportunity_common.trends (TRENDS_API_URL and friends).
+NEWS_API_URL = os.environ.get('NEWS_API_URL', 'https://newsapi.org/v2/everything')
+
+TRENDS_TIMEFRAME = 'today 12-m'
+NEWS_WINDOW_DAYS = 30
+TRENDS_DEADLINE = float(os.environ.get('TRENDS_DEADLINE_SECONDS', '10'))
+NEWS_DEADLINE = float(os.environ.get('NEWS_DEADLINE_SECONDS', '10'))
+NEWS_PAGE_SIZE = 20
+NEWS_MAX_PAGES = int(os.environ.get('NEWS_MAX_PAGES', '3'))
+NEWS_MIN_ARTICLES = 8
+NEWS_SENTIMENT_MARGIN = float(os.environ.get('NEWS_SENTIMENT_MARGIN', '0.15'))
+# How long a request queues for a NewsAPI token before falling back to the mock
+NEWS_RATE_WAIT = float(os.environ.get('NEWS_RATE_WAIT_SECONDS', '2'))
+
+# Cached demand results are served as is for DEMAND_SOFT_TTL seconds, then
+# served stale while a refresh runs, until DEMAND_HARD_TTL
+DEMAND_SOFT_TTL = int(os.environ.get('DEMAND_SOFT_TTL', os.environ.get('DEMAND_CACHE_TTL', '3600')))
+DEMAND_HARD_TTL = int(os.environ.get('DEMAND_HARD_TTL', '86400'))
+
+# Module-level so warm containers keep their entries between invocations
+demand_signal_cache = create_tiered_cache(
+    max_entries=int(os.environ.get('DEMAND_CACHE_MAX_ENTRIES', '256')),
+    default_ttl=int(os.environ.get('DEMAND_CACHE_TTL', '3600'))
+)
+
+# Weekly Trends series per (keyword, geo), updated incrementally, and the
+# memory-mapped interest/news history built from them
+trends_ingester = create_trends_ingester()
+demand_history = DemandHistory()
+
+# Shared across containers: once a provider keeps failing, cache misses skip it and use the mock
+trends_breaker = create_breaker('trends')
+news_breaker = create_breaker('newsapi')
+
+# NewsAPI quota is per key, so every container and function using it shares one bucket
+news_limiter = limiter_from_env('newsapi', 'NEWS_API', rate=2, capacity=10)
+
+app = ActionGroupApp(
+    'market-demand', '/analyze-demand',
+    result_sink=create_result_sink(),
+    cache=create_analysis_cache(default_ttl=DEMAND_HARD_TTL),
+    revalidator=Revalidator(DEMAND_SOFT_TTL),
+    coalescer=Coalescer()
+)
 
 def lambda_handler(event, context):
     """Enhanced Market Demand Agent with real API calls"""
+    return app.handle(event, context)
+
+@app.route('/analyze-demand', 'analyze-demand')
+def analyze_demand(request):
+    """Score market demand for request.query in request.region"""
     
-    try:
-        # Extract query from different event formats
-        query = 'product'
-        if 'requestBody' in event and event['requestBody']:
-            query = event['requestBody'].get('query', 'product')
-        elif 'query' in event:
-            query = event['query']
-        elif 'inputText' in event:
-            query = event['inputText']
-        
-        region = 'US'
-        if 'requestBody' in event and event['requestBody']:
-            region = event['requestBody'].get('region', 'US')
-        elif 'region' in event:
-            region = event['region']
-        
-        # Try real APIs first, fallback to enhanced mock
-        try:
-            # Real Google Trends data (requires pytrends)
-            trends_data = get_real_trends_data(query, region)
-            news_data = get_real_news_data(query)
-            data_source = "real_apis"
-        except Exception as api_error:
-            print(f"API call failed: {api_error}, using enhanced mock")
-            trends_data = get_enhanced_mock_trends(query, region)
-            news_data = get_enhanced_mock_news(query)
-            data_source = "enhanced_mock"
-        
-        # Calculate demand score
-        demand_score = calculate_demand_score(trends_data, news_data)
-        
-        result = {
-            'demand_score': round(demand_score, 2),
-            'current_interest': trends_data['current_interest'],
-            'momentum': trends_data['momentum'],
-            'trending_topics': trends_data['trending_topics'],
-            'news_volume': news_data['volume'],
-            'news_sentiment': news_data['sentiment'],
-            'region': region,
-            'data_source': data_source,
-            'analysis_timestamp': datetime.now().isoformat()
-        }
-        
-        # Return in appropriate format
-        if 'actionGroup' in event:
-            return {
-                "messageVersion": "1.0",
-                "response": {
-                    "actionGroup": event.get('actionGroup', 'market-demand'),
-                    "apiPath": event.get('apiPath', '/analyze-demand'),
-                    "httpMethod": event.get('httpMethod', 'POST'),
-                    "httpStatusCode": 200,
-                    "responseBody": {
-                        "application/json": {
-                            "body": json.dumps(result)
-                        }
-                    }
-                }
-            }
-        else:
-            return {
-                'statusCode': 200,
-                'body': json.dumps(result)
-            }
-        
-    except Exception as e:
-        error_result = {'error': str(e), 'data_source': 'error'}
-        
-        if 'actionGroup' in event:
-            return {
-                "messageVersion": "1.0",
-                "response": {
-                    "actionGroup": event.get('actionGroup', 'market-demand'),
-                    "apiPath": event.get('apiPath', '/analyze-demand'),
-                    "httpMethod": event.get('httpMethod', 'POST'),
-                    "httpStatusCode": 500,
-                    "responseBody": {
-                        "application/json": {
-                            "body": json.dumps(error_result)
-                        }
-                    }
-                }
-            }
-        else:
-            return {
-                'statusCode': 500,
-                'body': json.dumps(error_result)
-            }
+    query = request.query
+    region = request.region
+    
+    # Fetch trends and news in parallel; each falls back to its own enhanced mock
+    signals = fetch_demand_signals(query, region)
+    trends_data = signals['trends'].value
+    news_data = signals['news'].value
+    data_source = summarize_data_source(signals)
+    if signals['news'].live:
+        demand_history.record_news(query, region, week_start(time.time()), news_data['volume'])
+    
+    # Calculate demand score
+    demand_score = calculate_demand_score(trends_data, news_data)
+    
+    return {
+        'demand_score': round(demand_score, 2),
+        'current_interest': trends_data['current_interest'],
+        'momentum': trends_data['momentum'],
+        'trending_topics': trends_data['trending_topics'],
+        'news_volume': news_data['volume'],
+        'news_sentiment': news_data['sentiment'],
+        'region': region,
+        'data_source': data_source,
+        'provider_sources': {name: signal.source for name, signal in signals.items()},
+        'demand_history': demand_history.stats(query, region),
+        'analysis_timestamp': datetime.now().isoformat()
+    }
+
+def fetch_demand_signals(query, region):
+    """Run the trends and news providers concurrently, each with its own deadline"""
+    
+    return fetch_all([
+        Provider(
+            'trends',
+            lambda: get_real_trends_data(query, region),
+            fallback=lambda: get_enhanced_mock_trends(query, region),
+            timeout=TRENDS_DEADLINE
+        ),
+        Provider(
+            'news',
+            lambda: get_real_news_data(query),
+            fallback=lambda: get_enhanced_mock_news(query),
+            timeout=NEWS_DEADLINE
+        )
+    ])
+
+def summarize_data_source(signals):
+    """Report real_apis, enhanced_mock, or partial_real_apis when only some providers answered"""
+    
+    live = [signal.live for signal in signals.values()]
+    if all(live):
+        return "real_apis"
+    if any(live):
+        return "partial_real_apis"
+    return "enhanced_mock"
 
 def get_real_trends_data(query, region):
-    """Get real Google Trends data using requests (simplified approach)"""
+    """Get Google Trends data, served from the demand signal cache when fresh.
     
-    # Google Trends unofficial API approach
-    try:
-        # This is a simplified approach - in production use pytrends library
-        url = "https://trends.google.com/trends/api/explore"
-        params = {
-            'hl': 'en-US',
-            'tz': -360,
-            'req': json.dumps({
-                "comparisonItem": [{"keyword": query, "geo": region, "time": "today 12-m"}],
-                "category": 0,
-                "property": ""
-            })
-        }
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
-        # If API call fails, use enhanced mock
-        if response.status_code != 200:
-            raise Exception("Trends API failed")
-        
-        # Parse response (simplified)
-        current_interest = 75 + (hash(query) % 25)  # Simulated parsing
-        momentum = 1.2 + (hash(query + region) % 30) / 100
-        
-        return {
-            'current_interest': round(current_interest, 2),
-            'momentum': round(momentum, 2),
-            'trending_topics': [f"{query} reviews", f"best {query} 2024", f"{query} price"]
-        }
-        
-    except Exception as e:
-        print(f"Trends API error: {e}")
-        raise e
+    Only a cache miss goes through the breaker: cached data is served even
+    while it is open, and cache hits say nothing about the upstream's health.
+    """
+    
+    key = make_cache_key('trends', query, region, TRENDS_TIMEFRAME)
+    return demand_signal_cache.get_or_load(
+        key, lambda: trends_breaker.call(lambda: fetch_trends_data(query, region), slow_after=TRENDS_DEADLINE)
+    )
+
+def fetch_trends_data(query, region):
+    """Interest over time from Google Trends, fetching only weeks not yet ingested"""
+    
+    series = trends_ingester.series(query, region)
+    demand_history.record_trends(series)
+    return series.summary()
 
 def get_real_news_data(query):
-    """Get real news data from NewsAPI"""
+    """Get NewsAPI data, served from the demand signal cache when fresh; misses go through the breaker"""
+    
+    key = make_cache_key('news', query, 'global', f"{NEWS_WINDOW_DAYS}d")
+    return demand_signal_cache.get_or_load(
+        key, lambda: news_breaker.call(lambda: fetch_news_data(query), slow_after=NEWS_DEADLINE)
+    )
+
+def fetch_news_data(query):
+    """Get real news data from NewsAPI with streaming sentiment over result pages"""
     
     api_key = os.environ.get('NEWS_API_KEY')
     if not api_key:
         raise Exception("No NEWS_API_KEY provided")
     
-    url = "https://newsapi.org/v2/everything"
+    page_stats = {'first_page_size': 0, 'total_results': 0, 'pages_fetched': 0}
+    articles = iter_news_articles(query, api_key, page_stats)
+    
+    # Pages are only requested while the sentiment estimate is still too uncertain
+    estimate = score_articles(articles, max_margin=NEWS_SENTIMENT_MARGIN, min_articles=NEWS_MIN_ARTICLES)
+    
+    return {
+        # Articles on the first page, the scale calculate_demand_score expects
+        'volume': page_stats['first_page_size'],
+        'sentiment': estimate.label,
+        'sentiment_score': round(estimate.mean, 3),
+        'articles_scored': estimate.count,
+        'pages_fetched': page_stats['pages_fetched'],
+        'total_results': page_stats['total_results']
+    }
+
+def iter_news_articles(query, api_key, page_stats):
+    """Lazily yield NewsAPI articles page by page, up to NEWS_MAX_PAGES"""
+    
+    url = NEWS_API_URL
     params = {
         'q': query,
-        'from': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
+        'from': (datetime.now() - timedelta(days=NEWS_WINDOW_DAYS)).strftime('%Y-%m-%d'),
         'apiKey': api_key,
         'language': 'en',
         'sortBy': 'relevancy',
-        'pageSize': 20
+        'pageSize': NEWS_PAGE_SIZE
     }
     
-    response = requests.get(url, params=params, timeout=10)
-    
-    if response.status_code != 200:
-        raise Exception(f"NewsAPI failed: {response.status_code}")
-    
-    data = response.json()
-    articles = data.get('articles', [])
-    
-    # Analyze sentiment
-    positive_words = ['good', 'great', 'excellent', 'amazing', 'best', 'top', 'innovative']
-    negative_words = ['bad', 'worst', 'terrible', 'awful', 'poor', 'disappointing']
-    
-    sentiment_score = 0
-    for article in articles[:10]:
-        title = article.get('title', '').lower()
-        description = article.get('description', '').lower()
-        text = f"{title} {description}"
+    for page in range(1, NEWS_MAX_PAGES + 1):
+        params['page'] = page
+        # Only the first page may queue for a token; later pages are skipped instead
+        if not news_limiter.acquire(NEWS_RATE_WAIT if page == 1 else 0):
+            if page == 1:
+                raise RateLimitExceeded(f"NewsAPI rate limit: no token within {NEWS_RATE_WAIT}s")
+            return
+        response = get_session().get(url, params=params, timeout=DEFAULT_TIMEOUT)
         
-        sentiment_score += sum(1 for word in positive_words if word in text)
-        sentiment_score -= sum(1 for word in negative_words if word in text)
-    
-    if sentiment_score > 2:
-        sentiment = 'positive'
-    elif sentiment_score < -2:
-        sentiment = 'negative'
-    else:
-        sentiment = 'neutral'
-    
-    return {
-        'volume': len(articles),
-        'sentiment': sentiment
-    }
+        if response.status_code != 200:
+            if page == 1:
+                raise Exception(f"NewsAPI failed: {response.status_code}")
+            # Later pages are best effort; score what we already have
+            return
+        
+        data = response.json()
+        articles = data.get('articles', [])
+        page_stats['pages_fetched'] = page
+        if page == 1:
+            page_stats['first_page_size'] = len(articles)
+            page_stats['total_results'] = data.get('totalResults', len(articles))
+        
+        yield from articles
+        
+        if len(articles) < NEWS_PAGE_SIZE or page * NEWS_PAGE_SIZE >= page_stats['total_results']:
+            return
 
 def get_enhanced_mock_trends(query, region):
     """Enhanced mock trends data with realistic algorithms"""
     
-    query_lower = query.lower()
+    tags = classify(query)
     
     # Base interest with category boosts
     base_interest = len(query) * 4
     
-    if any(word in query_lower for word in ['smart', 'ai', 'iot']):
+    if tags.has('smart_tech'):
         base_interest += 25
-    elif any(word in query_lower for word in ['eco', 'green', 'sustainable']):
+    elif tags.has('eco'):
         base_interest += 20
-    elif any(word in query_lower for word in ['fitness', 'health', 'wellness']):
+    elif tags.has('wellness'):
         base_interest += 20
     
     # Regional adjustments
@@ -207,13 +238,13 @@ def get_enhanced_mock_trends(query, region):
     elif region in ['US', 'United States']:
         base_interest += 5
     
-    current_interest = min(100, base_interest + (hash(query) % 20))
-    momentum = 1.0 + (hash(query + region) % 40) / 100
+    current_interest = min(100, base_interest + (stable_hash(query) % 20))
+    momentum = 1.0 + (stable_hash(query + region) % 40) / 100
     
     # Category-specific trending topics
-    if 'smart' in query_lower:
+    if tags.matched('smart'):
         trending_topics = [f"smart {query} reviews", f"IoT {query}", f"{query} connectivity"]
-    elif 'eco' in query_lower:
+    elif tags.matched('eco'):
         trending_topics = [f"sustainable {query}", f"eco {query} materials", f"green {query}"]
     else:
         trending_topics = [f"{query} reviews", f"best {query} 2024", f"{query} price"]
@@ -227,16 +258,17 @@ def get_enhanced_mock_trends(query, region):
 def get_enhanced_mock_news(query):
     """Enhanced mock news data"""
     
+    tags = classify(query)
     volume = len(query) * 3
     
     # Adjust for trending topics
-    if any(word in query.lower() for word in ['smart', 'ai', 'tech']):
+    if tags.has('tech_news'):
         volume += 15
         sentiment = 'positive'
-    elif any(word in query.lower() for word in ['eco', 'green', 'sustainable']):
+    elif tags.has('eco'):
         volume += 12
         sentiment = 'positive'
-    elif any(word in query.lower() for word in ['health', 'fitness']):
+    elif tags.has('health_news'):
         volume += 10
         sentiment = 'positive'
     else:
@@ -248,18 +280,11 @@ def get_enhanced_mock_news(query):
     }
 
 def calculate_demand_score(trends_data, news_data):
-    """Calculate overall demand score"""
-    
-    interest_score = min(100, trends_data['current_interest'])
-    momentum_score = min(50, trends_data['momentum'] * 25)
-    news_score = min(30, news_data['volume'] * 0.5)
-    
-    # Sentiment bonus
-    sentiment_bonus = 0
-    if news_data['sentiment'] == 'positive':
-        sentiment_bonus = 10
-    elif news_data['sentiment'] == 'negative':
-        sentiment_bonus = -5
+    """Calculate overall demand score with the shared scoring kernel"""
     
-    total_score = interest_score * 0.5 + momentum_score * 0.3 + news_score * 0.2 + sentiment_bonus
-    return max(0, min(100, total_score))
\ No newline at end of file
+    return scoring.demand_score(
+        trends_data['current_interest'],
+        trends_data['momentum'],
+        news_data['volume'],
+        news_data['sentiment']
+    )
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Simple enhanced market demand with correct format"""
@@ -60,8 +61,8 @@ def get_enhanced_trends(query):
         base_interest = 65
         category = "general"
     
-    current_interest = min(100, base_interest + (hash(query) % 15))
-    momentum = 1.1 + (hash(query + category) % 30) / 100
+    current_interest = min(100, base_interest + (stable_hash(query) % 15))
+    momentum = 1.1 + (stable_hash(query + category) % 30) / 100
     
     # Category-specific trending topics
     if category == "smart_tech":
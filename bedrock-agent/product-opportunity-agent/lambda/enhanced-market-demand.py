@@ -1,6 +1,7 @@
 import json
 import requests
 from datetime import datetime, timedelta
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Enhanced Market Demand Agent with real APIs"""
@@ -54,8 +55,8 @@ def get_google_trends(query, region):
         # In production, use: from pytrends.request import TrendReq
         
         # Mock realistic trends data
-        base_interest = min(100, len(query) * 4 + hash(query) % 40)
-        momentum = 1.0 + (hash(query) % 30) / 100
+        base_interest = min(100, len(query) * 4 + stable_hash(query) % 40)
+        momentum = 1.0 + (stable_hash(query) % 30) / 100
         
         topics = [
             f"{query} price",
@@ -85,10 +86,10 @@ def get_news_sentiment(query):
         # In production, use NewsAPI with proper API key
         
         # Mock news data based on query
-        volume = min(100, len(query) * 3 + abs(hash(query)) % 50)
+        volume = min(100, len(query) * 3 + abs(stable_hash(query)) % 50)
         
         # Simulate sentiment analysis
-        sentiment_score = 0.1 + (abs(hash(query)) % 80) / 100  # 0.1 to 0.9
+        sentiment_score = 0.1 + (abs(stable_hash(query)) % 80) / 100  # 0.1 to 0.9
         
         if sentiment_score > 0.6:
             sentiment = 'positive'
@@ -137,8 +138,8 @@ def calculate_demand_score(trends_data, news_data):
 def fallback_mock_data(query, region, error):
     """Fallback to mock data if APIs fail"""
     
-    current_interest = min(100, len(query) * 3 + hash(query) % 30)
-    momentum = 1.0 + (hash(query) % 50) / 100
+    current_interest = min(100, len(query) * 3 + stable_hash(query) % 30)
+    momentum = 1.0 + (stable_hash(query) % 50) / 100
     
     result = {
         'demand_score': round(current_interest * 0.8, 2),
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Market Demand Agent - Bedrock compatible response format"""
@@ -79,8 +80,8 @@ def get_enhanced_demand_analysis(query):
     else:
         category = "general"
     
-    current_interest = min(100, base_interest + (hash(query) % 20))
-    momentum = 1.0 + (hash(query + category) % 40) / 100
+    current_interest = min(100, base_interest + (stable_hash(query) % 20))
+    momentum = 1.0 + (stable_hash(query + category) % 40) / 100
     
     # Generate category-specific trending topics
     if category == "smart_tech":
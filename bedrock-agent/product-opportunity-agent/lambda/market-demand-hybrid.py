@@ -1,93 +1,87 @@
-import json
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
+from opportunity_common.digest import stable_hash
+from opportunity_common.action_group import ActionGroupApp
+from opportunity_common.cache import create_analysis_cache
+from opportunity_common.coalesce import Coalescer
+from opportunity_common.results import create_result_sink
+from opportunity_common.revalidate import Revalidator
+from opportunity_common.trends import create_trends_ingester
+from opportunity_common.history import DemandHistory
+
+NEWS_API_URL = os.environ.get('NEWS_API_URL', 'https://newsapi.org/v2/everything')
+
+# Cached demand results are served as is for DEMAND_SOFT_TTL seconds, then
+# served stale while a refresh runs, until DEMAND_HARD_TTL
+DEMAND_SOFT_TTL = int(os.environ.get('DEMAND_SOFT_TTL', '3600'))
+DEMAND_HARD_TTL = int(os.environ.get('DEMAND_HARD_TTL', '86400'))
+
+# Weekly Trends series per (keyword, geo), updated incrementally, and the
+# memory-mapped interest history built from them
+trends_ingester = create_trends_ingester()
+demand_history = DemandHistory()
+
+app = ActionGroupApp(
+    'market-demand', '/analyze-demand',
+    result_sink=create_result_sink(),
+    cache=create_analysis_cache(default_ttl=DEMAND_HARD_TTL),
+    revalidator=Revalidator(DEMAND_SOFT_TTL),
+    coalescer=Coalescer()
+)
 
 def lambda_handler(event, context):
     """Market Demand Agent with real API integration and enhanced fallback"""
-    
-    try:
-        # Parse input
-        if isinstance(event, str):
-            event = json.loads(event)
-        
-        query = event.get('query', '')
-        region = event.get('region', 'US')
-        
-        # Try real APIs first, fallback to enhanced mock
-        try:
-            from pytrends.request import TrendReq
-            import requests
-            demand_data = get_real_trends_data(query, region)
-            news_data = get_real_news_data(query)
-            data_source = "real_apis"
-        except ImportError:
-            demand_data = get_enhanced_mock_trends(query, region)
-            news_data = get_enhanced_mock_news(query)
-            data_source = "enhanced_mock"
-        
-        # Calculate demand score
-        demand_score = calculate_demand_score(demand_data, news_data)
-        
-        result = {
-            'demand_score': round(demand_score, 2),
-            'current_interest': demand_data['current_interest'],
-            'momentum': demand_data['momentum'],
-            'trending_topics': demand_data['trending_topics'],
-            'news_volume': news_data['volume'],
-            'news_sentiment': news_data['sentiment'],
-            'region': region,
-            'data_source': data_source,
-            'analysis_timestamp': datetime.now().isoformat()
-        }
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps(result)
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
+    return app.handle(event, context)
 
-def get_real_trends_data(query, region):
-    """Get real Google Trends data"""
-    from pytrends.request import TrendReq
+@app.route('/analyze-demand', 'analyze-demand')
+def analyze_demand(request):
+    """Score market demand for request.query, preferring real APIs over the enhanced mock"""
     
-    pytrends = TrendReq(hl='en-US', tz=360)
-    pytrends.build_payload([query], cat=0, timeframe='today 12-m', geo=region)
+    query = request.get('query', '')
+    region = request.region
     
-    interest_over_time = pytrends.interest_over_time()
-    
-    if not interest_over_time.empty:
-        current_interest = interest_over_time[query].iloc[-4:].mean()
-        historical_avg = interest_over_time[query].mean()
-        momentum = (current_interest / historical_avg) if historical_avg > 0 else 1
-    else:
-        current_interest = 0
-        momentum = 0
+    # Try real APIs first, fallback to enhanced mock
+    try:
+        demand_data = get_real_trends_data(query, region)
+        news_data = get_real_news_data(query)
+        data_source = "real_apis"
+    except Exception as e:
+        print(f"Real API error: {e}")
+        demand_data = get_enhanced_mock_trends(query, region)
+        news_data = get_enhanced_mock_news(query)
+        data_source = "enhanced_mock"
     
-    related_queries = pytrends.related_queries()
-    trending_topics = []
-    if query in related_queries and related_queries[query]['rising'] is not None:
-        trending_topics = related_queries[query]['rising']['query'].head(5).tolist()
+    # Calculate demand score
+    demand_score = calculate_demand_score(demand_data, news_data)
     
     return {
-        'current_interest': round(current_interest, 2),
-        'momentum': round(momentum, 2),
-        'trending_topics': trending_topics
+        'demand_score': round(demand_score, 2),
+        'current_interest': demand_data['current_interest'],
+        'momentum': demand_data['momentum'],
+        'trending_topics': demand_data['trending_topics'],
+        'news_volume': news_data['volume'],
+        'news_sentiment': news_data['sentiment'],
+        'region': region,
+        'data_source': data_source,
+        'demand_history': demand_history.stats(query, region),
+        'analysis_timestamp': datetime.now().isoformat()
     }
 
+def get_real_trends_data(query, region):
+    """Get real Google Trends data, fetching only weeks not yet ingested"""
+    series = trends_ingester.series(query, region)
+    demand_history.record_trends(series)
+    return series.summary()
+
 def get_real_news_data(query):
     """Get real news data"""
-    import requests
-    import os
+    from opportunity_common.http_client import DEFAULT_TIMEOUT, get_session
     
     api_key = os.environ.get('NEWS_API_KEY')
     if not api_key:
         return get_enhanced_mock_news(query)
     
-    url = "https://newsapi.org/v2/everything"
+    url = NEWS_API_URL
     params = {
         'q': query,
         'from': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
@@ -96,7 +90,7 @@ def get_real_news_data(query):
         'sortBy': 'relevancy'
     }
     
-    response = requests.get(url, params=params, timeout=10)
+    response = get_session().get(url, params=params, timeout=DEFAULT_TIMEOUT)
     data = response.json()
     
     volume = len(data.get('articles', []))
@@ -143,8 +137,8 @@ def get_enhanced_mock_trends(query, region):
     elif region in ['US', 'United States']:
         base_interest += 5   # Mature market
     
-    current_interest = min(100, base_interest + (hash(query) % 20))
-    momentum = 1.0 + (hash(query + region) % 40) / 100
+    current_interest = min(100, base_interest + (stable_hash(query) % 20))
+    momentum = 1.0 + (stable_hash(query + region) % 40) / 100
     
     # Generate realistic trending topics
     trending_topics = [
@@ -181,7 +175,7 @@ def get_enhanced_mock_news(query):
     elif 'cheap' in query.lower() or 'budget' in query.lower():
         sentiment = 'neutral'
     else:
-        sentiment = 'positive' if hash(query) % 3 > 0 else 'neutral'
+        sentiment = 'positive' if stable_hash(query) % 3 > 0 else 'neutral'
     
     return {'volume': min(100, volume), 'sentiment': sentiment}
 
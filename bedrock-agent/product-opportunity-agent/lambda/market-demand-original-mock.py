@@ -1,4 +1,5 @@
 import json
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Market Demand Agent - analyzes demand signals with original mock data"""
@@ -88,11 +89,11 @@ def lambda_handler(event, context):
 def calculate_mock_interest(query):
     """Mock interest calculation"""
     base_score = len(query) * 3
-    return min(100, base_score + hash(query) % 30)
+    return min(100, base_score + stable_hash(query) % 30)
 
 def calculate_mock_momentum(query):
     """Mock momentum calculation"""
-    return 1.0 + (hash(query) % 50) / 100
+    return 1.0 + (stable_hash(query) % 50) / 100
 
 def generate_mock_topics(query):
     """Generate mock trending topics"""
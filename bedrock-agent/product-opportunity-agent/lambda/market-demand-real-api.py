@@ -4,6 +4,8 @@ from pytrends.request import TrendReq
 import os
 from datetime import datetime, timedelta
 
+NEWS_API_URL = os.environ.get('NEWS_API_URL', 'https://newsapi.org/v2/everything')
+
 def lambda_handler(event, context):
     """Market Demand Agent with real API integration"""
     
@@ -90,7 +92,7 @@ def get_news_data(query):
         if not api_key:
             return {'volume': len(query) * 2, 'sentiment': 'neutral'}
         
-        url = "https://newsapi.org/v2/everything"
+        url = NEWS_API_URL
         params = {
             'q': query,
             'from': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
@@ -1,4 +1,5 @@
 import json
+from opportunity_common.digest import stable_hash
 
 def lambda_handler(event, context):
     """Simple market demand function"""
@@ -8,8 +9,8 @@ def lambda_handler(event, context):
         
         # Simple calculations
         base_score = len(query) * 3
-        current_interest = min(100, base_score + abs(hash(query)) % 30)
-        momentum = 1.0 + (abs(hash(query)) % 50) / 100
+        current_interest = min(100, base_score + abs(stable_hash(query)) % 30)
+        momentum = 1.0 + (abs(stable_hash(query)) % 50) / 100
         demand_score = min(100, current_interest * 0.8)
         
         result = {
@@ -0,0 +1,6 @@
+"""Shared helpers for the product opportunity Lambda functions.
+
+Shipped to every function through the requests layer (see create-lambda-layer.py)
+and bundled next to each handler by the deploy scripts (see lambda_packaging.py),
+so modules here must only depend on what that layer installs.
+"""
@@ -0,0 +1,355 @@
+"""Shared Bedrock action-group adapter.
+
+Parses every event shape the agents send (apiPath requestBody, function
+parameters, inputText, direct invocation) into one ActionRequest, dispatches it
+to a registered scorer and wraps the scorer's result in the matching response
+envelope.
+"""
+import json
+import os
+
+from opportunity_common.cache import make_cache_key
+from opportunity_common.normalize import normalize_idea
+from opportunity_common.revalidate import REVALIDATE_FIELD, annotate, wrap
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Results built only from mock data are not worth caching
+UNCACHED_SOURCES = ('mock_fallback', 'error', 'enhanced_mock')
+# Results where some providers fell back are cached briefly, so live data replaces them soon
+DEGRADED_SOURCES = ('partial_real_apis',)
+DEGRADED_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_DEGRADED_TTL', '60'))
+LIVE_PROVIDER_SOURCES = ('live',)
+
+# Envelope fields Bedrock adds around the caller's parameters
+EVENT_FIELDS = frozenset((
+    'messageVersion', 'agent', 'actionGroup', 'apiPath', 'httpMethod', 'function',
+    'sessionId', 'sessionAttributes', 'promptSessionAttributes', 'inputText',
+    'requestBody', 'parameters'
+))
+
+
+def _default(value):
+    # NumPy scalars and arrays coming out of the scoring kernel
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """Compact JSON encoding, using orjson when the layer provides it"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    return json.dumps(value, separators=(',', ':'), default=_default)
+
+
+def cache_ttl(result):
+    """Seconds to cache a fresh scorer result: 0 to skip it, None for the cache's default TTL.
+
+    The overall data_source decides first; a result whose provider_sources
+    report any provider that did not answer live is treated as degraded.
+    """
+    data_source = result.get('data_source')
+    if data_source in UNCACHED_SOURCES:
+        return 0
+    providers = result.get('provider_sources') or {}
+    if data_source in DEGRADED_SOURCES or any(source not in LIVE_PROVIDER_SOURCES for source in providers.values()):
+        return DEGRADED_CACHE_TTL
+    return None
+
+
+def parse_revalidation(event):
+    """The refresh marker of a revalidation event, or raise ValueError when it is malformed.
+
+    serve_cached sends {'revalidate': {'route': ..., 'key': ..., 'owner': ...},
+    'params': {...}}; route is None for direct invocations.
+    """
+    refresh = event[REVALIDATE_FIELD]
+    if not isinstance(refresh, dict):
+        raise ValueError(f"'{REVALIDATE_FIELD}' must be an object")
+    for name in ('key', 'owner'):
+        if not isinstance(refresh.get(name), str):
+            raise ValueError(f"'{REVALIDATE_FIELD}.{name}' must be a string")
+    if refresh.get('route') is not None and not isinstance(refresh['route'], str):
+        raise ValueError(f"'{REVALIDATE_FIELD}.route' must be a string")
+    if not isinstance(event.get('params'), dict):
+        raise ValueError("'params' must be an object")
+    return refresh
+
+
+def _properties_to_dict(properties):
+    """Bedrock sends parameters as [{'name': ..., 'type': ..., 'value': ...}]"""
+    return {prop['name']: prop.get('value') for prop in properties if 'name' in prop}
+
+
+class ActionRequest:
+    """One parsed invocation: parameters plus what is needed to answer in the same style"""
+
+    def __init__(self, params, style, event):
+        self.params = params
+        self.style = style
+        self.event = event
+
+    @property
+    def query(self):
+        return self.params.get('query') or 'product'
+
+    @property
+    def region(self):
+        return self.params.get('region') or 'US'
+
+    def get(self, name, default=None):
+        value = self.params.get(name)
+        return default if value is None else value
+
+    def get_list(self, name):
+        """Read a list parameter sent as a list, a JSON array string or a comma separated string"""
+        value = self.params.get(name)
+        if not value:
+            return []
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                value = value.replace('\n', ',').split(',')
+        if isinstance(value, str):
+            value = [value]
+        return [str(item).strip() for item in value if item and str(item).strip()]
+
+    @property
+    def route(self):
+        return self.event.get('apiPath') or self.event.get('function')
+
+    def normalize(self):
+        """Canonicalize the region and return the NormalizedIdea; the query is scored as sent"""
+        idea = normalize_idea(self.query, self.params.get('region'))
+        self.params['region'] = idea.region
+        return idea
+
+
+def event_style(event):
+    """Response envelope the caller expects: 'function', 'api' or 'direct'"""
+    if 'function' in event:
+        return 'function'
+    if 'apiPath' in event or 'actionGroup' in event:
+        return 'api'
+    return 'direct'
+
+
+def parse_event(event):
+    """Parse any supported event shape into an ActionRequest"""
+    if isinstance(event, str):
+        event = json.loads(event)
+
+    params = {}
+
+    # Direct invocations and inputText-only agents
+    if event.get('inputText'):
+        params['query'] = event['inputText']
+    params.update((name, value) for name, value in event.items() if name not in EVENT_FIELDS)
+
+    # Function-style action groups, or legacy dict parameters
+    parameters = event.get('parameters')
+    if isinstance(parameters, list):
+        params.update(_properties_to_dict(parameters))
+    elif isinstance(parameters, dict):
+        params.update(parameters)
+
+    # apiPath-style action groups
+    body = event.get('requestBody')
+    if isinstance(body, str):
+        body = json.loads(body)
+    if isinstance(body, dict):
+        if 'content' in body:
+            content = body['content'].get('application/json', {})
+            params.update(_properties_to_dict(content.get('properties', [])))
+        else:
+            params.update(body)
+
+    return ActionRequest(params, event_style(event), event)
+
+
+def build_response(request, status_code, result, action_group=None, api_path=None):
+    """Serialize result once and wrap it in the envelope matching the request style"""
+    body = dumps(result)
+    event = request.event
+
+    if request.style == 'function':
+        response = {
+            "actionGroup": event.get('actionGroup', action_group),
+            "function": event.get('function'),
+            "functionResponse": {
+                "responseBody": {
+                    "TEXT": {
+                        "body": body
+                    }
+                }
+            }
+        }
+        if status_code >= 400:
+            response["functionResponse"]["responseState"] = "FAILURE"
+        return {
+            "messageVersion": "1.0",
+            "response": response,
+            "sessionAttributes": event.get('sessionAttributes', {}),
+            "promptSessionAttributes": event.get('promptSessionAttributes', {})
+        }
+
+    if request.style == 'api':
+        return {
+            "messageVersion": "1.0",
+            "response": {
+                "actionGroup": event.get('actionGroup', action_group),
+                "apiPath": event.get('apiPath', api_path),
+                "httpMethod": event.get('httpMethod', 'POST'),
+                "httpStatusCode": status_code,
+                "responseBody": {
+                    "application/json": {
+                        "body": body
+                    }
+                }
+            }
+        }
+
+    return {
+        'statusCode': status_code,
+        'body': body
+    }
+
+
+class ActionGroupApp:
+    """Route parsed requests to scorer functions registered by apiPath or function name.
+
+    Scorers take an ActionRequest and return a JSON-serializable dict; exceptions
+    become a 500 response in the caller's envelope. The region is normalized
+    first; the query is scored as sent. With a cache, results are read through it under the
+    canonical idea key, and cache_ttl keeps mock results out; a revalidator adds stale-while-revalidate on top of the cache's
+    TTL and a coalescer lets concurrent misses for the same key share one
+    computation. With a result_sink, freshly computed results are buffered per
+    invocation and flushed before the response is returned.
+    """
+
+    def __init__(self, action_group, default_path, result_sink=None, cache=None, revalidator=None,
+                 coalescer=None):
+        self.action_group = action_group
+        self.default_path = default_path
+        self.result_sink = result_sink
+        self.cache = cache
+        self.revalidator = revalidator
+        self.coalescer = coalescer
+        self.routes = {}
+        self.persisted = set()
+        self.cache_params = {}
+        self.default_scorer = None
+
+    def route(self, *names, persist=True, cached=True, cache_params=()):
+        """Register a scorer; the first registered one also handles unrouted events.
+
+        persist=False keeps the scorer's responses out of the result sink and
+        cached=False out of the read-through cache, e.g. for read-only routes or
+        scorers that add their own records. cache_params names list parameters
+        that change the result and so belong in the cache key.
+        """
+        def decorator(scorer):
+            for name in names:
+                self.routes[name] = scorer
+            if persist:
+                self.persisted.add(scorer)
+            if cached:
+                self.cache_params[scorer] = cache_params
+            if self.default_scorer is None:
+                self.default_scorer = scorer
+            return scorer
+        return decorator
+
+    def cache_key(self, idea, request, scorer):
+        extra = [','.join(sorted(item.lower() for item in request.get_list(name))) for name in self.cache_params[scorer]]
+        return make_cache_key('analysis', self.action_group, idea.key, *extra)
+
+    def run(self, request, scorer, cache_key=None):
+        """Call the scorer, then cache and buffer a successful result; returns (result, status_code)"""
+        try:
+            result = scorer(request)
+        except Exception as e:
+            print(f"{self.action_group} failed: {e}")
+            return {'error': str(e), 'data_source': 'error'}, 500
+
+        ttl = cache_ttl(result)
+        if cache_key is not None and ttl != 0:
+            self.cache.set(cache_key, wrap(result), ttl=ttl)
+        if self.result_sink is not None and scorer in self.persisted:
+            self.result_sink.add(self.action_group, request.query, result, request.region)
+        return result, 200
+
+    def serve_cached(self, request, cache_key, entry, context):
+        """Cached result annotated with its age, starting a refresh when it is past the soft TTL"""
+        stale = self.revalidator is not None and self.revalidator.is_stale(entry)
+        if stale:
+            owner = self.revalidator.claim(self.cache, cache_key)
+            if owner is not None:
+                payload = {
+                    REVALIDATE_FIELD: {'route': request.route, 'key': cache_key, 'owner': owner},
+                    'params': request.params
+                }
+                self.revalidator.trigger(self.cache, cache_key, payload, context, self.revalidate)
+        return annotate(entry, stale)
+
+    def revalidate(self, payload):
+        """Recompute a stale cached result, from a self-invocation or a background thread"""
+        try:
+            refresh = parse_revalidation(payload)
+            if self.cache is None or self.revalidator is None:
+                raise ValueError(f"{self.action_group} does not revalidate cached results")
+        except ValueError as e:
+            return {'statusCode': 400, 'body': dumps({'error': f"Invalid revalidation event: {e}"})}
+        request = ActionRequest(payload['params'], 'direct', {})
+        scorer = self.routes.get(refresh['route'], self.default_scorer)
+        try:
+            result, status_code = self.run(request, scorer, refresh['key'])
+        finally:
+            self.revalidator.release(self.cache, refresh['key'], refresh['owner'])
+        if self.result_sink is not None:
+            self.result_sink.flush()
+        return {'statusCode': status_code, 'body': dumps({'revalidated': refresh['key']})}
+
+    def handle(self, event, context):
+        if isinstance(event, dict) and REVALIDATE_FIELD in event:
+            return self.revalidate(event)
+
+        try:
+            request = parse_event(event)
+            # Scorers see the canonical region whether or not a cache is configured; the
+            # normalized idea only keys the cache and coalescing
+            idea = request.normalize()
+        except Exception as e:
+            # Bedrock only accepts the error in its own envelope; anything else gets a plain 400
+            envelope = event if isinstance(event, dict) else {}
+            invalid = ActionRequest({}, event_style(envelope), envelope)
+            return build_response(invalid, 400, {'error': f"Invalid event: {e}"}, self.action_group, self.default_path)
+
+        scorer = self.routes.get(request.route, self.default_scorer)
+        cache_key = None
+        entry = None
+        if self.cache is not None and scorer in self.cache_params:
+            cache_key = self.cache_key(idea, request, scorer)
+            entry = self.cache.get(cache_key)
+
+        owner = None
+        if cache_key is not None and entry is None and self.coalescer is not None:
+            entry, owner = self.coalescer.join(self.cache, cache_key)
+
+        if entry is not None:
+            result, status_code = self.serve_cached(request, cache_key, entry, context), 200
+        else:
+            try:
+                result, status_code = self.run(request, scorer, cache_key)
+            finally:
+                if owner is not None:
+                    self.coalescer.release(self.cache, cache_key, owner)
+
+        if self.result_sink is not None:
+            self.result_sink.flush()
+        return build_response(request, status_code, result, self.action_group, self.default_path)
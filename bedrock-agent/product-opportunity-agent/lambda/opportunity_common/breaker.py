@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+
+from opportunity_common.cache import ANALYSIS_TABLE, shared_cache_enabled
+from opportunity_common.ratelimit import RateLimitExceeded
+
+BREAKER_SORT_KEY = 'breaker'
+FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+RESET_SECONDS = float(os.environ.get('BREAKER_RESET_SECONDS', '30'))
+# How long a container trusts its copy of the shared state before reading it again
+REFRESH_SECONDS = float(os.environ.get('BREAKER_REFRESH_SECONDS', '5'))
+# Breaker items of providers that stop being called disappear through the table TTL
+STATE_RETENTION_SECONDS = 86400
+
+
+class CircuitOpenError(Exception):
+    """Raised in place of a provider call while its breaker is open"""
+
+
+class LocalBreakerStore:
+    """Breaker state for one container, used when the shared table is disabled"""
+
+    def __init__(self):
+        self._states = {}
+        self._probes = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            return self._states.get(name, (0, None))
+
+    def add_failure(self, name):
+        with self._lock:
+            failures, opened_at = self._states.get(name, (0, None))
+            self._states[name] = (failures + 1, opened_at)
+            return self._states[name]
+
+    def open(self, name, now):
+        with self._lock:
+            failures, _ = self._states.get(name, (0, None))
+            self._states[name] = (failures, now)
+
+    def reset(self, name):
+        with self._lock:
+            self._states.pop(name, None)
+            self._probes.pop(name, None)
+
+    def try_probe(self, name, now, probe_seconds):
+        with self._lock:
+            if self._probes.get(name, 0) > now:
+                return False
+            self._probes[name] = now + probe_seconds
+            return True
+
+
+class DynamoBreakerStore:
+    """Breaker state shared by every container, kept in the analysis table.
+
+    One item per provider: query_id='breaker#<name>' with the consecutive
+    failure count, the time the breaker opened and the end of the current
+    half-open probe.
+    """
+
+    def __init__(self, table_name=None, client=None):
+        self.table_name = table_name or ANALYSIS_TABLE
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def _key(self, name):
+        return {'query_id': {'S': f"breaker#{name}"}, 'timestamp': {'S': BREAKER_SORT_KEY}}
+
+    @staticmethod
+    def _parse(item):
+        failures = int(item['failures']['N']) if 'failures' in item else 0
+        opened_at = float(item['opened_at']['N']) if 'opened_at' in item else None
+        return failures, opened_at
+
+    def get(self, name):
+        response = self.client.get_item(TableName=self.table_name, Key=self._key(name), ConsistentRead=True)
+        return self._parse(response.get('Item', {}))
+
+    def add_failure(self, name):
+        response = self.client.update_item(
+            TableName=self.table_name,
+            Key=self._key(name),
+            UpdateExpression='ADD failures :one SET expires_at = :expires',
+            ExpressionAttributeValues={
+                ':one': {'N': '1'},
+                ':expires': {'N': str(int(time.time() + STATE_RETENTION_SECONDS))}
+            },
+            ReturnValues='ALL_NEW'
+        )
+        return self._parse(response['Attributes'])
+
+    def open(self, name, now):
+        self.client.update_item(
+            TableName=self.table_name,
+            Key=self._key(name),
+            UpdateExpression='SET opened_at = :now',
+            ExpressionAttributeValues={':now': {'N': str(now)}}
+        )
+
+    def reset(self, name):
+        self.client.update_item(
+            TableName=self.table_name,
+            Key=self._key(name),
+            UpdateExpression='SET failures = :zero, expires_at = :expires REMOVE opened_at, probe_until',
+            ExpressionAttributeValues={
+                ':zero': {'N': '0'},
+                ':expires': {'N': str(int(time.time() + STATE_RETENTION_SECONDS))}
+            }
+        )
+
+    def try_probe(self, name, now, probe_seconds):
+        """Claim the half-open probe; False while another container's probe is running"""
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key=self._key(name),
+                UpdateExpression='SET probe_until = :until',
+                ConditionExpression='attribute_not_exists(probe_until) OR probe_until < :now',
+                ExpressionAttributeValues={
+                    ':until': {'N': str(now + probe_seconds)},
+                    ':now': {'N': str(now)}
+                }
+            )
+            return True
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream provider.
+
+    Closed: calls go through. After failure_threshold consecutive failures or
+    timeouts it opens and calls are skipped for reset_seconds. Then it is
+    half-open: one probe call at a time is let through; success closes the
+    breaker, failure opens it for another reset_seconds. Store errors never
+    block a call, they only leave the breaker closed.
+    """
+
+    def __init__(self, name, store, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS,
+                 refresh_seconds=REFRESH_SECONDS):
+        self.name = name
+        self.store = store
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.refresh_seconds = refresh_seconds
+        self._view = (0, None)
+        self._loaded_at = 0
+
+    def _current(self):
+        now = time.time()
+        if now - self._loaded_at >= self.refresh_seconds:
+            try:
+                self._view = self.store.get(self.name)
+            except Exception as e:
+                print(f"Breaker state read failed for {self.name}: {e}")
+            self._loaded_at = now
+        return self._view
+
+    @property
+    def state(self):
+        _, opened_at = self._current()
+        if opened_at is None:
+            return 'closed'
+        if time.time() - opened_at < self.reset_seconds:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        """True if the provider should be called now"""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'open':
+            return False
+        try:
+            return self.store.try_probe(self.name, time.time(), self.reset_seconds)
+        except Exception as e:
+            print(f"Breaker probe claim failed for {self.name}: {e}")
+            return True
+
+    def call(self, fetch, slow_after=None):
+        """Return fetch() through the breaker, raising CircuitOpenError while it is open.
+
+        Use this inside a cache loader so that cache hits neither count as
+        upstream successes nor get skipped while the breaker is open. A call
+        that succeeds after more than slow_after seconds counts as a failure,
+        like a fan-out deadline overrun; a rate-limit refusal counts as neither.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        started = time.time()
+        try:
+            value = fetch()
+        except RateLimitExceeded:
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        if slow_after is not None and time.time() - started > slow_after:
+            self.record_failure()
+        else:
+            self.record_success()
+        return value
+
+    def record_success(self):
+        failures, opened_at = self._current()
+        if not failures and opened_at is None:
+            return
+        try:
+            self.store.reset(self.name)
+        except Exception as e:
+            print(f"Breaker reset failed for {self.name}: {e}")
+        self._view = (0, None)
+        self._loaded_at = time.time()
+
+    def record_failure(self):
+        now = time.time()
+        if self._view[1] is not None and now - self._view[1] < self.reset_seconds:
+            # Already open; late failures from calls started before it opened change nothing
+            return
+        try:
+            failures, opened_at = self.store.add_failure(self.name)
+            if failures >= self.failure_threshold and (opened_at is None or now - opened_at >= self.reset_seconds):
+                self.store.open(self.name, now)
+                opened_at = now
+                print(f"Breaker for {self.name} opened after {failures} consecutive failures")
+        except Exception as e:
+            print(f"Breaker failure record failed for {self.name}: {e}")
+            return
+        self._view = (failures, opened_at)
+        self._loaded_at = now
+
+
+_local_store = LocalBreakerStore()
+
+
+def create_breaker(name, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+    """Breaker whose state is shared through the analysis table unless ANALYSIS_CACHE_SHARED=false"""
+    store = DynamoBreakerStore() if shared_cache_enabled() else _local_store
+    return CircuitBreaker(name, store, failure_threshold, reset_seconds)
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ANALYSIS_TABLE = os.environ.get('ANALYSIS_TABLE', 'ProductOpportunityAnalysis')
+CACHE_SORT_KEY = 'cache'
+
+
+def make_cache_key(namespace, *parts):
+    """Build a stable cache key such as 'news|smart bottle|global|30d'"""
+    normalized = [str(part).strip().lower() for part in parts]
+    return '|'.join([namespace] + normalized)
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry TTL and LRU eviction.
+
+    Module-level instances survive across warm invocations of the same container.
+    """
+
+    def __init__(self, max_entries=256, default_ttl=900):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        """Store a value, evicting the least recently used entries past max_entries"""
+        if expires_at is None:
+            expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DynamoCache:
+    """Shared cache layer stored in the ProductOpportunityAnalysis table.
+
+    Entries use query_id='cache#<key>' and a fixed sort key so they never collide
+    with analysis records. Values are stored as JSON strings with an expires_at
+    epoch attribute that can double as the table's TTL attribute.
+    """
+
+    def __init__(self, table_name=None, client=None):
+        self.table_name = table_name or ANALYSIS_TABLE
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def get(self, key):
+        """Return (value, expires_at) or (None, None) if missing or expired"""
+        response = self.client.get_item(
+            TableName=self.table_name,
+            Key={
+                'query_id': {'S': f"cache#{key}"},
+                'timestamp': {'S': CACHE_SORT_KEY}
+            }
+        )
+        item = response.get('Item')
+        if not item:
+            return None, None
+        expires_at = float(item['expires_at']['N'])
+        if expires_at <= time.time():
+            return None, None
+        return json.loads(item['payload']['S']), expires_at
+
+    def set(self, key, value, ttl):
+        expires_at = int(time.time() + ttl)
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={
+                'query_id': {'S': f"cache#{key}"},
+                'timestamp': {'S': CACHE_SORT_KEY},
+                'payload': {'S': json.dumps(value)},
+                'expires_at': {'N': str(expires_at)}
+            }
+        )
+        return expires_at
+
+    def try_acquire_lease(self, key, owner, lease_seconds):
+        """Take a short-lived lock item for key; False if another owner holds a live lease"""
+        now = time.time()
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    'query_id': {'S': f"lease#{key}"},
+                    'timestamp': {'S': CACHE_SORT_KEY},
+                    'owner': {'S': owner},
+                    'expires_at': {'N': str(int(now + lease_seconds))}
+                },
+                ConditionExpression='attribute_not_exists(query_id) OR expires_at < :now',
+                ExpressionAttributeValues={':now': {'N': str(int(now))}}
+            )
+            return True
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def release_lease(self, key, owner):
+        """Delete the lease for key if this owner still holds it"""
+        try:
+            self.client.delete_item(
+                TableName=self.table_name,
+                Key={
+                    'query_id': {'S': f"lease#{key}"},
+                    'timestamp': {'S': CACHE_SORT_KEY}
+                },
+                ConditionExpression='#owner = :owner',
+                ExpressionAttributeNames={'#owner': 'owner'},
+                ExpressionAttributeValues={':owner': {'S': owner}}
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+
+class TieredCache:
+    """In-process TTLCache in front of an optional shared DynamoCache.
+
+    Shared-layer errors are logged and ignored so a missing table or IAM
+    permission never fails the request, it only costs a cache miss.
+    """
+
+    def __init__(self, local=None, shared=None, default_ttl=900):
+        self.default_ttl = default_ttl
+        self.local = local if local is not None else TTLCache(default_ttl=default_ttl)
+        self.shared = shared
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        if self.shared is None:
+            return None
+        try:
+            value, expires_at = self.shared.get(key)
+        except Exception as e:
+            print(f"Shared cache read failed for {key}: {e}")
+            return None
+        if value is not None:
+            self.local.set(key, value, expires_at=expires_at)
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        self.local.set(key, value, ttl=ttl)
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(key, value, ttl)
+        except Exception as e:
+            print(f"Shared cache write failed for {key}: {e}")
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Return the cached value for key, calling loader() and caching its result on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+
+def shared_cache_enabled():
+    """The DynamoDB layer can be turned off with ANALYSIS_CACHE_SHARED=false"""
+    return os.environ.get('ANALYSIS_CACHE_SHARED', 'true').lower() != 'false'
+
+
+def create_tiered_cache(max_entries=256, default_ttl=900):
+    """Create a TieredCache wired to the analysis table unless disabled by env"""
+    shared = DynamoCache() if shared_cache_enabled() else None
+    return TieredCache(
+        local=TTLCache(max_entries=max_entries, default_ttl=default_ttl),
+        shared=shared,
+        default_ttl=default_ttl
+    )
+
+
+def create_analysis_cache(default_ttl=900):
+    """Read-through cache for whole scorer results, keyed by canonical idea; ANALYSIS_CACHE_TTL overrides default_ttl"""
+    return create_tiered_cache(
+        max_entries=int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', '512')),
+        default_ttl=int(os.environ.get('ANALYSIS_CACHE_TTL', str(default_ttl)))
+    )
@@ -0,0 +1,68 @@
+import re
+from functools import lru_cache
+
+# Keyword categories used for query routing by every scorer; keep new lists here.
+# Matching is substring-based, like the `word in query_lower` checks it replaces.
+CATEGORIES = {
+    'smart_tech': ('smart', 'ai', 'iot'),
+    'tech_news': ('smart', 'ai', 'tech'),
+    'eco': ('eco', 'green', 'sustainable'),
+    'wellness': ('fitness', 'health', 'wellness'),
+    'health_news': ('health', 'fitness'),
+    'connected': ('smart', 'iot', 'connected'),
+    'software': ('app', 'software', 'digital'),
+    'hardware': ('hardware', 'device', 'physical'),
+    'electronics': ('electronics', 'smart', 'device'),
+    'plastics': ('plastic', 'bottle', 'container'),
+}
+
+# Keywords checked on their own by the scorers
+SINGLE_KEYWORDS = ('smart', 'eco', 'green', 'fitness', 'mobile', 'hardware', 'device', 'electronics')
+
+KEYWORDS = sorted(
+    set(SINGLE_KEYWORDS).union(*CATEGORIES.values()),
+    key=lambda keyword: (-len(keyword), keyword)
+)
+
+# One pass over the query: the lookahead reports the longest keyword starting at
+# each position, and PREFIXES adds the shorter keywords that start there too
+_PATTERN = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in KEYWORDS) + '))')
+PREFIXES = {
+    keyword: frozenset(other for other in KEYWORDS if keyword.startswith(other))
+    for keyword in KEYWORDS
+}
+_KEYWORD_CATEGORIES = {
+    keyword: frozenset(name for name, words in CATEGORIES.items() if keyword in words)
+    for keyword in KEYWORDS
+}
+
+
+class QueryTags:
+    """Keywords and categories found in one query"""
+
+    def __init__(self, keywords, categories):
+        self.keywords = keywords
+        self.categories = categories
+
+    def has(self, category):
+        return category in self.categories
+
+    def matched(self, keyword):
+        return keyword in self.keywords
+
+    def __repr__(self):
+        return f"QueryTags(keywords={sorted(self.keywords)}, categories={sorted(self.categories)})"
+
+
+@lru_cache(maxsize=1024)
+def classify(query):
+    """Tag a query in a single scan; repeat calls for the same query are cached"""
+    keywords = set()
+    for match in _PATTERN.finditer(query.lower()):
+        keywords.update(PREFIXES[match.group(1)])
+
+    categories = set()
+    for keyword in keywords:
+        categories.update(_KEYWORD_CATEGORIES[keyword])
+
+    return QueryTags(frozenset(keywords), frozenset(categories))
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+import uuid
+
+# Longest a scorer is expected to run; a leader that dies frees the key after this
+LEASE_SECONDS = int(os.environ.get('COALESCE_LEASE_SECONDS', '15'))
+# How long a follower waits for the leader's result before computing on its own
+WAIT_SECONDS = float(os.environ.get('COALESCE_WAIT_SECONDS', '12'))
+POLL_SECONDS = float(os.environ.get('COALESCE_POLL_SECONDS', '0.2'))
+
+
+class Coalescer:
+    """Single-flight for cache misses: one caller computes, concurrent callers wait.
+
+    The leader is chosen with an in-process claim and, when the cache has a
+    shared layer, a lease item in the analysis table, so identical analyses
+    running in different containers coalesce too. Followers poll the cache for
+    the leader's result. If the leader finishes without caching anything
+    (e.g. a mock fallback) a follower takes over the lease and computes;
+    after wait_seconds it computes regardless.
+    """
+
+    def __init__(self, lease_seconds=LEASE_SECONDS, wait_seconds=WAIT_SECONDS, poll_seconds=POLL_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        self._inflight = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _lease_key(key):
+        return f"flight|{key}"
+
+    def _claim(self, cache, key):
+        with self._lock:
+            if key in self._inflight:
+                return None
+            self._inflight.add(key)
+
+        owner = uuid.uuid4().hex
+        shared = getattr(cache, 'shared', None)
+        if shared is not None:
+            try:
+                if not shared.try_acquire_lease(self._lease_key(key), owner, self.lease_seconds):
+                    self._forget(key)
+                    return None
+            except Exception as e:
+                print(f"Coalescing lease failed for {key}: {e}")
+        return owner
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.discard(key)
+
+    def join(self, cache, key):
+        """Return (entry, None) when another caller's result arrived, or (None, owner) to compute.
+
+        owner is None when the wait timed out and the caller computes without
+        holding the key; otherwise pass it to release() once the result is cached.
+        """
+        deadline = time.time() + self.wait_seconds
+        waited = False
+        while True:
+            owner = self._claim(cache, key)
+            if owner is not None:
+                # A leader may have cached its result and released the key since our last look
+                entry = cache.get(key) if waited else None
+                if entry is not None:
+                    self.release(cache, key, owner)
+                    return entry, None
+                return None, owner
+            if time.time() + self.poll_seconds > deadline:
+                print(f"Gave up waiting for in-flight analysis {key}")
+                return None, None
+            time.sleep(self.poll_seconds)
+            waited = True
+            entry = cache.get(key)
+            if entry is not None:
+                return entry, None
+
+    def release(self, cache, key, owner):
+        self._forget(key)
+        shared = getattr(cache, 'shared', None)
+        if shared is not None:
+            try:
+                shared.release_lease(self._lease_key(key), owner)
+            except Exception as e:
+                print(f"Coalescing lease release failed for {key}: {e}")
@@ -0,0 +1,17 @@
+import hashlib
+import os
+from functools import lru_cache
+
+# Changing the seed reshuffles every mock/fallback score, so it must match across all functions
+SCORING_SEED = os.environ.get('SCORING_SEED', 'product-opportunity').encode('utf-8')[:64]
+
+
+@lru_cache(maxsize=4096)
+def stable_hash(text):
+    """Non-negative 64-bit keyed digest of text, identical in every process.
+
+    Drop-in replacement for hash() in scoring code: Python randomizes str hashes
+    per process, so hash()-derived scores differ between warm containers.
+    """
+    digest = hashlib.blake2b(str(text).encode('utf-8'), digest_size=8, key=SCORING_SEED).digest()
+    return int.from_bytes(digest, 'big')
@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from opportunity_common.breaker import CircuitOpenError
+from opportunity_common.ratelimit import RateLimitExceeded
+
+# Errors raised before the upstream was called, which say nothing about its health
+LOCAL_REFUSALS = (CircuitOpenError, RateLimitExceeded)
+
+# Shared by every invocation of a warm container; timed-out calls finish in the background
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='fanout')
+
+
+class Provider:
+    """An upstream call with its own deadline, optional fallback and optional circuit breaker"""
+
+    def __init__(self, name, fetch, fallback=None, timeout=10, breaker=None):
+        self.name = name
+        self.fetch = fetch
+        self.fallback = fallback
+        self.timeout = timeout
+        self.breaker = breaker
+
+
+class ProviderResult:
+    """Outcome of one provider call; source is 'live', 'fallback' or 'failed'"""
+
+    def __init__(self, name, value, source, error=None, elapsed_ms=0):
+        self.name = name
+        self.value = value
+        self.source = source
+        self.error = error
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def live(self):
+        return self.source == 'live'
+
+
+def _settle(provider, value, error, started):
+    elapsed_ms = round((time.time() - started) * 1000, 1)
+    if provider.breaker is not None and not isinstance(error, LOCAL_REFUSALS):
+        if error is None:
+            provider.breaker.record_success()
+        else:
+            provider.breaker.record_failure()
+    if error is None:
+        return ProviderResult(provider.name, value, 'live', elapsed_ms=elapsed_ms)
+
+    print(f"{provider.name} provider failed: {error}")
+    if provider.fallback is None:
+        return ProviderResult(provider.name, None, 'failed', str(error), elapsed_ms)
+    try:
+        return ProviderResult(provider.name, provider.fallback(), 'fallback', str(error), elapsed_ms)
+    except Exception as fallback_error:
+        return ProviderResult(provider.name, None, 'failed', str(fallback_error), elapsed_ms)
+
+
+def fetch_all(providers, on_result=None, executor=None):
+    """Run all providers concurrently and return {name: ProviderResult}.
+
+    Each provider is bounded by its own timeout, measured from the start of the
+    fan-out, so a slow provider only degrades its own result. on_result, if given,
+    is called with each ProviderResult as soon as it settles. Large fan-outs can
+    pass their own executor instead of queueing behind the shared one. A
+    provider whose breaker is open goes straight to its fallback; failures and
+    deadline overruns are reported to the breaker.
+    """
+    executor = executor or _executor
+    started = time.time()
+    results = {}
+
+    def record(result):
+        results[result.name] = result
+        if on_result is not None:
+            on_result(result)
+
+    pending = {}
+    for provider in providers:
+        if provider.breaker is not None and not provider.breaker.allow():
+            record(_settle(provider, None, CircuitOpenError(f"{provider.name} circuit is open"), started))
+            continue
+        future = executor.submit(provider.fetch)
+        pending[future] = provider
+
+    while pending:
+        now = time.time()
+        next_deadline = min(started + p.timeout for p in pending.values())
+        done, _ = wait(list(pending), timeout=max(0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            provider = pending.pop(future)
+            error = future.exception()
+            record(_settle(provider, None if error else future.result(), error, started))
+
+        now = time.time()
+        for future, provider in list(pending.items()):
+            if started + provider.timeout <= now:
+                del pending[future]
+                future.cancel()
+                error = TimeoutError(f"{provider.name} exceeded {provider.timeout}s deadline")
+                record(_settle(provider, None, error, started))
+
+    return {provider.name: results[provider.name] for provider in providers}
@@ -0,0 +1,332 @@
+"""Memory-mapped weekly demand history per idea and region.
+
+Each series is one file of fixed-width little-endian columns:
+
+    header   32 bytes   magic, version, capacity, count
+    week     uint32[capacity]   week start, epoch seconds
+    interest float32[capacity]  Trends interest (NaN when unknown)
+    news     float32[capacity]  news volume (NaN when unknown)
+
+Rows are contiguous weeks (gaps are filled with NaN rows), so appending is a
+write at index count and window statistics are plain slices. Weeks older than
+the first row are backfilled by rewriting the file with the missing rows in
+front, so a series first seen through one news week still takes the full
+Trends history.
+
+Files live in DEMAND_HISTORY_DIR. The /tmp default keeps one history per
+container, lost when the container is recycled; lambda_packaging.py mounts an
+EFS access point there so every container and function shares one history.
+Processes sharing the directory serialize their reads and writes with fcntl
+locks on a .lock file next to each series, and map the series again under the
+lock, so a file another process rewrote (to grow or backfill it) is seen.
+
+numpy is imported on first use, so handlers that only serve cached results
+do not pay for it on a cold start.
+"""
+import fcntl
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from opportunity_common.digest import stable_hash
+from opportunity_common.trends import WEEK_SECONDS
+
+HISTORY_DIR = os.environ.get('DEMAND_HISTORY_DIR', '/tmp/demand-history')
+MAGIC = 0x54534844  # 'DHST'
+VERSION = 1
+HEADER_BYTES = 32
+INITIAL_CAPACITY = 128
+# Longest gap filled with NaN rows; a week further before the first row is
+# skipped, and one further after the last row starts the series over
+MAX_GAP_WEEKS = 104
+MAX_OPEN_SERIES = 64
+
+RECENT_WEEKS = 4
+YEAR_WEEKS = 52
+
+
+class SeriesFile:
+    """One idea/region history file, memory-mapped; append is O(1) amortized.
+
+    Reads and writes that other processes may share go through locked().
+    """
+
+    def __init__(self, path, capacity=INITIAL_CAPACITY):
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, capacity, replace=False)
+        self._map()
+
+    @staticmethod
+    def _create(path, capacity, columns=None, replace=True):
+        """Write a file of capacity rows holding columns (weeks, interest, news) and move it to path.
+
+        With replace=False an existing file (created meanwhile by another
+        process) is kept.
+        """
+        import numpy as np
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data = np.memmap(tmp_path, dtype=np.uint8, mode='w+', shape=(HEADER_BYTES + 12 * capacity,))
+        header = data[:16].view('<u4')
+        header[:] = (MAGIC, VERSION, capacity, 0)
+        if columns is not None:
+            count = columns[0].size
+            offset = HEADER_BYTES
+            for column in columns:
+                width = column.dtype.itemsize
+                data[offset:offset + width * count] = column.view(np.uint8)
+                offset += width * capacity
+            header[3] = count
+        data.flush()
+        del data
+        if replace:
+            os.replace(tmp_path, path)
+            return
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+
+    def _map(self):
+        import numpy as np
+        self._data = np.memmap(self.path, dtype=np.uint8, mode='r+')
+        self._header = self._data[:16].view('<u4')
+        if self._header[0] != MAGIC or self._header[1] != VERSION:
+            raise ValueError(f"{self.path} is not a demand history file")
+        capacity = int(self._header[2])
+        offset = HEADER_BYTES
+        self._weeks = self._data[offset:offset + 4 * capacity].view('<u4')
+        offset += 4 * capacity
+        self._interest = self._data[offset:offset + 4 * capacity].view('<f4')
+        offset += 4 * capacity
+        self._news = self._data[offset:offset + 4 * capacity].view('<f4')
+
+    @property
+    def capacity(self):
+        return int(self._header[2])
+
+    @property
+    def count(self):
+        return int(self._header[3])
+
+    @property
+    def weeks(self):
+        return self._weeks[:self.count]
+
+    @property
+    def interest(self):
+        return self._interest[:self.count]
+
+    @property
+    def news(self):
+        return self._news[:self.count]
+
+    @property
+    def last_week(self):
+        return int(self._weeks[self.count - 1]) if self.count else None
+
+    @property
+    def first_week(self):
+        return int(self._weeks[0]) if self.count else None
+
+    @contextmanager
+    def locked(self, exclusive=True):
+        """Hold an fcntl lock on the series' .lock file, with the series file mapped afresh.
+
+        The lock file is never replaced or mapped, so the lock survives the
+        series file being rewritten. Mapping again once the lock is held picks
+        up a file another process replaced and, on EFS, revalidates cached
+        pages (NFS close-to-open consistency). Exclusive holders flush their
+        writes before the lock is released.
+        """
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._map()
+            yield self
+            if exclusive:
+                self.flush()
+        finally:
+            os.close(fd)
+
+    def _rewrite(self, capacity, weeks, interest, news):
+        self._create(self.path, capacity, (weeks, interest, news))
+        self._map()
+
+    def _grow(self):
+        self._rewrite(self.capacity * 2, self.weeks, self.interest, self.news)
+
+    def _prepend(self, week):
+        """Add rows for week up to the current first week in front of the series"""
+        import numpy as np
+        lead = np.arange(week, self.first_week, WEEK_SECONDS, dtype='<u4')
+        blank = np.full(lead.size, np.nan, dtype='<f4')
+        capacity = self.capacity
+        while capacity < self.count + lead.size:
+            capacity *= 2
+        self._rewrite(capacity, np.concatenate((lead, self.weeks)),
+                      np.concatenate((blank, self.interest)), np.concatenate((blank, self.news)))
+
+    def _restart(self):
+        """Drop every row, keeping the file, so the series starts again at the next write"""
+        import numpy as np
+        self._rewrite(INITIAL_CAPACITY, np.empty(0, dtype='<u4'), np.empty(0, dtype='<f4'), np.empty(0, dtype='<f4'))
+
+    def append(self, week, interest=float('nan'), news=float('nan')):
+        if self.count == self.capacity:
+            self._grow()
+        index = self.count
+        self._weeks[index] = week
+        self._interest[index] = interest
+        self._news[index] = news
+        self._header[3] = index + 1
+
+    def set(self, week, interest=None, news=None):
+        """Write a week's values, adding it (and NaN rows for any gap) when it is outside the series.
+
+        Weeks more than MAX_GAP_WEEKS before the first row are skipped; a week
+        more than MAX_GAP_WEEKS after the last row replaces the series, so rows
+        always stay contiguous weeks.
+        """
+        first = self.first_week
+        if first is not None and week < first:
+            if first - week > MAX_GAP_WEEKS * WEEK_SECONDS:
+                return
+            self._prepend(week)
+        last = self.last_week
+        if last is not None and week > last + MAX_GAP_WEEKS * WEEK_SECONDS + WEEK_SECONDS:
+            print(f"Demand history {self.path} restarts at {week}: {(week - last) // WEEK_SECONDS} weeks since the last row")
+            self._restart()
+            last = None
+        if last is not None and week > last + WEEK_SECONDS:
+            for missing in range(last + WEEK_SECONDS, week, WEEK_SECONDS):
+                self.append(missing)
+        if last is None or week > last:
+            self.append(week)
+            index = self.count - 1
+        else:
+            index = int(self.weeks.searchsorted(week))
+            if index >= self.count or self._weeks[index] != week:
+                return
+        if interest is not None:
+            self._interest[index] = interest
+        if news is not None:
+            self._news[index] = news
+
+    def flush(self):
+        self._data.flush()
+
+
+def _nanmean(values):
+    import numpy as np
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.size else None
+
+
+def _ratio(numerator, denominator):
+    if numerator is None or not denominator:
+        return None
+    return round(numerator / denominator, 3)
+
+
+def rolling_mean(values, window):
+    """NaN-aware rolling mean, one value per full window"""
+    import numpy as np
+    if values.size < window:
+        return np.empty(0)
+    known = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(known, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(known)))
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+def calendar_week(week):
+    """ISO week number of a week start, with week 53 counted as 52 so every year has it"""
+    return min(datetime.fromtimestamp(week, timezone.utc).isocalendar()[1], YEAR_WEEKS)
+
+
+def series_stats(weeks, interest, news):
+    """Rolling means, momentum and seasonality from the history columns"""
+    import numpy as np
+    interest = interest.astype(np.float64)
+    news = news.astype(np.float64)
+    year = interest[-YEAR_WEEKS:]
+    recent_interest = _nanmean(interest[-RECENT_WEEKS:])
+
+    stats = {
+        'weeks': int(weeks.size),
+        'rolling_mean_4w': [
+            None if np.isnan(value) else round(float(value), 2)
+            for value in rolling_mean(interest[-12:], RECENT_WEEKS)
+        ],
+        'interest_momentum': _ratio(recent_interest, _nanmean(year)),
+        'news_momentum': _ratio(_nanmean(news[-RECENT_WEEKS:]), _nanmean(news[-YEAR_WEEKS:])),
+        'seasonal_index': None
+    }
+
+    # Next week's interest in earlier years relative to the all-time mean
+    if weeks.size > YEAR_WEEKS:
+        week_of_year = np.array([calendar_week(week) for week in weeks.tolist()])
+        upcoming = calendar_week(int(weeks[-1]) + WEEK_SECONDS)
+        stats['seasonal_index'] = _ratio(_nanmean(interest[week_of_year == upcoming]), _nanmean(interest))
+    return stats
+
+
+class DemandHistory:
+    """Open history files by idea and region, keeping the most recent ones mapped"""
+
+    def __init__(self, directory=HISTORY_DIR, max_open=MAX_OPEN_SERIES):
+        self.directory = directory
+        self.max_open = max_open
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, idea, region):
+        return os.path.join(self.directory, f"{stable_hash(f'{idea}|{region}'):016x}.dhs")
+
+    def series(self, idea, region):
+        key = (str(idea).lower(), str(region).upper())
+        series = self._open.get(key)
+        if series is None:
+            os.makedirs(self.directory, exist_ok=True)
+            series = SeriesFile(self._path(*key))
+            self._open[key] = series
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)[1].flush()
+        self._open.move_to_end(key)
+        return series
+
+    def record_trends(self, trend_series):
+        """Store the weeks of a TrendSeries whose interest is not known yet, older ones included"""
+        import numpy as np
+        try:
+            with self._lock, self.series(trend_series.keyword, trend_series.geo).locked() as series:
+                known = set(series.weeks[~np.isnan(series.interest)].tolist())
+                for week, value in zip(trend_series.times, trend_series.values):
+                    if week not in known:
+                        series.set(week, interest=value)
+        except (OSError, ValueError) as e:
+            print(f"Demand history write failed for {trend_series.keyword}: {e}")
+
+    def record_news(self, idea, region, week, volume):
+        try:
+            with self._lock, self.series(idea, region).locked() as series:
+                series.set(week, news=volume)
+        except (OSError, ValueError) as e:
+            print(f"Demand history write failed for {idea}: {e}")
+
+    def stats(self, idea, region):
+        """series_stats for idea in region, or None when the history is unavailable"""
+        try:
+            with self._lock, self.series(idea, region).locked(exclusive=False) as series:
+                return series_stats(series.weeks, series.interest, series.news)
+        except (OSError, ValueError) as e:
+            print(f"Demand history read failed for {idea}: {e}")
+            return None
@@ -0,0 +1,63 @@
+import os
+import threading
+
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+RETRY_TOTAL = int(os.environ.get('HTTP_RETRY_TOTAL', '2'))
+RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', '0.3'))
+# (connect, read) seconds for every outbound call; connects fail fast and are retried
+CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '3.05'))
+READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '10'))
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session(pool_maxsize=POOL_MAXSIZE, retries=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF):
+    """Create a requests.Session with keep-alive pooling and retry/backoff on transient errors.
+
+    429 is deliberately not retried here so rate limits surface to the caller
+    instead of stalling the invocation, and neither is a read timeout: it has
+    already used a full READ_TIMEOUT, and callers without a fan-out deadline
+    would otherwise block for several of them.
+    """
+    # Imported on first use so cold starts that never reach an HTTP call skip requests
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled session, reused across warm invocations"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def reset_session():
+    """Drop the shared session, e.g. after the connection pool has gone bad"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
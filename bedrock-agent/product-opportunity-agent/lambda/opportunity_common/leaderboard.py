@@ -0,0 +1,219 @@
+"""Leaderboards of ideas by score and by weekly rise, read with Query from two GSIs.
+
+Every stored analysis with a score also updates one board item per idea and
+scorer in the analysis table:
+
+    query_id     'board#<canonical idea key>'
+    timestamp    scorer name
+    score        latest score
+    rise         score minus the last score of an earlier week (0 for new ideas)
+    score_board  '<scorer>|<week>|s<bucket>'   partition of the score index
+    rise_board   '<scorer>|<week>|r<bucket>'   partition of the rise index
+
+Board partitions are split by ISO week and by value bucket, so the writes of a
+busy week spread over a dozen partitions instead of one. A top-N read queries
+the highest bucket first, descending on the numeric sort key, and only moves
+to lower buckets until it has N ideas.
+"""
+import base64
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+from opportunity_common.cache import ANALYSIS_TABLE
+
+BOARD_PREFIX = 'board#'
+SCORE_INDEX = 'leaderboard-score'
+RISE_INDEX = 'leaderboard-rise'
+SCORE_BUCKET_WIDTH = 10
+# Rises beyond +-RISE_BUCKET_WIDTH * RISE_BUCKETS share the outermost bucket
+RISE_BUCKET_WIDTH = 5
+RISE_BUCKETS = 4
+BOARD_RETENTION_DAYS = int(os.environ.get('LEADERBOARD_RETENTION_DAYS', '90'))
+MAX_CONTENTION_RETRIES = 3
+MAX_LIMIT = 100
+
+
+def week_label(timestamp=None):
+    """ISO week of timestamp, e.g. '2026-W42'"""
+    year, week, _ = datetime.fromtimestamp(timestamp or time.time(), timezone.utc).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _bucket(value, width, low, high):
+    return max(low, min(high, math.floor(value / width)))
+
+
+class Board:
+    """One leaderboard: the GSI serving it, its attributes and its value buckets, highest first"""
+
+    def __init__(self, index, partition, sort, prefix, width, low, high):
+        self.index = index
+        self.partition = partition
+        self.sort = sort
+        self.prefix = prefix
+        self.width = width
+        self.buckets = list(range(high, low - 1, -1))
+
+    def partition_key(self, scorer, week, value):
+        bucket = _bucket(value, self.width, self.buckets[-1], self.buckets[0])
+        return self.partition_for(scorer, week, bucket)
+
+    def partition_for(self, scorer, week, bucket):
+        return f"{scorer}|{week}|{self.prefix}{bucket}"
+
+
+BOARDS = {
+    'top': Board(SCORE_INDEX, 'score_board', 'score', 's', SCORE_BUCKET_WIDTH, 0, 100 // SCORE_BUCKET_WIDTH),
+    'rising': Board(RISE_INDEX, 'rise_board', 'rise', 'r', RISE_BUCKET_WIDTH, -RISE_BUCKETS, RISE_BUCKETS)
+}
+
+
+def _encode_cursor(bucket, last_key):
+    return base64.urlsafe_b64encode(json.dumps([bucket, last_key]).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    try:
+        bucket, last_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid leaderboard cursor: {e}")
+    return bucket, last_key
+
+
+def _parse_entry(item):
+    return {
+        'idea': item['idea']['S'],
+        'idea_key': item['query_id']['S'][len(BOARD_PREFIX):],
+        'region': item.get('region', {}).get('S'),
+        'score': float(item['score']['N']),
+        'rise': float(item['rise']['N']),
+        'updated_at': datetime.fromtimestamp(float(item['updated_at']['N']), timezone.utc).isoformat()
+    }
+
+
+class Leaderboard:
+    """Board items in the analysis table and the leaderboard queries over them"""
+
+    def __init__(self, table_name=None, client=None, retention_days=BOARD_RETENTION_DAYS):
+        self.table_name = table_name or ANALYSIS_TABLE
+        self.retention_days = retention_days
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def _key(self, idea_key, scorer):
+        return {'query_id': {'S': BOARD_PREFIX + idea_key}, 'timestamp': {'S': scorer}}
+
+    def record(self, idea_key, idea, region, scorer, score, now=None):
+        """Move idea to its score on this week's boards for scorer.
+
+        The week's rise is measured from the idea's last score in an earlier
+        week, which the item keeps as week_open. Concurrent writers are
+        serialized with a condition on the previous updated_at, as in the
+        shared token buckets.
+        """
+        now = now or time.time()
+        week = week_label(now)
+        for _ in range(MAX_CONTENTION_RETRIES):
+            item = self.client.get_item(
+                TableName=self.table_name, Key=self._key(idea_key, scorer), ConsistentRead=True
+            ).get('Item')
+
+            if item is None:
+                week_open = score
+                condition = 'attribute_not_exists(query_id)'
+                values = {}
+            else:
+                week_open = float(item['week_open']['N'] if item['week']['S'] == week else item['score']['N'])
+                condition = 'updated_at = :previous'
+                values = {':previous': item['updated_at']}
+
+            rise = round(score - week_open, 2)
+            board_item = self._key(idea_key, scorer)
+            board_item.update({
+                'idea': {'S': str(idea)},
+                'region': {'S': str(region)},
+                'week': {'S': week},
+                'week_open': {'N': str(week_open)},
+                'score': {'N': str(score)},
+                'rise': {'N': str(rise)},
+                'score_board': {'S': BOARDS['top'].partition_key(scorer, week, score)},
+                'rise_board': {'S': BOARDS['rising'].partition_key(scorer, week, rise)},
+                'updated_at': {'N': str(now)},
+                'expires_at': {'N': str(int(now + self.retention_days * 86400))}
+            })
+            request = {'TableName': self.table_name, 'Item': board_item, 'ConditionExpression': condition}
+            if values:
+                request['ExpressionAttributeValues'] = values
+            try:
+                self.client.put_item(**request)
+                return True
+            except self.client.exceptions.ConditionalCheckFailedException:
+                continue
+        print(f"Leaderboard update for {idea_key} lost to concurrent writers")
+        return False
+
+    def leaders(self, board='top', scorer='dcc', limit=10, week=None, region=None, cursor=None):
+        """One page of a board, best first: {'entries': [...], 'week': ..., 'next_cursor': ... or None}"""
+        spec = BOARDS.get(board)
+        if spec is None:
+            raise ValueError(f"Unknown leaderboard {board}; use one of {', '.join(BOARDS)}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        week = week or week_label()
+
+        buckets = spec.buckets
+        last_key = None
+        if cursor:
+            bucket, last_key = _decode_cursor(cursor)
+            buckets = [b for b in buckets if b <= bucket]
+
+        query = {
+            'TableName': self.table_name,
+            'IndexName': spec.index,
+            'KeyConditionExpression': '#board = :board',
+            'ExpressionAttributeNames': {'#board': spec.partition},
+            'ScanIndexForward': False
+        }
+        if region:
+            query['FilterExpression'] = '#region = :region'
+            query['ExpressionAttributeNames']['#region'] = 'region'
+
+        entries = []
+        for i, bucket in enumerate(buckets):
+            values = {':board': {'S': spec.partition_for(scorer, week, bucket)}}
+            if region:
+                values[':region'] = {'S': region}
+            query['ExpressionAttributeValues'] = values
+            while True:
+                query['Limit'] = limit - len(entries)
+                if last_key:
+                    query['ExclusiveStartKey'] = last_key
+                else:
+                    query.pop('ExclusiveStartKey', None)
+                response = self.client.query(**query)
+                entries.extend(_parse_entry(item) for item in response.get('Items', []))
+                last_key = response.get('LastEvaluatedKey')
+                if len(entries) >= limit:
+                    if last_key:
+                        next_cursor = _encode_cursor(bucket, last_key)
+                    elif i + 1 < len(buckets):
+                        next_cursor = _encode_cursor(buckets[i + 1], None)
+                    else:
+                        next_cursor = None
+                    return {'entries': entries, 'week': week, 'next_cursor': next_cursor}
+                if not last_key:
+                    break
+        return {'entries': entries, 'week': week, 'next_cursor': None}
+
+
+def leaderboard_enabled():
+    """Board updates can be turned off with ANALYSIS_LEADERBOARD=false"""
+    return os.environ.get('ANALYSIS_LEADERBOARD', 'true').lower() != 'false'
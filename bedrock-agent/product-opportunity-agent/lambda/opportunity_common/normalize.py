@@ -0,0 +1,75 @@
+import re
+from functools import lru_cache
+
+DEFAULT_REGION = 'US'
+
+# Region names and codes users type -> ISO 3166 code used for Trends geo and record keys
+REGION_ALIASES = {
+    'us': 'US', 'usa': 'US', 'united states': 'US', 'america': 'US',
+    'uk': 'GB', 'gb': 'GB', 'united kingdom': 'GB', 'britain': 'GB', 'great britain': 'GB', 'england': 'GB',
+    'canada': 'CA', 'germany': 'DE', 'france': 'FR', 'spain': 'ES', 'italy': 'IT',
+    'india': 'IN', 'japan': 'JP', 'china': 'CN', 'australia': 'AU', 'mexico': 'MX', 'brazil': 'BR',
+    'europe': 'EU', 'eu': 'EU'
+}
+
+# Filler words that do not change which product is meant
+STOPWORDS = frozenset((
+    'a', 'an', 'the', 'and', 'or', 'for', 'in', 'of', 'on', 'to', 'with', 'my', 'our', 'is', 'are',
+    'what', 'about', 'how', 'new', 'best', 'good', 'product', 'products', 'idea', 'ideas',
+    'market', 'opportunity', 'opportunities', 'analyze', 'analysis'
+))
+
+_REGION_NAMES = '|'.join(sorted((re.escape(name) for name in REGION_ALIASES), key=len, reverse=True))
+# Only explicit phrases name a region ("in the UK", "for the EU market"); a bare
+# name can be part of the product ("fine china", "america themed decor")
+_REGION_PHRASE = re.compile(rf"\b(?:in|for|across|within)\s+(?:the\s+)?({_REGION_NAMES})\b")
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+
+class NormalizedIdea:
+    """Canonical form of a product idea query.
+
+    text drops filler words and the region phrase but keeps word order; key
+    also ignores word order and simple plurals, so phrasings of the same idea
+    share cache entries and stored analyses. Scorers analyze the query as sent.
+    """
+
+    def __init__(self, text, region, key):
+        self.text = text
+        self.region = region
+        self.key = key
+
+    def __repr__(self):
+        return f"NormalizedIdea(text={self.text!r}, region={self.region!r}, key={self.key!r})"
+
+
+def region_code(value):
+    """Map a region name or code to its canonical code"""
+    value = str(value).strip()
+    return REGION_ALIASES.get(value.lower(), value.upper())
+
+
+def _singular(token):
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+@lru_cache(maxsize=2048)
+def normalize_idea(query, region=None):
+    """Normalize a query; an explicit region wins over one named in the text"""
+    text = str(query).lower()
+
+    match = _REGION_PHRASE.search(text)
+    if match:
+        found_region = REGION_ALIASES[match.group(1)]
+        text = text[:match.start()] + ' ' + text[match.end():]
+    else:
+        found_region = None
+
+    tokens = _TOKEN.findall(text)
+    words = [token for token in tokens if token not in STOPWORDS] or tokens
+
+    region = region_code(region) if region else (found_region or DEFAULT_REGION)
+    key = ' '.join(sorted(set(_singular(word) for word in words))) + '|' + region
+    return NormalizedIdea(' '.join(words), region, key)
@@ -0,0 +1,151 @@
+import threading
+import time
+import uuid
+
+from opportunity_common.cache import DynamoCache, shared_cache_enabled
+from opportunity_common.http_client import DEFAULT_TIMEOUT, get_session
+
+
+class ClientCredentialsTokenManager:
+    """OAuth client-credentials token cached in memory and in the shared table.
+
+    Tokens are reused until refresh_margin seconds before expiry. Refreshes are
+    single-flight: one thread per container, and one container at a time via a
+    DynamoDB lease, while the others wait for the token to appear in the shared store.
+    """
+
+    def __init__(self, name, token_url, client_id, client_secret, scope,
+                 shared=None, refresh_margin=300, lease_seconds=15, wait_seconds=5):
+        self.name = name
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.shared = shared
+        self.refresh_margin = refresh_margin
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.owner = uuid.uuid4().hex
+        self._token = None
+        self._expires_at = 0
+        self._rejected = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_key(self):
+        return f"oauth|{self.name}"
+
+    def get_token(self):
+        """Return a valid access token, refreshing it only when needed"""
+        token = self._local_token()
+        if token:
+            return token
+
+        with self._lock:
+            token = self._local_token() or self._shared_token()
+            if token:
+                return token
+            return self._refresh()
+
+    def invalidate(self, token=None):
+        """Reject token (the current one by default), e.g. after the API answered 401.
+
+        The rejected token is remembered, so neither the next call nor a wait
+        for another container's refresh picks it up again from the shared store.
+        A token that already replaced it is kept.
+        """
+        with self._lock:
+            rejected = token or self._token
+            if rejected is None:
+                return
+            self._rejected = rejected
+            if self._token == rejected:
+                self._token = None
+                self._expires_at = 0
+
+    def _local_token(self):
+        if self._token and time.time() < self._expires_at - self.refresh_margin:
+            return self._token
+        return None
+
+    def _shared_token(self):
+        if self.shared is None:
+            return None
+        try:
+            value, _ = self.shared.get(self.cache_key)
+        except Exception as e:
+            print(f"Shared token read failed for {self.name}: {e}")
+            return None
+        if not value or value['access_token'] == self._rejected:
+            return None
+        self._token = value['access_token']
+        self._expires_at = value['expires_at']
+        return self._local_token()
+
+    def _refresh(self):
+        has_lease = self._acquire_lease()
+        if not has_lease:
+            # Another container is refreshing; wait for its token before fetching our own
+            deadline = time.time() + self.wait_seconds
+            while time.time() < deadline:
+                time.sleep(0.2)
+                token = self._shared_token()
+                if token:
+                    return token
+
+        try:
+            return self._fetch_token()
+        finally:
+            if has_lease:
+                self._release_lease()
+
+    def _fetch_token(self):
+        response = get_session().post(
+            self.token_url,
+            auth=(self.client_id, self.client_secret),
+            data={'grant_type': 'client_credentials', 'scope': self.scope},
+            timeout=DEFAULT_TIMEOUT
+        )
+        if response.status_code != 200:
+            raise Exception(f"{self.name} token request failed: {response.status_code}")
+
+        data = response.json()
+        expires_in = int(data.get('expires_in', 3600))
+        self._token = data['access_token']
+        self._expires_at = time.time() + expires_in
+
+        if self.shared is not None:
+            try:
+                # Shared copy expires when this container would stop using it
+                self.shared.set(
+                    self.cache_key,
+                    {'access_token': self._token, 'expires_at': self._expires_at},
+                    max(1, expires_in - self.refresh_margin)
+                )
+            except Exception as e:
+                print(f"Shared token write failed for {self.name}: {e}")
+        return self._token
+
+    def _acquire_lease(self):
+        if self.shared is None:
+            return True
+        try:
+            return self.shared.try_acquire_lease(self.cache_key, self.owner, self.lease_seconds)
+        except Exception as e:
+            # Without the shared store we can only fall back to refreshing alone
+            print(f"Token lease failed for {self.name}: {e}")
+            return True
+
+    def _release_lease(self):
+        if self.shared is None:
+            return
+        try:
+            self.shared.release_lease(self.cache_key, self.owner)
+        except Exception as e:
+            print(f"Token lease release failed for {self.name}: {e}")
+
+
+def create_token_manager(name, token_url, client_id, client_secret, scope):
+    """Create a token manager sharing tokens through the analysis table unless disabled by env"""
+    shared = DynamoCache() if shared_cache_enabled() else None
+    return ClientCredentialsTokenManager(name, token_url, client_id, client_secret, scope, shared=shared)
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+from opportunity_common.cache import ANALYSIS_TABLE, shared_cache_enabled
+
+BUCKET_SORT_KEY = 'ratelimit'
+# Optimistic updates retried before a contended take gives up for this round
+MAX_CONTENTION_RETRIES = 5
+# Tokens a container takes from the shared bucket are only spent for this long
+LOCAL_GRANT_SECONDS = 1.0
+BUCKET_RETENTION_SECONDS = 86400
+
+
+class RateLimitExceeded(Exception):
+    """No token was available within the caller's deadline"""
+
+
+class LocalBucketStore:
+    """Token buckets for one container, used when the shared table is disabled"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, name, count, rate, capacity):
+        """Take up to count tokens; returns (granted, seconds until the next token)"""
+        now = time.time()
+        with self._lock:
+            tokens, refilled_at = self._buckets.get(name, (capacity, now))
+            available = min(capacity, tokens + (now - refilled_at) * rate)
+            granted = min(count, int(available))
+            self._buckets[name] = (available - granted, now)
+        if granted:
+            return granted, 0
+        return 0, (1 - available) / rate
+
+
+class DynamoBucketStore:
+    """Token buckets shared by every container, kept in the analysis table.
+
+    One item per bucket: query_id='ratelimit#<name>' with the token count and
+    the time it was last refilled. A take reads the item, refills it for the
+    elapsed time and writes it back conditioned on refilled_at being unchanged,
+    so concurrent containers never spend the same tokens.
+    """
+
+    def __init__(self, table_name=None, client=None):
+        self.table_name = table_name or ANALYSIS_TABLE
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def _key(self, name):
+        return {'query_id': {'S': f"ratelimit#{name}"}, 'timestamp': {'S': BUCKET_SORT_KEY}}
+
+    def take(self, name, count, rate, capacity):
+        """Take up to count tokens; returns (granted, seconds until the next token)"""
+        for _ in range(MAX_CONTENTION_RETRIES):
+            now = time.time()
+            item = self.client.get_item(
+                TableName=self.table_name, Key=self._key(name), ConsistentRead=True
+            ).get('Item')
+
+            if item:
+                previous = item['refilled_at']['N']
+                tokens = float(item['tokens']['N'])
+                available = min(capacity, tokens + (now - float(previous)) * rate)
+                condition = 'refilled_at = :previous'
+                values = {':previous': {'N': previous}}
+            else:
+                available = capacity
+                condition = 'attribute_not_exists(refilled_at)'
+                values = {}
+
+            granted = min(count, int(available))
+            if not granted:
+                return 0, (1 - available) / rate
+
+            values.update({
+                ':tokens': {'N': str(available - granted)},
+                ':now': {'N': str(now)},
+                ':expires': {'N': str(int(now + BUCKET_RETENTION_SECONDS))}
+            })
+            try:
+                self.client.update_item(
+                    TableName=self.table_name,
+                    Key=self._key(name),
+                    UpdateExpression='SET tokens = :tokens, refilled_at = :now, expires_at = :expires',
+                    ConditionExpression=condition,
+                    ExpressionAttributeValues=values
+                )
+                return granted, 0
+            except self.client.exceptions.ConditionalCheckFailedException:
+                continue
+        return 0, 1 / rate
+
+
+class TokenBucketLimiter:
+    """Token bucket of rate tokens per second up to capacity, shared across containers.
+
+    The fast path spends tokens this container already took from the shared
+    bucket; only when those run out does a call go to the store, taking up to
+    batch tokens at once. acquire() queues up to a deadline for a token, so a
+    burst is spread out instead of answered with 429s. Store errors let the
+    call through rather than failing it.
+    """
+
+    def __init__(self, name, rate, capacity, store, batch=1):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.store = store
+        self.batch = max(1, min(batch, int(capacity)))
+        self._tokens = 0
+        self._tokens_expire_at = 0
+        self._lock = threading.Lock()
+
+    def _take_local(self):
+        with self._lock:
+            if self._tokens and time.time() < self._tokens_expire_at:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout=0):
+        """True once a token was taken, False if none was available within timeout seconds"""
+        deadline = time.time() + timeout
+        while True:
+            if self._take_local():
+                return True
+
+            with self._lock:
+                try:
+                    granted, wait = self.store.take(self.name, self.batch, self.rate, self.capacity)
+                except Exception as e:
+                    print(f"Rate limiter {self.name} unavailable, allowing call: {e}")
+                    return True
+                if granted:
+                    self._tokens = granted - 1
+                    self._tokens_expire_at = time.time() + LOCAL_GRANT_SECONDS
+                    return True
+
+            remaining = deadline - time.time()
+            if remaining <= 0 or wait > remaining:
+                return False
+            time.sleep(wait)
+
+
+_local_store = LocalBucketStore()
+
+
+def create_rate_limiter(name, rate, capacity, batch=1):
+    """Limiter whose bucket is shared through the analysis table unless ANALYSIS_CACHE_SHARED=false"""
+    store = DynamoBucketStore() if shared_cache_enabled() else _local_store
+    return TokenBucketLimiter(name, rate, capacity, store, batch)
+
+
+def limiter_from_env(name, prefix, rate=1.0, capacity=5, batch=1):
+    """Limiter configured by <prefix>_RATE_PER_SECOND, <prefix>_BURST and <prefix>_RATE_BATCH"""
+    return create_rate_limiter(
+        name,
+        float(os.environ.get(f'{prefix}_RATE_PER_SECOND', str(rate))),
+        float(os.environ.get(f'{prefix}_BURST', str(capacity))),
+        int(os.environ.get(f'{prefix}_RATE_BATCH', str(batch)))
+    )
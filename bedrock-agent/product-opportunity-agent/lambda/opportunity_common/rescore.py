@@ -0,0 +1,432 @@
+"""Bulk re-scoring of every idea tracked in the analysis table.
+
+A pass runs in three stages:
+
+    scan     parallel segmented Scan of the analysis# items, keeping each
+             idea's newest stored score per component
+    rescore  ideas packed into groups that share upstream fetches, each group
+             scored in one call on a worker pool, paced by a token bucket
+    write    rows whose scores moved by at least min_change go back to the
+             table through a ResultSink (BatchWriteItem); the rest are skipped
+
+Progress is checkpointed at most every CHECKPOINT_SECONDS while the pass runs
+and always before an invocation returns, so a pass cut short by the Lambda
+timeout resumes where it stopped on the next invocation, on whichever
+container it lands. The checkpoint is kept in the analysis table; setting
+RESCORE_CHECKPOINT to a file path (e.g. for a local run) keeps it there instead.
+
+A scan segment or idea group that fails is logged and counted without ending
+the pass: a failed segment resumes from its last page on the next invocation,
+and a failed group is counted under errors and left for the next pass.
+Once a pass completes, the next one starts PASS_INTERVAL seconds later, so
+the job can be invoked on a fixed schedule.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from opportunity_common.cache import ANALYSIS_TABLE
+from opportunity_common.normalize import normalize_idea
+from opportunity_common.ratelimit import create_rate_limiter
+from opportunity_common.results import ANALYSIS_PREFIX, SCORE_KEYS, scan_analysis_pages
+
+CHECKPOINT_PATH = os.environ.get('RESCORE_CHECKPOINT')
+CHECKPOINT_SECONDS = float(os.environ.get('RESCORE_CHECKPOINT_SECONDS', '30'))
+# Seconds from the end of a complete pass to the start of the next
+PASS_INTERVAL = float(os.environ.get('RESCORE_PASS_INTERVAL', '86400'))
+SCAN_SEGMENTS = int(os.environ.get('RESCORE_SCAN_SEGMENTS', '4'))
+SCAN_PAGE_SIZE = int(os.environ.get('RESCORE_SCAN_PAGE_SIZE', '500'))
+WORKERS = int(os.environ.get('RESCORE_WORKERS', '4'))
+GROUP_SIZE = int(os.environ.get('RESCORE_GROUP_SIZE', '20'))
+# Ideas scored per second across every container running the job; upstream
+# APIs keep their own limiters on top of this
+IDEAS_PER_SECOND = float(os.environ.get('RESCORE_IDEAS_PER_SECOND', '2'))
+IDEAS_BURST = float(os.environ.get('RESCORE_IDEAS_BURST', '20'))
+# Score moves smaller than this are noise and are not written back
+MIN_CHANGE = float(os.environ.get('RESCORE_MIN_CHANGE', '0.5'))
+
+CHECKPOINT_PREFIX = 'rescore#'
+# Checkpoint data per table item, below DynamoDB's 400 KB item limit
+CHUNK_BYTES = 350 * 1024
+# Checkpoints of a job that stops running disappear through the table TTL
+CHECKPOINT_RETENTION_SECONDS = 7 * 86400
+
+# All a pass needs from each analysis item; the result is only read for DCC records
+SCAN_ATTRIBUTES = ('query_id', 'timestamp', 'idea', 'scorer', 'score', 'result')
+
+# Score each scorer stores; the DCC record carries all four in its result
+SCORER_SCORES = {
+    'dcc': 'dcc_score',
+    'market-demand': 'demand_score',
+    'competition-scan': 'competition_score',
+    'capability-match': 'capability_score'
+}
+
+
+def idea_region(key):
+    """Region part of a canonical idea key ('smart bottle|US' -> 'US')"""
+    return key.rpartition('|')[2]
+
+
+def observe(ideas, item):
+    """Fold one scanned analysis item into ideas: label, region and newest score per component"""
+    key = item['query_id']['S'][len(ANALYSIS_PREFIX):]
+    timestamp, _, scorer = item['timestamp']['S'].partition('#')
+    scorer = item.get('scorer', {}).get('S', scorer)
+
+    idea = ideas.setdefault(key, {'idea': None, 'region': idea_region(key), 'seen': '', 'scores': {}})
+    if timestamp > idea['seen']:
+        idea['seen'] = timestamp
+        idea['idea'] = item['idea']['S']
+
+    if scorer == 'dcc' and 'result' in item:
+        result = json.loads(item['result']['S'])
+        found = {name: result.get(name) for name in SCORE_KEYS}
+    elif scorer in SCORER_SCORES and 'score' in item:
+        found = {SCORER_SCORES[scorer]: float(item['score']['N'])}
+    else:
+        found = {}
+    for name, value in found.items():
+        stored = idea['scores'].get(name)
+        if isinstance(value, (int, float)) and (stored is None or timestamp > stored[0]):
+            idea['scores'][name] = [timestamp, value]
+
+
+def group_ideas(ideas, group_size=GROUP_SIZE):
+    """Pack (key, idea) pairs into groups of about group_size.
+
+    Every region of one idea lands in the same group: they share their news and
+    marketplace fetches when scored together.
+    """
+    by_topic = {}
+    for key, idea in ideas:
+        by_topic.setdefault(key.rpartition('|')[0], []).append((key, idea))
+
+    groups = []
+    group = []
+    for topic in sorted(by_topic):
+        if group and len(group) + len(by_topic[topic]) > group_size:
+            groups.append(group)
+            group = []
+        group.extend(by_topic[topic])
+    if group:
+        groups.append(group)
+    return groups
+
+
+def score_changed(row, scores, min_change=MIN_CHANGE):
+    """True when any component moved by at least min_change from its stored score, or was never stored"""
+    for name in SCORE_KEYS:
+        stored = scores.get(name)
+        if stored is None or abs(row[name] - stored[1]) >= min_change:
+            return True
+    return False
+
+
+class FileCheckpoint:
+    """Pass state kept in a JSON file, replaced atomically on every save"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """The saved state, or None when there is no usable checkpoint"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"Ignoring unreadable rescore checkpoint {self.path}: {e}")
+            return None
+
+    def save(self, state):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+
+class TableCheckpoint:
+    """Pass state kept in the analysis table, where every container can resume it.
+
+    The state is compressed and split into chunk items under
+    query_id='rescore#<name>', written to one of two slots in turn. The
+    'state' item is written last and names the slot, the chunk count and the
+    save, so a save cut short leaves the previous checkpoint readable.
+    """
+
+    def __init__(self, name='portfolio', table_name=None, client=None):
+        self.query_id = CHECKPOINT_PREFIX + name
+        self.table_name = table_name or ANALYSIS_TABLE
+        self._client = client
+        self._slot = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def _key(self, sort_key):
+        return {'query_id': {'S': self.query_id}, 'timestamp': {'S': sort_key}}
+
+    def _head(self):
+        return self.client.get_item(TableName=self.table_name, Key=self._key('state'), ConsistentRead=True).get('Item')
+
+    def load(self):
+        """The saved state, or None when there is no usable checkpoint"""
+        head = self._head()
+        if head is None:
+            return None
+        self._slot = head['slot']['S']
+        save_id = head['save_id']['S']
+        chunk_count = int(head['chunks']['N'])
+
+        query = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': 'query_id = :id AND begins_with(#ts, :prefix)',
+            'ExpressionAttributeNames': {'#ts': 'timestamp'},
+            'ExpressionAttributeValues': {':id': {'S': self.query_id}, ':prefix': {'S': f"chunk#{self._slot}#"}},
+            'ConsistentRead': True
+        }
+        chunks = {}
+        while True:
+            response = self.client.query(**query)
+            for item in response.get('Items', []):
+                if item['save_id']['S'] == save_id:
+                    chunks[int(item['timestamp']['S'].rpartition('#')[2])] = item['data']['B']
+            if 'LastEvaluatedKey' not in response:
+                break
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        if len(chunks) != chunk_count:
+            print(f"Ignoring incomplete rescore checkpoint {save_id}: {len(chunks)} of {chunk_count} chunks")
+            return None
+        try:
+            return json.loads(zlib.decompress(b''.join(chunks[i] for i in range(chunk_count))))
+        except (zlib.error, ValueError) as e:
+            print(f"Ignoring unreadable rescore checkpoint {save_id}: {e}")
+            return None
+
+    def save(self, state):
+        if self._slot is None:
+            head = self._head()
+            self._slot = head['slot']['S'] if head else 'b'
+        slot = 'a' if self._slot == 'b' else 'b'
+        save_id = uuid.uuid4().hex
+        expires_at = {'N': str(int(time.time() + CHECKPOINT_RETENTION_SECONDS))}
+
+        data = zlib.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'))
+        chunks = [data[start:start + CHUNK_BYTES] for start in range(0, len(data), CHUNK_BYTES)]
+        for i, chunk in enumerate(chunks):
+            item = self._key(f"chunk#{slot}#{i:05d}")
+            item.update({'save_id': {'S': save_id}, 'data': {'B': chunk}, 'expires_at': expires_at})
+            self.client.put_item(TableName=self.table_name, Item=item)
+
+        head = self._key('state')
+        head.update({
+            'slot': {'S': slot},
+            'save_id': {'S': save_id},
+            'chunks': {'N': str(len(chunks))},
+            'run_id': {'S': state['run_id']},
+            'saved_at': {'N': str(time.time())},
+            'expires_at': expires_at
+        })
+        self.client.put_item(TableName=self.table_name, Item=head)
+        self._slot = slot
+
+
+def create_checkpoint():
+    """File checkpoint at RESCORE_CHECKPOINT when it is set, otherwise one in the analysis table"""
+    if CHECKPOINT_PATH:
+        return FileCheckpoint(CHECKPOINT_PATH)
+    return TableCheckpoint()
+
+
+def new_state(segments):
+    return {
+        'run_id': uuid.uuid4().hex,
+        'started_at': time.time(),
+        'complete': False,
+        'segments': [{'last_key': None, 'done': False} for _ in range(segments)],
+        'ideas': {},
+        'done': [],
+        'completed_at': None,
+        'counts': {'rescored': 0, 'written': 0, 'unchanged': 0, 'failed': 0, 'errors': 0, 'scan_errors': 0}
+    }
+
+
+class RescoreJob:
+    """Re-score every tracked idea with score_entries and write back the rows that changed.
+
+    score_entries takes (idea, region) pairs and returns one row per distinct
+    idea with its idea, region and the four component scores, as the batch
+    scoring handler's score_entries does. Without a result_sink the pass only
+    counts what would have been written.
+    """
+
+    def __init__(self, score_entries, result_sink=None, checkpoint=None, table_name=None, client=None,
+                 segments=SCAN_SEGMENTS, page_size=SCAN_PAGE_SIZE, workers=WORKERS, group_size=GROUP_SIZE,
+                 limiter=None, min_change=MIN_CHANGE, checkpoint_interval=CHECKPOINT_SECONDS,
+                 pass_interval=PASS_INTERVAL):
+        self.score_entries = score_entries
+        self.result_sink = result_sink
+        self.checkpoint = checkpoint or create_checkpoint()
+        self.table_name = table_name or ANALYSIS_TABLE
+        self._client = client
+        self.segments = segments
+        self.page_size = page_size
+        self.workers = workers
+        self.group_size = group_size
+        self.limiter = limiter or create_rate_limiter('rescore', IDEAS_PER_SECOND, IDEAS_BURST)
+        self.min_change = min_change
+        self.checkpoint_interval = checkpoint_interval
+        self.pass_interval = pass_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._saved_at = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def run(self, deadline=None, restart=False):
+        """Run or resume the current pass until it completes or deadline (epoch seconds) passes.
+
+        A complete pass is only followed by a new one pass_interval seconds
+        after it finished, unless restart is set.
+        """
+        deadline = deadline or float('inf')
+        state = None if restart else self.checkpoint.load()
+        if state is not None and state['complete']:
+            if time.time() < (state.get('completed_at') or 0) + self.pass_interval:
+                return progress(state)
+            state = None
+        if state is None:
+            state = new_state(self.segments)
+            self._save(state, force=True)
+        state['counts'].setdefault('errors', 0)
+        state['counts'].setdefault('scan_errors', 0)
+
+        try:
+            self._scan(state, deadline)
+            if all(segment['done'] for segment in state['segments']):
+                self._rescore(state, deadline)
+                if len(state['done']) == len(state['ideas']):
+                    state['complete'] = True
+                    state['completed_at'] = time.time()
+        finally:
+            with self._lock:
+                self._save(state, force=True)
+        return progress(state)
+
+    def _save(self, state, force=False):
+        """Checkpoint state, at most every checkpoint_interval seconds unless forced; call with _lock held"""
+        if force or time.time() - self._saved_at >= self.checkpoint_interval:
+            self.checkpoint.save(state)
+            self._saved_at = time.time()
+
+    def _scan(self, state, deadline):
+        segments = [i for i, segment in enumerate(state['segments']) if not segment['done']]
+        if not segments:
+            return
+        with ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix='rescore-scan') as pool:
+            futures = {pool.submit(self._scan_segment, state, i, deadline): i for i in segments}
+            for future, segment in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    # The segment resumes from its last scanned page on the next invocation
+                    print(f"Rescore scan of segment {segment} failed: {e}")
+                    with self._lock:
+                        state['counts']['scan_errors'] += 1
+
+    def _scan_segment(self, state, segment, deadline):
+        cursor = state['segments'][segment]
+        pages = scan_analysis_pages(self.client, segment, len(state['segments']), cursor['last_key'],
+                                    self.page_size, SCAN_ATTRIBUTES, table_name=self.table_name)
+        for items, last_key in pages:
+            with self._lock:
+                for item in items:
+                    observe(state['ideas'], item)
+                cursor['last_key'] = last_key
+                cursor['done'] = last_key is None
+                self._save(state)
+            if time.time() >= deadline:
+                return
+
+    def _rescore(self, state, deadline):
+        done = set(state['done'])
+        pending = [(key, idea) for key, idea in sorted(state['ideas'].items()) if key not in done]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='rescore') as pool:
+            futures = {pool.submit(self._rescore_group, state, group, deadline): group
+                       for group in group_ideas(pending, self.group_size)}
+            for future, group in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    # Left undone, so the next invocation of this pass tries the group again
+                    print(f"Rescore group from {group[0][0]} failed: {e}")
+                    with self._lock:
+                        state['counts']['errors'] += len(group)
+
+    def _rescore_group(self, state, group, deadline):
+        for _ in group:
+            if not self.limiter.acquire(timeout=max(0, deadline - time.time())):
+                return
+
+        try:
+            rows = self.score_entries([(idea['idea'], idea['region']) for _, idea in group])
+        except Exception as e:
+            # Counted and skipped, so one bad group cannot stall the pass; the next pass retries it
+            print(f"Rescoring {len(group)} ideas from {group[0][0]} failed: {e}")
+            with self._lock:
+                state['counts']['errors'] += len(group)
+                state['done'].extend(key for key, _ in group)
+                self._save(state)
+            return
+        stored = {key: idea['scores'] for key, idea in group}
+        changed = [row for row in rows
+                   if score_changed(row, stored.get(normalize_idea(row['idea'], row['region']).key, {}),
+                                    self.min_change)]
+
+        failed = 0
+        if self.result_sink is not None and changed:
+            with self._write_lock:
+                for row in changed:
+                    self.result_sink.add('dcc', row['idea'], row, row['region'])
+                failed = self.result_sink.flush()
+
+        with self._lock:
+            counts = state['counts']
+            counts['rescored'] += len(rows)
+            counts['written'] += len(changed) - failed
+            counts['unchanged'] += len(rows) - len(changed)
+            counts['failed'] += failed
+            state['done'].extend(key for key, _ in group)
+            self._save(state)
+
+
+def progress(state):
+    """Summary of a pass for logs and the job's response"""
+    return {
+        'run_id': state['run_id'],
+        'complete': state['complete'],
+        'elapsed_seconds': round((state.get('completed_at') or time.time()) - state['started_at'], 1),
+        'segments_scanned': sum(1 for segment in state['segments'] if segment['done']),
+        'ideas': len(state['ideas']),
+        'remaining': len(state['ideas']) - len(state['done']),
+        **state['counts']
+    }
@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from opportunity_common.cache import ANALYSIS_TABLE
+from opportunity_common.leaderboard import Leaderboard, leaderboard_enabled
+from opportunity_common.normalize import normalize_idea
+
+ANALYSIS_PREFIX = 'analysis#'
+RETENTION_DAYS = int(os.environ.get('ANALYSIS_RETENTION_DAYS', '90'))
+
+# BatchWriteItem accepts at most 25 put requests per call
+BATCH_SIZE = 25
+MAX_WRITE_ATTEMPTS = 4
+# Seconds a flush may spend retrying unprocessed items and updating boards
+FLUSH_BUDGET_SECONDS = float(os.environ.get('RESULT_FLUSH_SECONDS', '2'))
+
+# Score attribute stored on each item, taken from the first key present in the result
+SCORE_KEYS = ('dcc_score', 'demand_score', 'competition_score', 'capability_score')
+
+
+def analysis_key(idea, region=None):
+    """Partition key holding every analysis of one idea, shared by all its phrasings"""
+    return ANALYSIS_PREFIX + normalize_idea(idea, region).key
+
+
+class ResultSink:
+    """Buffers scorer results and writes them to the analysis table with BatchWriteItem.
+
+    Items use query_id='analysis#<canonical idea key>' and an ISO timestamp
+    (suffixed with the scorer name) as sort key, so recent_analyses can read
+    them newest first.
+    Flushes run before the handler returns, since work left running after the
+    response is lost when the container is frozen or recycled; retries of
+    unprocessed items stop at MAX_WRITE_ATTEMPTS or after flush_budget seconds.
+    With a leaderboard, every written item with a score also moves its idea
+    on that scorer's boards.
+    """
+
+    def __init__(self, table_name=None, client=None, retention_days=RETENTION_DAYS, leaderboard=None,
+                 flush_budget=FLUSH_BUDGET_SECONDS):
+        self.table_name = table_name or ANALYSIS_TABLE
+        self.retention_days = retention_days
+        self.leaderboard = leaderboard
+        self.flush_budget = flush_budget
+        self._client = client
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def add(self, scorer, idea, result, region=None):
+        """Buffer one scorer result for idea"""
+        now = time.time()
+        normalized = normalize_idea(idea, region)
+        item = {
+            'query_id': {'S': ANALYSIS_PREFIX + normalized.key},
+            'timestamp': {'S': f"{datetime.fromtimestamp(now, timezone.utc).isoformat()}#{scorer}"},
+            'scorer': {'S': scorer},
+            'idea': {'S': str(idea)},
+            'region': {'S': normalized.region},
+            'result': {'S': json.dumps(result, default=str)},
+            'expires_at': {'N': str(int(now + self.retention_days * 86400))}
+        }
+        score = next((result[key] for key in SCORE_KEYS if isinstance(result.get(key), (int, float))), None)
+        if score is not None:
+            item['score'] = {'N': str(score)}
+        with self._lock:
+            self._buffer.append(item)
+
+    def _take_buffer(self):
+        with self._lock:
+            items, self._buffer = self._buffer, []
+        return items
+
+    def flush(self, budget=None):
+        """Write everything buffered now, within budget seconds (default flush_budget).
+
+        Returns the number of items that could not be written.
+        """
+        items = self._take_buffer()
+        if not items:
+            return 0
+        deadline = time.time() + (self.flush_budget if budget is None else budget)
+        return self._write(items, deadline)
+
+    def _write(self, items, deadline):
+        failed = 0
+        for start in range(0, len(items), BATCH_SIZE):
+            requests = [{'PutRequest': {'Item': item}} for item in items[start:start + BATCH_SIZE]]
+            try:
+                failed += self._write_batch(requests, deadline)
+            except Exception as e:
+                print(f"Result sink write failed: {e}")
+                failed += len(requests)
+        if self.leaderboard is not None:
+            self._update_boards(items, deadline)
+        return failed
+
+    def _update_boards(self, items, deadline):
+        """Latest score per idea and scorer onto the leaderboards; failures only cost freshness"""
+        latest = {}
+        for item in items:
+            if 'score' in item:
+                latest[(item['query_id']['S'], item['scorer']['S'])] = item
+        for (query_id, scorer), item in latest.items():
+            if time.time() >= deadline:
+                print(f"Result sink flush budget spent; leaderboard update skipped for {query_id}")
+                continue
+            try:
+                self.leaderboard.record(
+                    query_id[len(ANALYSIS_PREFIX):], item['idea']['S'], item['region']['S'],
+                    scorer, float(item['score']['N'])
+                )
+            except Exception as e:
+                print(f"Leaderboard update failed for {query_id}: {e}")
+
+    def _write_batch(self, requests, deadline):
+        """BatchWriteItem with exponential backoff on unprocessed items, until deadline"""
+        for attempt in range(MAX_WRITE_ATTEMPTS):
+            response = self.client.batch_write_item(RequestItems={self.table_name: requests})
+            requests = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not requests:
+                return 0
+            delay = 0.05 * 2 ** attempt
+            if attempt + 1 == MAX_WRITE_ATTEMPTS or time.time() + delay >= deadline:
+                break
+            time.sleep(delay)
+        print(f"Result sink dropped {len(requests)} unprocessed items")
+        return len(requests)
+
+
+def _parse_item(item):
+    timestamp, _, scorer = item['timestamp']['S'].partition('#')
+    return {
+        'idea': item['idea']['S'],
+        'scorer': item.get('scorer', {}).get('S', scorer),
+        'region': item.get('region', {}).get('S'),
+        'timestamp': timestamp,
+        'score': float(item['score']['N']) if 'score' in item else None,
+        'result': json.loads(item['result']['S'])
+    }
+
+
+def recent_analyses(idea, limit=10, scorer=None, since=None, region=None, table_name=None, client=None):
+    """Newest stored analyses for idea, optionally for one scorer and after an ISO timestamp"""
+    if client is None:
+        import boto3
+        client = boto3.client('dynamodb')
+
+    condition = 'query_id = :key'
+    values = {':key': {'S': analysis_key(idea, region)}}
+    if since:
+        condition += ' AND #ts >= :since'
+        values[':since'] = {'S': since}
+
+    query = {
+        'TableName': table_name or ANALYSIS_TABLE,
+        'KeyConditionExpression': condition,
+        'ExpressionAttributeValues': values,
+        'ScanIndexForward': False
+    }
+    if since:
+        query['ExpressionAttributeNames'] = {'#ts': 'timestamp'}
+    if scorer:
+        query['FilterExpression'] = 'scorer = :scorer'
+        values[':scorer'] = {'S': scorer}
+
+    analyses = []
+    while len(analyses) < limit:
+        if not scorer:
+            query['Limit'] = limit - len(analyses)
+        response = client.query(**query)
+        analyses.extend(_parse_item(item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return analyses[:limit]
+
+
+def scan_analysis_pages(client, segment, total_segments, start_key=None, page_size=500, attributes=None,
+                        since=None, table_name=None):
+    """Pages of stored analysis items in one parallel Scan segment, as (items, last evaluated key).
+
+    attributes limits the projection to those names; since (ISO timestamp)
+    skips older analyses. Pass the last key of a page back as start_key to
+    resume the segment after it.
+    """
+    names = {}
+    values = {':prefix': {'S': ANALYSIS_PREFIX}}
+    scan = {
+        'TableName': table_name or ANALYSIS_TABLE,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'Limit': page_size,
+        'FilterExpression': 'begins_with(query_id, :prefix)'
+    }
+    if attributes:
+        names.update((f"#a{i}", name) for i, name in enumerate(attributes))
+        scan['ProjectionExpression'] = ', '.join(names)
+    if since:
+        names['#ts'] = 'timestamp'
+        values[':since'] = {'S': since}
+        scan['FilterExpression'] += ' AND #ts >= :since'
+    if names:
+        scan['ExpressionAttributeNames'] = names
+    scan['ExpressionAttributeValues'] = values
+
+    while True:
+        if start_key:
+            scan['ExclusiveStartKey'] = start_key
+        response = client.scan(**scan)
+        start_key = response.get('LastEvaluatedKey')
+        yield response.get('Items', []), start_key
+        if not start_key:
+            return
+
+
+def persistence_enabled():
+    """Result persistence can be turned off with ANALYSIS_PERSIST=false"""
+    return os.environ.get('ANALYSIS_PERSIST', 'true').lower() != 'false'
+
+
+def create_result_sink():
+    """ResultSink for the analysis table, or None when persistence is disabled"""
+    if not persistence_enabled():
+        return None
+    return ResultSink(leaderboard=Leaderboard() if leaderboard_enabled() else None)
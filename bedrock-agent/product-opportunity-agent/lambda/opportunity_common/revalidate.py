@@ -0,0 +1,119 @@
+"""Stale-while-revalidate support for ActionGroupApp's analysis cache.
+
+Cached results carry the time they were computed. Within soft_ttl a hit is
+served as is; past it (but before the cache's own TTL, the hard TTL) the hit is
+still served and one refresh is started, preferably as an asynchronous
+invocation of the same function so it runs outside the caller's request.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Top-level event field marking an asynchronous refresh invocation
+REVALIDATE_FIELD = 'revalidate'
+
+# Refreshes started in-process run here; in Lambda they resume on the container's next invocation
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='revalidate')
+
+
+def wrap(result):
+    """Cache entry for a freshly computed result"""
+    return {'result': result, 'cached_at': time.time()}
+
+
+def annotate(entry, stale=False):
+    """Copy of a cached result whose data_source reports where it came from and its age"""
+    result = dict(entry['result'])
+    age = max(0, int(time.time() - entry['cached_at']))
+    state = 'stale, refreshing' if stale else 'cached'
+    result['data_source'] = f"{result.get('data_source', 'unknown')} ({state}, {age}s old)"
+    result['cache_age_seconds'] = age
+    return result
+
+
+def revalidate_mode():
+    """'invoke' refreshes through an asynchronous self-invocation, 'thread' in-process"""
+    return os.environ.get('ANALYSIS_REVALIDATE_MODE', 'invoke').lower()
+
+
+class Revalidator:
+    """Decides when a cached result is stale and starts at most one refresh per key.
+
+    A refresh is claimed locally and, when the cache has a shared layer, with a
+    lease item in the analysis table, so concurrent containers do not all
+    refresh the same idea. The lease expires by itself if a refresh dies.
+    """
+
+    def __init__(self, soft_ttl, lease_seconds=60, lambda_client=None):
+        self.soft_ttl = soft_ttl
+        self.lease_seconds = lease_seconds
+        self._lambda_client = lambda_client
+        self._inflight = set()
+        self._lock = threading.Lock()
+
+    @property
+    def lambda_client(self):
+        if self._lambda_client is None:
+            import boto3
+            self._lambda_client = boto3.client('lambda')
+        return self._lambda_client
+
+    def is_stale(self, entry):
+        return time.time() - entry['cached_at'] > self.soft_ttl
+
+    def claim(self, cache, key):
+        """Owner token if this caller should refresh key, None if a refresh is already running"""
+        with self._lock:
+            if key in self._inflight:
+                return None
+            self._inflight.add(key)
+
+        owner = uuid.uuid4().hex
+        shared = getattr(cache, 'shared', None)
+        if shared is not None:
+            try:
+                if not shared.try_acquire_lease(key, owner, self.lease_seconds):
+                    self._forget(key)
+                    return None
+            except Exception as e:
+                print(f"Revalidation lease failed for {key}: {e}")
+        return owner
+
+    def release(self, cache, key, owner):
+        self._forget(key)
+        shared = getattr(cache, 'shared', None)
+        if shared is not None:
+            try:
+                shared.release_lease(key, owner)
+            except Exception as e:
+                print(f"Revalidation lease release failed for {key}: {e}")
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.discard(key)
+
+    def trigger(self, cache, key, payload, context, refresh):
+        """Start refresh(payload) via an asynchronous self-invocation, or on a background thread.
+
+        Self-invocation needs the shared cache layer, since the refreshed result
+        has to reach this container through it.
+        """
+        function_arn = getattr(context, 'invoked_function_arn', None)
+        if function_arn and revalidate_mode() == 'invoke' and getattr(cache, 'shared', None) is not None:
+            try:
+                self.lambda_client.invoke(
+                    FunctionName=function_arn,
+                    InvocationType='Event',
+                    Payload=json.dumps(payload, default=str).encode('utf-8')
+                )
+                # The invoked container releases the shared lease; drop the local
+                # copy so later hits here read the refreshed entry from the table
+                self._forget(key)
+                cache.local.delete(key)
+                return
+            except Exception as e:
+                print(f"Asynchronous revalidation failed, refreshing in-process: {e}")
+        _refresher.submit(refresh, payload)
@@ -0,0 +1,170 @@
+"""DCC scoring: scalar scores for one idea and a vectorized kernel for many.
+
+The scalar functions (demand_score, competition_score, ...) score the single
+idea of an action group call in pure Python. The *_scores kernel takes
+equal-length columns (lists or NumPy arrays, one entry per candidate idea) and
+returns float64 arrays for batch jobs. NumPy is imported by the kernel only,
+so handlers that score one idea never pay for loading it. Both share the
+weights below and agree to floating-point rounding.
+"""
+
+# Demand: interest, momentum and news volume, plus a sentiment bonus
+INTEREST_WEIGHT = 0.5
+MOMENTUM_WEIGHT = 0.3
+NEWS_WEIGHT = 0.2
+SENTIMENT_BONUS = {'positive': 10, 'neutral': 0, 'negative': -5}
+
+# Competition: saturation tiers by total listings across platforms
+SATURATION_TIERS = ((600, 'High', 70), (300, 'Medium', 45))
+LOW_SATURATION = ('Low', 20)
+
+# Capability: internal skills, supplier network and time to market, minus a per-risk penalty
+INTERNAL_WEIGHT = 0.4
+SUPPLIER_WEIGHT = 0.3
+TIME_WEIGHT = 0.2
+RISK_PENALTY = 5
+
+# DCC = Demand*0.45 + (100 - Competition)*0.30 + Capability*0.25
+DEMAND_WEIGHT = 0.45
+COMPETITION_WEIGHT = 0.30
+CAPABILITY_WEIGHT = 0.25
+
+
+def _clip(value, low=0, high=100):
+    return max(low, min(high, value))
+
+
+def demand_score(interest, momentum, news_volume, sentiment):
+    """Demand score (0-100) of one idea from trends interest, momentum, news volume and sentiment label"""
+    total = (min(100, interest) * INTEREST_WEIGHT + min(50, momentum * 25) * MOMENTUM_WEIGHT
+             + min(30, news_volume * 0.5) * NEWS_WEIGHT + SENTIMENT_BONUS.get(sentiment, 0))
+    return float(_clip(total))
+
+
+def saturation_level(product_count):
+    """(label, score) for the market saturation of one idea by total product count"""
+    for threshold, label, score in SATURATION_TIERS:
+        if product_count > threshold:
+            return label, float(score)
+    return LOW_SATURATION[0], float(LOW_SATURATION[1])
+
+
+def competition_score(product_count, avg_rating, min_price, max_price):
+    """Competition score (0-100, higher = more crowded) of one idea"""
+    density = min(40, product_count / 20)
+    rating = max(0, (avg_rating - 3.0) * 15)
+    spread = (max_price - min_price) / max_price if max_price > 0 else 0
+    price = min(20, spread * 100 / 5)
+    return float(_clip(density + rating + saturation_level(product_count)[1] + price))
+
+
+def capability_score(avg_skill_level, supplier_capability, time_score, risk_count):
+    """Capability score (0-100) of one idea"""
+    total = (avg_skill_level * INTERNAL_WEIGHT + supplier_capability * SUPPLIER_WEIGHT
+             + time_score * TIME_WEIGHT - risk_count * RISK_PENALTY)
+    return float(_clip(total))
+
+
+def dcc_score(demand, competition, capability):
+    """Combined DCC score of one idea"""
+    return float(demand * DEMAND_WEIGHT + (100 - competition) * COMPETITION_WEIGHT
+                 + capability * CAPABILITY_WEIGHT)
+
+
+def _column(values):
+    import numpy as np
+    return np.asarray(values, dtype=np.float64)
+
+
+def sentiment_bonus(sentiments):
+    """Map sentiment labels to their demand bonus"""
+    return _column([SENTIMENT_BONUS.get(sentiment, 0) for sentiment in sentiments])
+
+
+def demand_scores(interest, momentum, news_volume, sentiment_bonuses):
+    """Demand score (0-100) from trends interest, momentum, news volume and sentiment bonus"""
+    import numpy as np
+    interest_score = np.minimum(100, _column(interest))
+    momentum_score = np.minimum(50, _column(momentum) * 25)
+    news_score = np.minimum(30, _column(news_volume) * 0.5)
+
+    total = (interest_score * INTEREST_WEIGHT + momentum_score * MOMENTUM_WEIGHT
+             + news_score * NEWS_WEIGHT + _column(sentiment_bonuses))
+    return np.clip(total, 0, 100)
+
+
+def saturation_levels(product_counts):
+    """Return (labels, scores) for market saturation by total product count"""
+    import numpy as np
+    counts = _column(product_counts)
+    conditions = [counts > threshold for threshold, _, _ in SATURATION_TIERS]
+    labels = np.select(conditions, [label for _, label, _ in SATURATION_TIERS], default=LOW_SATURATION[0])
+    scores = np.select(conditions, [score for _, _, score in SATURATION_TIERS], default=LOW_SATURATION[1])
+    return labels, scores.astype(np.float64)
+
+
+def competition_scores(product_counts, avg_ratings, min_prices, max_prices):
+    """Competition score (0-100, higher = more crowded) from listings, ratings and price spread"""
+    import numpy as np
+    counts = _column(product_counts)
+    max_prices = _column(max_prices)
+    _, saturation = saturation_levels(counts)
+
+    density = np.minimum(40, counts / 20)
+    rating = np.maximum(0, (_column(avg_ratings) - 3.0) * 15)
+    spread = np.divide(max_prices - _column(min_prices), max_prices,
+                       out=np.zeros_like(max_prices), where=max_prices > 0)
+    price = np.minimum(20, spread * 100 / 5)
+
+    return np.clip(density + rating + saturation + price, 0, 100)
+
+
+def capability_scores(avg_skill_levels, supplier_capabilities, time_scores, risk_counts):
+    """Capability score (0-100) from internal skills, suppliers, time to market and risk count"""
+    import numpy as np
+    total = (_column(avg_skill_levels) * INTERNAL_WEIGHT
+             + _column(supplier_capabilities) * SUPPLIER_WEIGHT
+             + _column(time_scores) * TIME_WEIGHT
+             - _column(risk_counts) * RISK_PENALTY)
+    return np.clip(total, 0, 100)
+
+
+def dcc_scores(demand, competition, capability):
+    """Combined DCC score from the three component score columns"""
+    return (_column(demand) * DEMAND_WEIGHT
+            + (100 - _column(competition)) * COMPETITION_WEIGHT
+            + _column(capability) * CAPABILITY_WEIGHT)
+
+
+def score_candidates(columns):
+    """Score a table of candidates given as a dict of columns.
+
+    Expected keys: interest, momentum, news_volume, sentiment (labels),
+    product_count, avg_rating, min_price, max_price, avg_skill_level,
+    supplier_capability, time_score, risk_count. Returns a dict of
+    demand, competition, capability and dcc arrays.
+    """
+    demand = demand_scores(
+        columns['interest'], columns['momentum'], columns['news_volume'],
+        sentiment_bonus(columns['sentiment'])
+    )
+    competition = competition_scores(
+        columns['product_count'], columns['avg_rating'], columns['min_price'], columns['max_price']
+    )
+    capability = capability_scores(
+        columns['avg_skill_level'], columns['supplier_capability'], columns['time_score'], columns['risk_count']
+    )
+    return {
+        'demand': demand,
+        'competition': competition,
+        'capability': capability,
+        'dcc': dcc_scores(demand, competition, capability)
+    }
+
+
+def rank_opportunities(rows, score_key='dcc_score'):
+    """Sort rows by score descending and number them from 1"""
+    ranked = sorted(rows, key=lambda row: row[score_key], reverse=True)
+    for rank, row in enumerate(ranked, start=1):
+        row['rank'] = rank
+    return ranked
@@ -0,0 +1,72 @@
+import math
+import re
+
+# Token -> polarity weight; strong words count double
+LEXICON = {
+    'good': 1, 'great': 1, 'excellent': 2, 'amazing': 2, 'best': 1, 'top': 1,
+    'innovative': 1, 'popular': 1, 'growth': 1, 'growing': 1, 'success': 1,
+    'successful': 1, 'love': 1, 'breakthrough': 2, 'record': 1, 'boom': 1,
+    'bad': -1, 'worst': -2, 'terrible': -2, 'awful': -2, 'poor': -1,
+    'disappointing': -1, 'recall': -2, 'lawsuit': -1, 'decline': -1,
+    'failure': -1, 'fails': -1, 'risk': -1, 'complaints': -1, 'scam': -2,
+}
+
+_TOKEN = re.compile(r"[a-z']+")
+
+# Per-article mean that separates the labels; matches the old rule of a net
+# score above 2 (or below -2) across ten articles
+LABEL_THRESHOLD = 0.2
+Z_95 = 1.96
+
+
+def article_score(article):
+    """Lexicon score of an article's title and description, tokenized once"""
+    text = f"{article.get('title') or ''} {article.get('description') or ''}".lower()
+    return sum(LEXICON.get(token, 0) for token in _TOKEN.findall(text))
+
+
+class StreamingSentiment:
+    """Running mean and 95% confidence interval of per-article sentiment (Welford)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, score):
+        self.count += 1
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (score - self.mean)
+
+    @property
+    def margin(self):
+        """Half-width of the 95% confidence interval of the mean"""
+        if self.count < 2:
+            return math.inf
+        variance = self._m2 / (self.count - 1)
+        return Z_95 * math.sqrt(variance / self.count)
+
+    def is_confident(self, max_margin, min_articles):
+        return self.count >= min_articles and self.margin <= max_margin
+
+    @property
+    def label(self):
+        if self.mean > LABEL_THRESHOLD:
+            return 'positive'
+        if self.mean < -LABEL_THRESHOLD:
+            return 'negative'
+        return 'neutral'
+
+
+def score_articles(articles, max_margin=0.15, min_articles=8):
+    """Score articles from any iterable, stopping once the estimate is tight enough.
+
+    Pass a lazy iterator (e.g. a paging generator) so unread pages are never fetched.
+    """
+    estimate = StreamingSentiment()
+    for article in articles:
+        estimate.add(article_score(article))
+        if estimate.is_confident(max_margin, min_articles):
+            break
+    return estimate
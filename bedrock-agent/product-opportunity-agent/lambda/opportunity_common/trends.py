@@ -0,0 +1,284 @@
+"""Google Trends interest-over-time ingestion without pytrends or pandas.
+
+A series per (keyword, geo) is kept as two compact arrays: week start times
+(uint32 epoch seconds) and interest values (float32). The first call fetches
+the last 12 months; later calls fetch only the weeks since the last stored
+one, plus a few overlapping weeks used to rescale the new values onto the
+stored ones (Trends normalizes every response to its own peak). Momentum and
+current interest are then updated from a running window sum.
+"""
+import json
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+
+from opportunity_common.cache import ANALYSIS_TABLE, shared_cache_enabled
+from opportunity_common.http_client import DEFAULT_TIMEOUT, get_session
+
+TRENDS_EXPLORE_URL = os.environ.get('TRENDS_API_URL', 'https://trends.google.com/trends/api/explore')
+TRENDS_MULTILINE_URL = os.environ.get('TRENDS_MULTILINE_URL', 'https://trends.google.com/trends/api/widgetdata/multiline')
+TRENDS_RELATED_URL = os.environ.get('TRENDS_RELATED_URL', 'https://trends.google.com/trends/api/widgetdata/relatedsearches')
+
+WEEK_SECONDS = 7 * 86400
+WINDOW_WEEKS = 52
+RECENT_WEEKS = 4
+OVERLAP_WEEKS = 4
+SERIES_SORT_KEY = 'series'
+SERIES_RETENTION_SECONDS = 400 * 86400
+
+# Trends prefixes its JSON with this to stop it being evaluated as a script
+XSSI_PREFIX = ")]}'"
+
+
+def week_start(timestamp):
+    """Start (Sunday 00:00 UTC) of the Trends week containing timestamp"""
+    day = int(timestamp) // 86400
+    return (day - (day + 4) % 7) * 86400
+
+
+def parse_trends_json(text):
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):].lstrip(',')
+    return json.loads(text)
+
+
+def weekly_points(timeline, now=None):
+    """Complete weeks from timelineData as sorted (week_start, mean value) pairs.
+
+    Short custom ranges come back with daily points; those are averaged per week.
+    The current, still partial, week is dropped.
+    """
+    current_week = week_start(now or time.time())
+    sums = {}
+    for point in timeline:
+        if point.get('isPartial') or not point.get('hasData', [True])[0]:
+            continue
+        start = week_start(point['time'])
+        if start >= current_week:
+            continue
+        total, count = sums.get(start, (0.0, 0))
+        sums[start] = (total + float(point['value'][0]), count + 1)
+    return [(start, total / count) for start, (total, count) in sorted(sums.items())]
+
+
+class TrendSeries:
+    """Weekly interest for one keyword and geo, newest last, at most WINDOW_WEEKS long"""
+
+    def __init__(self, keyword, geo, times=None, values=None, topics=None, updated_at=0):
+        self.keyword = keyword
+        self.geo = geo
+        self.times = times if times is not None else array('I')
+        self.values = values if values is not None else array('f')
+        self.topics = topics or []
+        self.updated_at = updated_at
+        self.total = sum(self.values)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def last_week(self):
+        return self.times[-1] if self.times else None
+
+    def is_current(self, now=None):
+        """True when the newest complete week is already stored"""
+        return bool(self.times) and self.times[-1] >= week_start(now or time.time()) - WEEK_SECONDS
+
+    def merge(self, points):
+        """Append weeks newer than the stored ones, rescaled by the overlapping weeks"""
+        stored = dict(zip(self.times, self.values))
+        overlap = [(stored[start], value) for start, value in points if start in stored]
+        new_sum = sum(value for _, value in overlap)
+        scale = sum(old for old, _ in overlap) / new_sum if overlap and new_sum else 1.0
+
+        last = self.last_week or 0
+        for start, value in points:
+            if start > last:
+                self.times.append(start)
+                self.values.append(value * scale)
+                self.total += self.values[-1]
+
+        # Slide the window; the running total keeps momentum O(new weeks)
+        excess = len(self.times) - WINDOW_WEEKS
+        if excess > 0:
+            self.total -= sum(self.values[:excess])
+            del self.times[:excess]
+            del self.values[:excess]
+
+    @property
+    def current_interest(self):
+        """Mean of the last RECENT_WEEKS on the 0-100 scale of the window's peak"""
+        if not self.values:
+            return 0.0
+        peak = max(self.values)
+        recent = self.values[-RECENT_WEEKS:]
+        return 100 * (sum(recent) / len(recent)) / peak if peak else 0.0
+
+    @property
+    def momentum(self):
+        """Recent mean over the window mean"""
+        if not self.values or not self.total:
+            return 0.0
+        recent = self.values[-RECENT_WEEKS:]
+        return (sum(recent) / len(recent)) / (self.total / len(self.values))
+
+    def summary(self):
+        return {
+            'current_interest': round(self.current_interest, 2),
+            'momentum': round(self.momentum, 2),
+            'trending_topics': self.topics[:3],
+            'weeks': len(self),
+            'latest_week': datetime.fromtimestamp(self.last_week, timezone.utc).strftime('%Y-%m-%d') if self.times else None
+        }
+
+
+class TrendsClient:
+    """Explore, then the interest-over-time and related-queries widgets it returns"""
+
+    def __init__(self, explore_url=TRENDS_EXPLORE_URL, multiline_url=TRENDS_MULTILINE_URL,
+                 related_url=TRENDS_RELATED_URL):
+        self.explore_url = explore_url
+        self.multiline_url = multiline_url
+        self.related_url = related_url
+
+    def _get(self, url, params):
+        response = get_session().get(url, params=dict(params, hl='en-US', tz=-360), headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }, timeout=DEFAULT_TIMEOUT)
+        if response.status_code != 200:
+            raise Exception(f"Trends API failed: {response.status_code}")
+        return parse_trends_json(response.text)
+
+    def explore(self, keyword, geo, timeframe):
+        data = self._get(self.explore_url, {'req': json.dumps({
+            'comparisonItem': [{'keyword': keyword, 'geo': geo, 'time': timeframe}],
+            'category': 0,
+            'property': ''
+        })})
+        return {widget['id']: widget for widget in data.get('widgets', [])}
+
+    def _widget_data(self, url, widget):
+        return self._get(url, {'req': json.dumps(widget['request']), 'token': widget['token']})
+
+    def timeline(self, widget):
+        return self._widget_data(self.multiline_url, widget)['default']['timelineData']
+
+    def rising_queries(self, widget):
+        ranked = self._widget_data(self.related_url, widget)['default'].get('rankedList', [])
+        rising = ranked[1]['rankedKeyword'] if len(ranked) > 1 else []
+        return [item['query'] for item in rising]
+
+
+class LocalSeriesStore:
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def get(self, keyword, geo):
+        with self._lock:
+            return self._series.get((keyword, geo))
+
+    def put(self, series):
+        with self._lock:
+            self._series[(series.keyword, series.geo)] = series
+
+
+class DynamoSeriesStore:
+    """Series items in the analysis table: query_id='trends#<keyword>|<geo>', arrays as binary"""
+
+    def __init__(self, table_name=None, client=None):
+        self.table_name = table_name or ANALYSIS_TABLE
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('dynamodb')
+        return self._client
+
+    def _key(self, keyword, geo):
+        return {'query_id': {'S': f"trends#{keyword}|{geo}"}, 'timestamp': {'S': SERIES_SORT_KEY}}
+
+    def get(self, keyword, geo):
+        item = self.client.get_item(TableName=self.table_name, Key=self._key(keyword, geo)).get('Item')
+        if not item:
+            return None
+        times, values = array('I'), array('f')
+        times.frombytes(item['times']['B'])
+        values.frombytes(item['values']['B'])
+        return TrendSeries(keyword, geo, times, values, json.loads(item['topics']['S']), float(item['updated_at']['N']))
+
+    def put(self, series):
+        item = self._key(series.keyword, series.geo)
+        item.update({
+            'times': {'B': series.times.tobytes()},
+            'values': {'B': series.values.tobytes()},
+            'topics': {'S': json.dumps(series.topics)},
+            'updated_at': {'N': str(series.updated_at)},
+            'expires_at': {'N': str(int(series.updated_at + SERIES_RETENTION_SECONDS))}
+        })
+        self.client.put_item(TableName=self.table_name, Item=item)
+
+
+class TrendsIngester:
+    """Serve interest-over-time per (keyword, geo), fetching only weeks not stored yet.
+
+    The in-process copy answers warm calls; the shared store (if any) carries
+    series across containers. Shared-store errors only cost a full fetch.
+    """
+
+    def __init__(self, client=None, shared=None):
+        self.client = client or TrendsClient()
+        self.shared = shared
+        self.local = LocalSeriesStore()
+
+    def _load(self, keyword, geo):
+        series = self.local.get(keyword, geo)
+        if series is not None or self.shared is None:
+            return series
+        try:
+            return self.shared.get(keyword, geo)
+        except Exception as e:
+            print(f"Trends series read failed for {keyword}/{geo}: {e}")
+            return None
+
+    def series(self, keyword, geo):
+        keyword = ' '.join(str(keyword).lower().split())
+        geo = str(geo).upper()
+        now = time.time()
+        series = self._load(keyword, geo)
+        if series is not None and series.is_current(now):
+            self.local.put(series)
+            return series
+
+        if series is None or not len(series):
+            series = TrendSeries(keyword, geo)
+            timeframe = 'today 12-m'
+        else:
+            since = datetime.fromtimestamp(series.last_week - OVERLAP_WEEKS * WEEK_SECONDS, timezone.utc)
+            timeframe = f"{since:%Y-%m-%d} {datetime.fromtimestamp(now, timezone.utc):%Y-%m-%d}"
+
+        widgets = self.client.explore(keyword, geo, timeframe)
+        series.merge(weekly_points(self.client.timeline(widgets['TIMESERIES']), now))
+        if 'RELATED_QUERIES' in widgets:
+            try:
+                series.topics = self.client.rising_queries(widgets['RELATED_QUERIES'])[:5] or series.topics
+            except Exception as e:
+                print(f"Trends related queries failed for {keyword}: {e}")
+        series.updated_at = now
+
+        self.local.put(series)
+        if self.shared is not None:
+            try:
+                self.shared.put(series)
+            except Exception as e:
+                print(f"Trends series write failed for {keyword}/{geo}: {e}")
+        return series
+
+
+def create_trends_ingester():
+    """Ingester sharing series through the analysis table unless ANALYSIS_CACHE_SHARED=false"""
+    return TrendsIngester(shared=DynamoSeriesStore() if shared_cache_enabled() else None)
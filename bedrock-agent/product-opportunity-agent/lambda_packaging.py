@@ -0,0 +1,81 @@
+import os
+
+# Packaging helpers shared by the deploy and update scripts, which run from
+# this directory. Every handler that imports opportunity_common gets the
+# package bundled next to it, so it also works on functions without the layer.
+
+SHARED_PACKAGE = 'lambda/opportunity_common'
+
+def get_shared_layers(lambda_client):
+    """Latest requests layer, which provides requests and numpy for opportunity_common"""
+    versions = lambda_client.list_layer_versions(LayerName='requests-layer')['LayerVersions']
+    return [versions[0]['LayerVersionArn']] if versions else []
+
+def update_shared_configuration(lambda_client, function_name, **configuration):
+    """Once a code update finishes, apply configuration and point the function at the latest requests layer"""
+    lambda_client.get_waiter('function_updated').wait(FunctionName=function_name)
+    layers = get_shared_layers(lambda_client)
+    if layers:
+        configuration['Layers'] = layers
+    if configuration:
+        lambda_client.update_function_configuration(FunctionName=function_name, **configuration)
+
+def add_shared_package(zip_file):
+    """Bundle lambda/opportunity_common next to the handler"""
+    for root, dirs, files in os.walk(SHARED_PACKAGE):
+        dirs[:] = [d for d in dirs if d != '__pycache__']
+        for file in files:
+            if file.endswith('.py'):
+                file_path = os.path.join(root, file)
+                zip_file.write(file_path, os.path.relpath(file_path, 'lambda'))
+
+# The market demand scorer keeps its weekly demand history (opportunity_common.history)
+# in DEMAND_HISTORY_DIR, /tmp by default, so each container builds its own and
+# loses it when recycled. To share one history between every container and
+# function, create an EFS file system with an access point and set these before
+# deploying:
+#
+#   DEMAND_HISTORY_EFS_ACCESS_POINT   access point ARN
+#   DEMAND_HISTORY_SUBNETS            comma separated subnets with a mount target
+#   DEMAND_HISTORY_SECURITY_GROUPS    comma separated groups allowed to reach NFS (2049)
+#
+# The functions then join the VPC (they need a NAT gateway for the upstream APIs)
+# and mount the access point at HISTORY_MOUNT_PATH.
+HISTORY_MOUNT_PATH = '/mnt/demand-history'
+HISTORY_ROLE_POLICIES = (
+    'arn:aws:iam::aws:policy/service-role/AWSLambdaVPCAccessExecutionRole',
+    'arn:aws:iam::aws:policy/AmazonElasticFileSystemClientReadWriteAccess'
+)
+
+def _env_list(name):
+    return [value.strip() for value in os.environ.get(name, '').split(',') if value.strip()]
+
+def mount_demand_history(lambda_client, iam, function_name):
+    """Mount the shared EFS demand history on a function; False when no access point is configured"""
+    access_point = os.environ.get('DEMAND_HISTORY_EFS_ACCESS_POINT')
+    if not access_point:
+        print(f"{function_name} keeps its demand history in /tmp (set DEMAND_HISTORY_EFS_ACCESS_POINT to share it)")
+        return False
+    
+    lambda_client.get_waiter('function_updated').wait(FunctionName=function_name)
+    configuration = lambda_client.get_function_configuration(FunctionName=function_name)
+    
+    # The execution role needs to manage VPC network interfaces and mount the file system
+    role_name = configuration['Role'].rpartition('/')[2]
+    for policy_arn in HISTORY_ROLE_POLICIES:
+        iam.attach_role_policy(RoleName=role_name, PolicyArn=policy_arn)
+    
+    variables = configuration.get('Environment', {}).get('Variables', {})
+    variables['DEMAND_HISTORY_DIR'] = HISTORY_MOUNT_PATH
+    
+    lambda_client.update_function_configuration(
+        FunctionName=function_name,
+        VpcConfig={
+            'SubnetIds': _env_list('DEMAND_HISTORY_SUBNETS'),
+            'SecurityGroupIds': _env_list('DEMAND_HISTORY_SECURITY_GROUPS')
+        },
+        FileSystemConfigs=[{'Arn': access_point, 'LocalMountPath': HISTORY_MOUNT_PATH}],
+        Environment={'Variables': variables}
+    )
+    print(f"Mounted shared demand history on {function_name} at {HISTORY_MOUNT_PATH}")
+    return True
@@ -48,7 +48,7 @@ def create_orchestrator_agent():
     
     time.sleep(10)
     
-    agent_instruction = """You are a Product Opportunity Orchestrator. Analyze product ideas and coordinate with domain agents to provide DCC scores (Demand + Competition + Capability). Break down requests and provide ranked recommendations."""
+    agent_instruction = """You are a Product Opportunity Orchestrator. Analyze product ideas and coordinate with domain agents to provide DCC scores (Demand + Competition + Capability). Break down requests and provide ranked recommendations. When comparing several product ideas, send them all in a single /rank-opportunities call instead of analyzing each idea separately. Before re-analyzing an idea, check /recent-analyses for a stored result."""
     
     try:
         agent_response = bedrock.create_agent(
@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package
 
 def restore_working_version():
     """Restore the working mock version"""
@@ -8,6 +9,7 @@ def restore_working_version():
     
     with zipfile.ZipFile("market-demand-working.zip", 'w') as zip_file:
         zip_file.write("lambda/market-demand-simple.py", "market-demand-function.py")
+        add_shared_package(zip_file)
     
     with open("market-demand-working.zip", 'rb') as zip_file:
         lambda_client.update_function_code(
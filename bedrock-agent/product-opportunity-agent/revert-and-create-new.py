@@ -2,6 +2,7 @@ import boto3
 import zipfile
 import json
 import os
+from lambda_packaging import add_shared_package
 
 def revert_and_create_new():
     """Revert existing functions and create new enhanced ones"""
@@ -38,6 +39,7 @@ def revert_and_create_new():
             zip_filename = f"{func_name}-revert.zip"
             with zipfile.ZipFile(zip_filename, 'w') as zip_file:
                 zip_file.write(current_file, 'lambda_function.py')
+                add_shared_package(zip_file)
             
             with open(zip_filename, 'rb') as zip_file:
                 lambda_client.update_function_code(
@@ -82,6 +84,7 @@ def revert_and_create_new():
             
             with zipfile.ZipFile(zip_filename, 'w') as zip_file:
                 zip_file.write(func['file'], 'lambda_function.py')
+                add_shared_package(zip_file)
             
             with open(zip_filename, 'rb') as zip_file:
                 try:
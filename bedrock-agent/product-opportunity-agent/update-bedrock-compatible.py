@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package
 
 def update_bedrock_compatible():
     """Update Lambda functions to be Bedrock-compatible"""
@@ -10,6 +11,7 @@ def update_bedrock_compatible():
     market_zip = "market-demand-bedrock.zip"
     with zipfile.ZipFile(market_zip, 'w') as zip_file:
         zip_file.write("lambda/market-demand-bedrock.py", "market-demand-function.py")
+        add_shared_package(zip_file)
     
     with open(market_zip, 'rb') as zip_file:
         lambda_client.update_function_code(
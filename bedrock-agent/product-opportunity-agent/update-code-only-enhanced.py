@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package, update_shared_configuration
 
 def update_code_only_enhanced():
     """Update enhanced function code only"""
@@ -8,12 +9,14 @@ def update_code_only_enhanced():
     
     with zipfile.ZipFile("enhanced-market-demand-real.zip", 'w') as zip_file:
         zip_file.write("lambda/enhanced-market-demand-real-api.py", "lambda_function.py")
+        add_shared_package(zip_file)
     
     with open("enhanced-market-demand-real.zip", 'rb') as zip_file:
         lambda_client.update_function_code(
             FunctionName='enhanced-market-demand-copy',
             ZipFile=zip_file.read()
         )
+    update_shared_configuration(lambda_client, 'enhanced-market-demand-copy')
     
     print("Updated enhanced-market-demand-copy with real API integration")
 
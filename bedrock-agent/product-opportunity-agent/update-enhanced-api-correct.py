@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package
 
 def update_enhanced_api_correct():
     """Update enhanced function with API calls and correct format"""
@@ -8,6 +9,7 @@ def update_enhanced_api_correct():
     
     with zipfile.ZipFile("enhanced-api-correct.zip", 'w') as zip_file:
         zip_file.write("lambda/enhanced-market-demand-api-correct.py", "lambda_function.py")
+        add_shared_package(zip_file)
     
     with open("enhanced-api-correct.zip", 'rb') as zip_file:
         lambda_client.update_function_code(
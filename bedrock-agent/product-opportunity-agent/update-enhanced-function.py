@@ -1,13 +1,16 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package, mount_demand_history, update_shared_configuration
 
 def update_enhanced_function():
     """Update enhanced-market-demand-copy with real API integration"""
     
     lambda_client = boto3.client('lambda', region_name='us-east-1')
+    iam = boto3.client('iam')
     
     with zipfile.ZipFile("enhanced-market-demand-real.zip", 'w') as zip_file:
         zip_file.write("lambda/enhanced-market-demand-real-api.py", "lambda_function.py")
+        add_shared_package(zip_file)
     
     with open("enhanced-market-demand-real.zip", 'rb') as zip_file:
         lambda_client.update_function_code(
@@ -15,9 +18,9 @@ def update_enhanced_function():
             ZipFile=zip_file.read()
         )
     
-    # Add environment variables for API keys
-    lambda_client.update_function_configuration(
-        FunctionName='enhanced-market-demand-copy',
+    # Add environment variables for API keys; the layer provides numpy and requests
+    update_shared_configuration(
+        lambda_client, 'enhanced-market-demand-copy',
         Environment={
             'Variables': {
                 'NEWS_API_KEY': 'your_news_api_key_here',
@@ -26,6 +29,7 @@ def update_enhanced_function():
         },
         Timeout=30
     )
+    mount_demand_history(lambda_client, iam, 'enhanced-market-demand-copy')
     
     print("Updated enhanced-market-demand-copy with real API integration")
     print("Note: Add your actual API keys to environment variables for real API calls")
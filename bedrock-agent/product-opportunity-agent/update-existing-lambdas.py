@@ -1,6 +1,7 @@
 import boto3
 import zipfile
 import os
+from lambda_packaging import add_shared_package
 
 def update_existing_lambdas():
     """Update existing Lambda functions with enhanced code"""
@@ -41,6 +42,7 @@ def update_existing_lambdas():
             
             with zipfile.ZipFile(zip_filename, 'w') as zip_file:
                 zip_file.write(py_file, 'lambda_function.py')
+                add_shared_package(zip_file)
             
             # Update function code
             with open(zip_filename, 'rb') as zip_file:
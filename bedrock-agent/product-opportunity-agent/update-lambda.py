@@ -1,6 +1,7 @@
 import boto3
 import zipfile
 import json
+from lambda_packaging import add_shared_package
 
 def update_market_demand_lambda():
     """Update the market demand Lambda function"""
@@ -12,6 +13,7 @@ def update_market_demand_lambda():
     
     with zipfile.ZipFile(zip_path, 'w') as zip_file:
         zip_file.write("lambda/market-demand-function-fixed.py", "market-demand-function-fixed.py")
+        add_shared_package(zip_file)
     
     # Update function code
     with open(zip_path, 'rb') as zip_file:
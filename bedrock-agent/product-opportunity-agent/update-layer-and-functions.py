@@ -1,4 +1,5 @@
 import boto3
+import shutil
 import subprocess
 import zipfile
 import os
@@ -16,9 +17,17 @@ def update_layer_and_functions():
     
     # Install dependencies
     subprocess.run([
-        "pip", "install", "requests", "pytrends", "-t", python_dir
+        "pip", "install", "requests", "pytrends", "numpy", "-t", python_dir
     ], check=True)
     
+    # Bundle shared helpers used by the Lambda functions
+    shared_dir = f"{python_dir}/opportunity_common"
+    shutil.rmtree(shared_dir, ignore_errors=True)
+    shutil.copytree(
+        "lambda/opportunity_common", shared_dir,
+        ignore=shutil.ignore_patterns("__pycache__", "*.pyc")
+    )
+    
     # Create layer zip
     layer_zip = "enhanced-layer.zip"
     with zipfile.ZipFile(layer_zip, 'w') as zip_file:
@@ -84,6 +93,7 @@ def update_layer_and_functions():
         Environment={
             'Variables': {
                 'EBAY_APP_ID': 'your_ebay_app_id',
+                'EBAY_CERT_ID': 'your_ebay_cert_id',
                 'AMAZON_ACCESS_KEY': 'your_amazon_access_key',
                 'AMAZON_SECRET_KEY': 'your_amazon_secret_key'
             }
@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package
 
 def update_original_mock():
     """Update to original mock version with Bedrock compatibility"""
@@ -8,6 +9,7 @@ def update_original_mock():
     
     with zipfile.ZipFile("market-demand-original.zip", 'w') as zip_file:
         zip_file.write("lambda/market-demand-original-mock.py", "market-demand-function.py")
+        add_shared_package(zip_file)
     
     with open("market-demand-original.zip", 'rb') as zip_file:
         lambda_client.update_function_code(
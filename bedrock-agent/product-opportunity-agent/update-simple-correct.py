@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package
 
 def update_simple_correct():
     """Update to simple correct format"""
@@ -8,6 +9,7 @@ def update_simple_correct():
     
     with zipfile.ZipFile("enhanced-simple-correct.zip", 'w') as zip_file:
         zip_file.write("lambda/enhanced-market-demand-simple-correct.py", "lambda_function.py")
+        add_shared_package(zip_file)
     
     with open("enhanced-simple-correct.zip", 'rb') as zip_file:
         lambda_client.update_function_code(
@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package, update_shared_configuration
 
 def update_to_hybrid_functions():
     """Update functions to hybrid versions with enhanced mock fallback"""
@@ -10,23 +11,27 @@ def update_to_hybrid_functions():
     market_zip = "market-demand-hybrid.zip"
     with zipfile.ZipFile(market_zip, 'w') as zip_file:
         zip_file.write("lambda/market-demand-hybrid.py", "market-demand-function.py")
+        add_shared_package(zip_file)
     
     with open(market_zip, 'rb') as zip_file:
         lambda_client.update_function_code(
             FunctionName='market-demand-agent',
             ZipFile=zip_file.read()
         )
+    update_shared_configuration(lambda_client, 'market-demand-agent')
     
     # Update competitor scan to use enhanced mock
     competitor_zip = "competitor-scan-enhanced.zip"
     with zipfile.ZipFile(competitor_zip, 'w') as zip_file:
         zip_file.write("lambda/competitor-scan-real-api.py", "competitor-scan-function.py")
+        add_shared_package(zip_file)
     
     with open(competitor_zip, 'rb') as zip_file:
         lambda_client.update_function_code(
             FunctionName='competitor-scan-agent',
             ZipFile=zip_file.read()
         )
+    update_shared_configuration(lambda_client, 'competitor-scan-agent')
     
     print("Updated functions to hybrid versions with enhanced analysis")
 
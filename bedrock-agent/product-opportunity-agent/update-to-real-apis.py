@@ -1,5 +1,6 @@
 import boto3
 import zipfile
+from lambda_packaging import add_shared_package, update_shared_configuration
 
 def update_lambdas_to_real_apis():
     """Update Lambda functions to use real APIs instead of mock data"""
@@ -26,6 +27,7 @@ def update_lambdas_to_real_apis():
     competitor_zip = "competitor-scan-real.zip"
     with zipfile.ZipFile(competitor_zip, 'w') as zip_file:
         zip_file.write("lambda/competitor-scan-real-api.py", "competitor-scan-real-api.py")
+        add_shared_package(zip_file)
     
     with open(competitor_zip, 'rb') as zip_file:
         lambda_client.update_function_code(
@@ -33,8 +35,8 @@ def update_lambdas_to_real_apis():
             ZipFile=zip_file.read()
         )
     
-    lambda_client.update_function_configuration(
-        FunctionName='competitor-scan-agent',
+    update_shared_configuration(
+        lambda_client, 'competitor-scan-agent',
         Handler='competitor-scan-real-api.lambda_handler'
     )
     